@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compare the cost of encoding audio frames against the protobuf path.
+
+* protobuf: VoiceAssistantAudio message, SerializeToString, and
+  make_plain_text_packets (how audio was sent before audio_frame_header)
+* fast: cached frame header in front of the audio, without copying it
+
+Run from the repository root:
+
+    python3 -m benchmarks.audio_encoder --frame-bytes 2048 --frames 100000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List
+
+# pylint: disable=no-name-in-module
+from aioesphomeapi._frame_helper.packets import make_plain_text_packets
+from aioesphomeapi.api_pb2 import VoiceAssistantAudio  # type: ignore[attr-defined]
+
+from linux_voice_assistant.api_server import PROTO_TO_MESSAGE_TYPE, audio_frame_header
+
+
+def encode_protobuf(audio: bytes) -> List[bytes]:
+    msg = VoiceAssistantAudio(data=audio)
+    return make_plain_text_packets(
+        [(PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())]
+    )
+
+
+def encode_fast(audio: bytes) -> List[bytes]:
+    return [audio_frame_header(len(audio)), audio]
+
+
+def measure(encode: Callable[[bytes], List[bytes]], frames: List[bytes]) -> dict:
+    # Warm up
+    for frame in frames[:100]:
+        encode(frame)
+
+    start = time.process_time()
+    for frame in frames:
+        encode(frame)
+    cpu_seconds = time.process_time() - start
+
+    # Bytes allocated while encoding a frame (freed or not)
+    allocated = 0
+    tracemalloc.start()
+    for frame in frames[:100]:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        encode(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+
+    return {
+        "cpu_us_per_frame": 1e6 * cpu_seconds / len(frames),
+        "frames_per_second": round(len(frames) / cpu_seconds),
+        "allocated_bytes_per_frame": allocated / 100,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frame-bytes", type=int, default=2048)
+    parser.add_argument("--frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    frames = [bytes([i % 256]) * args.frame_bytes for i in range(args.frames)]
+    for frame in frames[:100]:
+        assert b"".join(encode_fast(frame)) == b"".join(encode_protobuf(frame))
+
+    protobuf_results = measure(encode_protobuf, frames)
+    fast_results = measure(encode_fast, frames)
+    results = {
+        "frame_bytes": args.frame_bytes,
+        "protobuf": protobuf_results,
+        "fast": fast_results,
+        "speedup": round(
+            protobuf_results["cpu_us_per_frame"] / fast_results["cpu_us_per_frame"],
+            2,
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Compare frames per second of the ESPHome frame decoder against the old one.
+
+The stream is a mix of messages that Home Assistant sends to a satellite
+(pipeline events, pings, switch commands, and some larger messages). It is
+fed to each decoder in several ways:
+
+* aligned: one frame per read
+* fragmented: random reads of 1-256 bytes, like a slow or busy connection
+* coalesced: 64 KiB reads, like a blocked event loop catching up
+
+Run from the repository root:
+
+    python3 -m benchmarks.frame_decoder --frames 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, List, Optional, Tuple
+
+# pylint: disable=no-name-in-module
+from aioesphomeapi._frame_helper.packets import make_plain_text_packets
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    PingRequest,
+    SwitchCommandRequest,
+    VoiceAssistantAnnounceRequest,
+    VoiceAssistantEventData,
+    VoiceAssistantEventResponse,
+)
+
+from linux_voice_assistant.api_server import PROTO_TO_MESSAGE_TYPE, FrameDecoder
+
+Frames = List[Tuple[int, bytes]]
+
+
+class LegacyDecoder:
+    """Frame parsing from APIServer.data_received before FrameDecoder."""
+
+    def __init__(self) -> None:
+        self._buffer: Optional[bytes] = None
+        self._buffer_len = 0
+        self._pos = 0
+        self.frames: Frames = []
+
+    def feed(self, data: bytes) -> None:
+        if self._buffer is None:
+            self._buffer = data
+            self._buffer_len = len(data)
+        else:
+            self._buffer += data
+            self._buffer_len += len(data)
+
+        while self._buffer_len >= 3:
+            self._pos = 0
+            if self._read_varuint() != 0x00:
+                return
+
+            if (length := self._read_varuint()) == -1:
+                return
+
+            if (msg_type := self._read_varuint()) == -1:
+                return
+
+            if length == 0:
+                self._remove_from_buffer()
+                self.frames.append((msg_type, b""))
+                continue
+
+            if (packet_data := self._read(length)) is None:
+                return
+
+            self._remove_from_buffer()
+            self.frames.append((msg_type, packet_data))
+
+    def _read(self, length: int) -> Optional[bytes]:
+        new_pos = self._pos + length
+        if self._buffer_len < new_pos:
+            return None
+
+        assert self._buffer is not None
+        original_pos = self._pos
+        self._pos = new_pos
+        return self._buffer[original_pos:new_pos]
+
+    def _read_varuint(self) -> int:
+        if not self._buffer:
+            return -1
+
+        result = 0
+        bitpos = 0
+        while self._buffer_len > self._pos:
+            val = self._buffer[self._pos]
+            self._pos += 1
+            result |= (val & 0x7F) << bitpos
+            if (val & 0x80) == 0:
+                return result
+            bitpos += 7
+        return -1
+
+    def _remove_from_buffer(self) -> None:
+        end_of_frame_pos = self._pos
+        self._buffer_len -= end_of_frame_pos
+        if self._buffer_len == 0:
+            self._buffer = None
+            return
+
+        assert self._buffer is not None
+        self._buffer = self._buffer[
+            end_of_frame_pos : self._buffer_len + end_of_frame_pos
+        ]
+
+
+def make_frames(num_frames: int, rng: random.Random) -> Frames:
+    event = VoiceAssistantEventResponse(
+        event_type=1,
+        data=[
+            VoiceAssistantEventData(name="conversation_id", value="01JABCDEF"),
+            VoiceAssistantEventData(name="text", value="Turned on the lights"),
+        ],
+    )
+    announce = VoiceAssistantAnnounceRequest(
+        media_id="http://homeassistant.local:8123/api/tts_proxy/" + "a" * 300,
+        text="The timer is done " * 10,
+    )
+    messages = [
+        (0.6, event),
+        (0.2, PingRequest()),
+        (0.15, SwitchCommandRequest(key=1, state=True)),
+        (0.05, announce),
+    ]
+    weights = [weight for weight, _msg in messages]
+    encoded = [
+        (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+        for _weight, msg in messages
+    ]
+
+    return rng.choices(encoded, weights=weights, k=num_frames)
+
+
+def split_stream(frames: Frames, mode: str, rng: random.Random) -> List[bytes]:
+    if mode == "aligned":
+        return [b"".join(make_plain_text_packets([frame])) for frame in frames]
+
+    stream = b"".join(make_plain_text_packets(frames))
+    chunks: List[bytes] = []
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(1, 256) if mode == "fragmented" else 64 * 1024
+        chunks.append(stream[pos : pos + size])
+        pos += size
+
+    return chunks
+
+
+def decode_legacy(chunks: List[bytes]) -> Frames:
+    decoder = LegacyDecoder()
+    for chunk in chunks:
+        decoder.feed(chunk)
+
+    return decoder.frames
+
+
+def decode_new(chunks: List[bytes]) -> Frames:
+    decoder = FrameDecoder()
+    frames: Frames = []
+    for chunk in chunks:
+        frames.extend(decoder.feed(chunk))  # type: ignore[arg-type]
+
+    return frames
+
+
+def measure(
+    decode: Callable[[List[bytes]], Frames], chunks: List[bytes], runs: int
+) -> float:
+    """Return frames per second (best of runs)."""
+    best_seconds = float("inf")
+    num_frames = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        num_frames = len(decode(chunks))
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+
+    return num_frames / best_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    frames = make_frames(args.frames, rng)
+
+    results = {}
+    for mode in ("aligned", "fragmented", "coalesced"):
+        chunks = split_stream(frames, mode, rng)
+
+        # Both decoders must produce the same frames
+        expected = [(msg_type, bytes(data)) for msg_type, data in frames]
+        assert [(t, bytes(d)) for t, d in decode_legacy(chunks)] == expected
+        assert [(t, bytes(d)) for t, d in decode_new(chunks)] == expected
+
+        legacy_fps = measure(decode_legacy, chunks, args.runs)
+        new_fps = measure(decode_new, chunks, args.runs)
+        results[mode] = {
+            "reads": len(chunks),
+            "legacy_frames_per_second": round(legacy_fps),
+            "frames_per_second": round(new_fps),
+            "speedup": round(new_fps / legacy_fps, 2),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Per-chunk wall time vs. number of microphone channels.
+
+Each channel runs its own features and wake word models, so this shows how
+many channels a device can keep up with (real_time_factor < 1).
+
+Run from the repository root:
+
+    python3 -m benchmarks.multichannel --channels 4 --wake-word okay_nabu
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from pymicro_wakeword import MicroWakeWord
+
+from linux_voice_assistant.multichannel import ChannelMixer, MultiChannelDetector
+from linux_voice_assistant.wake_word import find_available_wake_words
+
+_REPO_DIR = Path(__file__).parent.parent
+_WAKEWORDS_DIR = _REPO_DIR / "wakewords"
+
+
+def measure(
+    channels: int, wake_words, stop_word, audio, block_size, beamform, executor
+) -> dict:
+    """Return mean wall time per chunk in milliseconds."""
+    mixer = ChannelMixer(channels, block_size, beamform=beamform)
+    detector = MultiChannelDetector(channels, executor=executor)
+    detector.set_wake_words(wake_words)
+
+    # Warm up (loads per-channel copies of the models)
+    interleaved = np.repeat(audio[:block_size], channels)
+    detector.process(mixer.split(interleaved), stop_word)
+
+    mix_seconds = 0.0
+    detect_seconds = 0.0
+    num_chunks = 0
+    for i in range(block_size, len(audio) - block_size + 1, block_size):
+        # Same audio on all channels, with a per-channel offset
+        interleaved = np.stack(
+            [np.roll(audio[i : i + block_size], c) for c in range(channels)], axis=1
+        ).reshape(-1)
+
+        start = time.perf_counter()
+        channel_chunks = mixer.split(interleaved)
+        mixer.stream()
+        mix_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector.process(channel_chunks, stop_word)
+        detect_seconds += time.perf_counter() - start
+        num_chunks += 1
+
+    chunk_seconds = block_size / 16000
+    ms_per_chunk = 1000 * (mix_seconds + detect_seconds) / num_chunks
+
+    return {
+        "channels": channels,
+        "mix_ms_per_chunk": 1000 * mix_seconds / num_chunks,
+        "detect_ms_per_chunk": 1000 * detect_seconds / num_chunks,
+        "ms_per_chunk": ms_per_chunk,
+        "ms_per_channel": ms_per_chunk / channels,
+        "real_time_factor": ms_per_chunk / (1000 * chunk_seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--wake-word",
+        action="append",
+        help="Id of wake word model (default: okay_nabu)",
+    )
+    parser.add_argument("--channels", type=int, default=4, help="Maximum channels")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--beamform", action="store_true")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    available_wake_words = find_available_wake_words(
+        [_WAKEWORDS_DIR, _WAKEWORDS_DIR / "openWakeWord"], exclude_ids=["stop"]
+    )
+    wake_word_ids = args.wake_word or ["okay_nabu"]
+    wake_words = [available_wake_words[ww_id].load() for ww_id in wake_word_ids]
+    stop_word = MicroWakeWord.from_config(_WAKEWORDS_DIR / "stop.json")
+
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 1000, size=int(args.seconds * 16000)).astype("<i2")
+
+    executor: Optional[ThreadPoolExecutor] = None
+    if args.threads > 0:
+        executor = ThreadPoolExecutor(max_workers=args.threads)
+
+    try:
+        results = [
+            measure(
+                channels,
+                wake_words,
+                stop_word,
+                audio,
+                args.block_size,
+                args.beamform,
+                executor,
+            )
+            for channels in range(1, args.channels + 1)
+        ]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(
+        json.dumps(
+            {
+                "cpus": os.cpu_count(),
+                "threads": args.threads,
+                "block_size": args.block_size,
+                "beamform": args.beamform,
+                "wake_words": wake_word_ids,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
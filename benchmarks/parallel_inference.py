@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Per-chunk wall time vs. number of active wake words, with and without threads.
+
+Run from the repository root:
+
+    python3 -m benchmarks.parallel_inference --threads 4 --wake-word hey_jarvis_v0.1 --wake-word alexa_v0.1
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from pymicro_wakeword import MicroWakeWord
+
+from linux_voice_assistant.audio_buffer import pcm_bytes
+from linux_voice_assistant.wake_word import WakeWordDetector, find_available_wake_words
+
+_REPO_DIR = Path(__file__).parent.parent
+_WAKEWORDS_DIR = _REPO_DIR / "wakewords"
+
+
+def measure(wake_words, stop_word, audio, block_size, executor) -> float:
+    """Return mean wall time per chunk in milliseconds."""
+    for wake_word in wake_words:
+        wake_word.reset()
+
+    stop_word.reset()
+    detector = WakeWordDetector(executor=executor)
+    detector.set_wake_words(wake_words)
+
+    # Warm up
+    detector.process(pcm_bytes(audio[:block_size]), stop_word)
+
+    num_chunks = 0
+    start = time.perf_counter()
+    for i in range(block_size, len(audio) - block_size + 1, block_size):
+        detector.process(pcm_bytes(audio[i : i + block_size]), stop_word)
+        num_chunks += 1
+
+    return 1000 * (time.perf_counter() - start) / num_chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--wake-word",
+        action="append",
+        help="Id of wake word model (default: all microWakeWord models)",
+    )
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    available_wake_words = find_available_wake_words(
+        [_WAKEWORDS_DIR, _WAKEWORDS_DIR / "openWakeWord"], exclude_ids=["stop"]
+    )
+    wake_word_ids = args.wake_word or sorted(
+        ww_id for ww_id, ww in available_wake_words.items() if ww.type.value == "micro"
+    )
+    wake_words = [available_wake_words[ww_id].load() for ww_id in wake_word_ids]
+    stop_word = MicroWakeWord.from_config(_WAKEWORDS_DIR / "stop.json")
+
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 1000, size=int(args.seconds * 16000)).astype("<i2")
+
+    results = []
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        for num_models in range(1, len(wake_words) + 1):
+            active = wake_words[:num_models]
+            results.append(
+                {
+                    "wake_words": wake_word_ids[:num_models],
+                    "sequential_ms_per_chunk": measure(
+                        active, stop_word, audio, args.block_size, None
+                    ),
+                    "threaded_ms_per_chunk": measure(
+                        active, stop_word, audio, args.block_size, executor
+                    ),
+                }
+            )
+
+    print(
+        json.dumps(
+            {
+                "cpus": os.cpu_count(),
+                "threads": args.threads,
+                "block_size": args.block_size,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
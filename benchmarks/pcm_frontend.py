@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Compare per-chunk cost of the PCM front end against the old conversion.
+
+Run from the repository root:
+
+    python3 -m benchmarks.pcm_frontend --block-size 1024 --chunks 20000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from linux_voice_assistant.audio_buffer import PcmFrontEnd, pcm_bytes
+
+
+def convert_legacy(audio: np.ndarray) -> bytes:
+    # Conversion used by process_audio before PcmFrontEnd
+    return (np.clip(audio.reshape(-1), -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def convert_frontend(frontend: PcmFrontEnd, audio: np.ndarray) -> memoryview:
+    return pcm_bytes(frontend.convert(audio))
+
+
+def measure(convert, blocks, chunks: int) -> dict:
+    # Warm up
+    for block in blocks:
+        convert(block)
+
+    start = time.process_time()
+    for i in range(chunks):
+        convert(blocks[i % len(blocks)])
+    cpu_seconds = time.process_time() - start
+
+    # Bytes allocated while converting a chunk (freed or not)
+    allocated = 0
+    tracemalloc.start()
+    for block in blocks:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        convert(block)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+
+    return {
+        "cpu_us_per_chunk": 1e6 * cpu_seconds / chunks,
+        "allocated_bytes_per_chunk": allocated / len(blocks),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--chunks", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    blocks = [
+        rng.uniform(-1.2, 1.2, size=(args.block_size, 1)).astype(np.float32)
+        for _ in range(16)
+    ]
+
+    frontend = PcmFrontEnd(args.block_size)
+    for block in blocks:
+        assert convert_legacy(block) == bytes(convert_frontend(frontend, block))
+
+    results = {
+        "block_size": args.block_size,
+        "legacy": measure(convert_legacy, blocks, args.chunks),
+        "frontend": measure(
+            lambda block: convert_frontend(frontend, block), blocks, args.chunks
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
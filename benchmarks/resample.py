@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Cost, latency, and quality of in-process resampling to 16Khz.
+
+Without --device, synthetic audio is resampled from each --rate. With
+--device, the microphone is recorded at 16Khz (resampled by the sound
+server) and at --rate (resampled in-process), and the CPU time of this
+process is compared. Server-side resampling costs CPU in the sound server,
+which isn't included.
+
+Run from the repository root:
+
+    python3 -m benchmarks.resample --rate 48000 --rate 44100
+"""
+
+import argparse
+import json
+import math
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from linux_voice_assistant.audio_buffer import PcmFrontEnd
+from linux_voice_assistant.resample import PolyphaseResampler
+
+_SAMPLE_RATE = 16000
+
+
+def _tone(rate: int, frequency: float, seconds: float) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _level_db(audio: np.ndarray) -> float:
+    rms = math.sqrt(float(np.mean(np.square(audio, dtype=np.float64))))
+    return 20 * math.log10(max(rms, 1e-10) / (0.5 / math.sqrt(2)))
+
+
+def measure_synthetic(rate: int, block_size: int, seconds: float) -> Dict[str, Any]:
+    resampler = PolyphaseResampler(rate, _SAMPLE_RATE)
+    capture_block_size = math.ceil(block_size * rate / _SAMPLE_RATE)
+    out = np.zeros(resampler.max_output_frames(capture_block_size), dtype=np.float32)
+    frontend = PcmFrontEnd(len(out))
+
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, size=int(rate * seconds)).astype(np.float32)
+
+    num_blocks = 0
+    start = time.perf_counter()
+    for i in range(0, len(audio) - capture_block_size + 1, capture_block_size):
+        frontend.convert(resampler.process(audio[i : i + capture_block_size], out=out))
+        num_blocks += 1
+
+    elapsed = time.perf_counter() - start
+
+    # Pass band (1Khz) and stop band (just above the 16Khz Nyquist, where
+    # aliases would land in the pass band)
+    settle = resampler.num_taps
+    pass_db = _level_db(
+        PolyphaseResampler(rate, _SAMPLE_RATE).process(_tone(rate, 1000, 1.0))[settle:]
+    )
+    stop_db = _level_db(
+        PolyphaseResampler(rate, _SAMPLE_RATE).process(
+            _tone(rate, min(9000, 0.45 * rate), 1.0)
+        )[settle:]
+    )
+
+    return {
+        "rate": rate,
+        "taps_per_phase": resampler.num_taps,
+        "phases": resampler.up,
+        "us_per_block": 1e6 * elapsed / num_blocks,
+        "real_time_factor": elapsed / (num_blocks * capture_block_size / rate),
+        "latency_ms": 1000 * resampler.latency_samples / rate,
+        "passband_1khz_db": pass_db,
+        "stopband_9khz_db": stop_db,
+    }
+
+
+def measure_device(
+    device: str, rate: int, block_size: int, seconds: float
+) -> Dict[str, Any]:
+    import soundcard as sc  # pylint: disable=import-outside-toplevel
+
+    from linux_voice_assistant.audio_source import (  # pylint: disable=import-outside-toplevel
+        SoundcardSource,
+    )
+
+    try:
+        mic = sc.get_microphone(int(device))
+    except ValueError:
+        mic = sc.get_microphone(device)
+
+    results: Dict[str, Any] = {"device": mic.name, "rate": rate}
+    for name, capture_rate in (("server", None), ("in_process", rate)):
+        with SoundcardSource(mic, block_size, capture_rate=capture_rate) as source:
+            num_samples = 0
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            while num_samples < (seconds * _SAMPLE_RATE):
+                samples = source.read(block_size)
+                assert samples is not None
+                num_samples += len(samples)
+
+            results[name] = {
+                "cpu_seconds": time.process_time() - cpu_start,
+                "wall_seconds": time.perf_counter() - wall_start,
+                "samples": num_samples,
+            }
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, action="append", help="Capture rate")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--device", help="Also record from this microphone")
+    args = parser.parse_args()
+
+    rates: List[int] = args.rate or [48000, 44100]
+    results: Dict[str, Any] = {
+        "block_size": args.block_size,
+        "synthetic": [
+            measure_synthetic(rate, args.block_size, args.seconds) for rate in rates
+        ],
+    }
+
+    if args.device is not None:
+        results["device"] = [
+            measure_device(args.device, rate, args.block_size, args.seconds)
+            for rate in rates
+        ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Startup latency of the voice assistant.
+
+Measures, over several runs of fresh interpreters:
+
+* import: importing linux_voice_assistant.__main__
+* help: running --help (argument parsing only)
+* listening: from process start until the API port accepts connections
+* discoverable: from process start until the zeroconf service is registered
+* detecting: from process start until the wake word models are loaded and
+  warmed up (the server is already up while they load)
+* first_chunk: from process start until the first audio chunk went through
+  wake word processing (a client is connected as soon as the port is open,
+  since models only run while Home Assistant is connected)
+
+Audio is read from a generated WAV file, so no microphone is needed. mpv
+must be available. Extra arguments after -- are passed to the voice
+assistant.
+
+Run from the repository root:
+
+    python3 -m benchmarks.startup --runs 5
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Log messages that mark each milestone
+_MESSAGES = {
+    "discoverable": "Server discoverable",
+    "detecting": "Wake word detection ready",
+    "first_chunk": "Processed first audio chunk",
+}
+_MILESTONES = ["listening", *_MESSAGES]
+_CONNECT_POLL_SECONDS = 0.005
+
+
+def measure_import() -> float:
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import time; start = time.perf_counter(); "
+            "import linux_voice_assistant.__main__; "
+            "print(time.perf_counter() - start)",
+        ]
+    )
+    return float(output)
+
+
+def measure_help() -> float:
+    start = time.perf_counter()
+    subprocess.check_call(
+        [sys.executable, "-m", "linux_voice_assistant", "--help"],
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def measure_startup(
+    temp_dir: Path, port: int, timeout: float, extra_args: List[str]
+) -> Dict[str, Optional[float]]:
+    command = [
+        sys.executable,
+        "-m",
+        "linux_voice_assistant",
+        "--debug",
+        "--name",
+        "lva-benchmark",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--audio-input-file",
+        str(temp_dir / "silence.wav"),
+        "--preferences-file",
+        str(temp_dir / "preferences.json"),
+        "--download-dir",
+        str(temp_dir / "download"),
+        *extra_args,
+    ]
+
+    results: Dict[str, Optional[float]] = {name: None for name in _MILESTONES}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        command,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    all_logged = threading.Event()
+
+    def read_log() -> None:
+        assert proc.stderr is not None
+        for line in proc.stderr:
+            for name, message in _MESSAGES.items():
+                if (results[name] is None) and (message in line):
+                    results[name] = time.perf_counter() - start
+
+            if all(results[name] is not None for name in _MESSAGES):
+                all_logged.set()
+
+    log_thread = threading.Thread(target=read_log, daemon=True)
+    log_thread.start()
+
+    client: Optional[socket.socket] = None
+    try:
+        deadline = start + timeout
+        while (client is None) and (time.perf_counter() < deadline):
+            if proc.poll() is not None:
+                raise RuntimeError(f"Voice assistant exited: {proc.returncode}")
+
+            try:
+                client = socket.create_connection(("127.0.0.1", port), timeout=1)
+                results["listening"] = time.perf_counter() - start
+            except OSError:
+                time.sleep(_CONNECT_POLL_SECONDS)
+
+        all_logged.wait(max(0, deadline - time.perf_counter()))
+    finally:
+        if client is not None:
+            client.close()
+
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+        log_thread.join(timeout=1)
+
+    return results
+
+
+def _write_silence(wav_path: Path, seconds: float) -> None:
+    with wave.open(str(wav_path), "wb") as wav_file:
+        wav_file.setframerate(16000)
+        wav_file.setsampwidth(2)
+        wav_file.setnchannels(1)
+        wav_file.writeframes(bytes(int(16000 * seconds) * 2))
+
+
+def _summarize(values: List[Optional[float]]) -> Dict[str, Any]:
+    measured = [value for value in values if value is not None]
+    if not measured:
+        return {"runs": 0}
+
+    return {
+        "runs": len(measured),
+        "median_ms": 1000 * statistics.median(measured),
+        "min_ms": 1000 * min(measured),
+        "max_ms": 1000 * max(measured),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=16053)
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="Seconds to wait for each run"
+    )
+    parser.add_argument(
+        "--import-only", action="store_true", help="Don't start the voice assistant"
+    )
+    parser.add_argument("extra_args", nargs="*", help="Passed to the voice assistant")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    helps = [measure_help() for _ in range(args.runs)]
+    results: Dict[str, Any] = {
+        "import": _summarize(list(imports)),
+        "help": _summarize(list(helps)),
+    }
+
+    if not args.import_only:
+        with tempfile.TemporaryDirectory() as temp_dir_str:
+            temp_dir = Path(temp_dir_str)
+            _write_silence(temp_dir / "silence.wav", args.timeout)
+
+            runs = [
+                measure_startup(temp_dir, args.port, args.timeout, args.extra_args)
+                for _ in range(args.runs)
+            ]
+
+        for name in _MILESTONES:
+            results[name] = _summarize([run[name] for run in runs])
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
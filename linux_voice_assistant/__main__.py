@@ -6,34 +6,45 @@ import logging
 import sys
 import threading
 import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
 from queue import Queue
-from typing import Dict, List, Optional, Set, Union
-
-import numpy as np
-import soundcard as sc
-from pymicro_wakeword import MicroWakeWord, MicroWakeWordFeatures
-from pyopen_wakeword import OpenWakeWord, OpenWakeWordFeatures
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Union
 
 from .models import AvailableWakeWord, Preferences, ServerState, WakeWordType
-from .mpv_player import MpvMediaPlayer
-from .satellite import VoiceSatelliteProtocol
-from getmac import get_mac_address
-from .zeroconf import HomeAssistantZeroconf
 from .util import get_default_interface
 from .util import get_default_ipv4
 
+# Heavy dependencies (numpy, TFLite, protobuf, mpv, etc.) are imported where
+# they're first needed, so --help and --list-* don't pay for them.
+if TYPE_CHECKING:
+    import numpy as np
+    from pymicro_wakeword import MicroWakeWord
+
+    from .audio_buffer import PcmRingBuffer
+    from .audio_gate import EnergyGate
+    from .audio_source import AudioSource
+    from .multichannel import ChannelMixer, MultiChannelDetector
+    from .wake_word import WakeWordDetector, WakeWordIndex
+    from .wake_word_worker import WakeWordWorkerPool
+
 _LOGGER = logging.getLogger(__name__)
 _MODULE_DIR = Path(__file__).parent
 _REPO_DIR = _MODULE_DIR.parent
 _WAKEWORDS_DIR = _REPO_DIR / "wakewords"
 _SOUNDS_DIR = _REPO_DIR / "sounds"
 
+_SAMPLE_RATE = 16000
+_MAX_BATCH_BLOCKS = 8
+_STATS_INTERVAL_SECONDS = 60.0
+_PAUSED_POLL_SECONDS = 0.1
+
 
 # -----------------------------------------------------------------------------
 
 
 async def main() -> None:
+    start_time = time.monotonic()
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--name"
@@ -52,6 +63,42 @@ async def main() -> None:
         type=int, 
         default=1024
     )
+    parser.add_argument(
+        "--audio-input-channels",
+        type=int,
+        default=1,
+        help="Number of microphone channels to capture and run wake word detection on",
+    )
+    parser.add_argument(
+        "--audio-input-beamform",
+        action="store_true",
+        help="Stream a delay-and-sum beam of all channels instead of the best channel",
+    )
+    parser.add_argument(
+        "--audio-input-rate",
+        type=int,
+        help="Capture at this rate (the device's native rate) and resample to 16Khz in-process instead of in the sound server",
+    )
+    parser.add_argument(
+        "--audio-input-file",
+        help="Read 16Khz 16-bit mono audio from a WAV file, raw PCM file, named pipe, or stdin (-) instead of a microphone",
+    )
+    parser.add_argument(
+        "--audio-input-fast",
+        action="store_true",
+        help="Read --audio-input-file as fast as possible instead of in real time",
+    )
+    parser.add_argument(
+        "--mute-closes-microphone",
+        action="store_true",
+        help="Close the audio input device while muted (--audio-input-file continues where it left off)",
+    )
+    parser.add_argument(
+        "--audio-buffer-seconds",
+        type=float,
+        default=10.0,
+        help="Seconds of microphone audio buffered while wake word processing catches up",
+    )
     parser.add_argument(
         "--audio-output-device",
         help="mpv name for output device (see --list-output-devices)",
@@ -67,11 +114,40 @@ async def main() -> None:
         action="append",
         help="Directory with wake word models (.tflite) and configs (.json)",
     )
+    parser.add_argument(
+        "--wake-word-rescan-seconds",
+        type=float,
+        default=5.0,
+        help="Seconds between checks for added/removed wake word configs (0 = only at startup)",
+    )
     parser.add_argument(
         "--wake-model", 
         default="okay_nabu", 
         help="Id of active wake model"
     )
+    parser.add_argument(
+        "--wake-word-processes",
+        type=int,
+        default=0,
+        help="Worker processes for running wake word models outside the main process (default: 0, run in-process)",
+    )
+    parser.add_argument(
+        "--wake-word-threads",
+        type=int,
+        default=0,
+        help="Threads for running wake word models in parallel (default: 0, run sequentially)",
+    )
+    parser.add_argument(
+        "--energy-gate-dbfs",
+        type=float,
+        help="Skip wake word processing while audio is quieter than this level (e.g. -50)",
+    )
+    parser.add_argument(
+        "--energy-gate-hangover-seconds",
+        type=float,
+        default=2.0,
+        help="Seconds to keep processing after audio was louder than --energy-gate-dbfs",
+    )
     parser.add_argument(
         "--stop-model", 
         default="stop", 
@@ -82,12 +158,49 @@ async def main() -> None:
         default=_REPO_DIR / "local",
         help="Directory to download custom wake word models, etc.",
     )
+    parser.add_argument(
+        "--download-cache-max-mb",
+        type=float,
+        default=100.0,
+        help="Largest size of downloaded wake word models before the least recently used are removed",
+    )
+    parser.add_argument(
+        "--wake-word-cache-mb",
+        type=float,
+        default=4.0,
+        help="Megabytes of loaded wake word models to keep before unloading the least recently active ones",
+    )
     parser.add_argument(
         "--refractory-seconds",
         default=2.0,
         type=float,
         help="Seconds before wake word can be activated again",
     )
+    parser.add_argument(
+        "--preroll-seconds",
+        default=0.0,
+        type=float,
+        help="Max seconds of audio from after a (delayed) wake/stop word detection to send when streaming starts (never the wake word or TTS response)",
+    )
+    parser.add_argument(
+        "--audio-frame-seconds",
+        default=0.0,
+        type=float,
+        help="Coalesce audio sent to Home Assistant into frames of this duration (default: one frame per block)",
+    )
+    parser.add_argument(
+        "--audio-frame-max-delay-seconds",
+        default=0.1,
+        type=float,
+        help="Send a partial audio frame once audio has waited this long",
+    )
+    parser.add_argument(
+        "--audio-send-queue-seconds",
+        default=2.0,
+        type=float,
+        help="Seconds of audio to hold while the connection is congested "
+        "(older audio is dropped)",
+    )
     parser.add_argument(
         "--wakeup-sound", 
         default=str(_SOUNDS_DIR / "wake_word_triggered.flac")
@@ -137,6 +250,8 @@ async def main() -> None:
     args = parser.parse_args()
 
     if args.list_input_devices:
+        import soundcard as sc
+
         print("Input devices")
         print("=" * 13)
         for idx, mic in enumerate(sc.all_microphones()):
@@ -157,6 +272,18 @@ async def main() -> None:
     logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
     _LOGGER.debug(args)
 
+    from getmac import get_mac_address
+    from pymicro_wakeword import MicroWakeWord
+
+    from .audio_buffer import PcmRingBuffer
+    from .audio_source import AudioSource, SoundcardSource, open_audio_file
+    from .download_cache import DownloadCache
+    from .model_cache import WakeWordModelCache
+    from .mpv_player import MpvMediaPlayer
+    from .satellite import VoiceSatelliteProtocol
+    from .wake_word import WakeWordIndex, load_wake_word_config
+    from .zeroconf import HomeAssistantZeroconf
+
     # Resolve network interface for mac-adress detection
     if not args.network_interface:
         print("No network interface specified, try to detect default interface")
@@ -195,44 +322,56 @@ async def main() -> None:
     args.download_dir = Path(args.download_dir)
     args.download_dir.mkdir(parents=True, exist_ok=True)
 
-    # Resolve microphone
-    if args.audio_input_device is not None:
-        try:
-            args.audio_input_device = int(args.audio_input_device)
-        except ValueError:
-            pass
+    # Resolve audio source
+    audio_source: AudioSource
+    if args.audio_input_channels < 1:
+        parser.error("--audio-input-channels must be at least 1")
+
+    if args.audio_input_file and (args.audio_input_channels > 1):
+        parser.error("--audio-input-channels is only supported for microphones")
+
+    if args.audio_input_file and args.audio_input_rate:
+        parser.error("--audio-input-rate is only supported for microphones")
 
-        mic = sc.get_microphone(args.audio_input_device)
+    if (args.wake_word_processes > 0) and (args.audio_input_channels > 1):
+        parser.error("--wake-word-processes is not supported with multiple channels")
+
+    if args.audio_input_file:
+        audio_source = open_audio_file(
+            args.audio_input_file, realtime=not args.audio_input_fast
+        )
     else:
-        mic = sc.default_microphone()
+        import soundcard as sc
+
+        if args.audio_input_device is not None:
+            try:
+                args.audio_input_device = int(args.audio_input_device)
+            except ValueError:
+                pass
+
+            mic = sc.get_microphone(args.audio_input_device)
+        else:
+            mic = sc.default_microphone()
+
+        audio_source = SoundcardSource(
+            mic,
+            args.audio_input_block_size,
+            channels=args.audio_input_channels,
+            capture_rate=args.audio_input_rate,
+        )
 
     # Load available wake words
     wake_word_dirs = [Path(ww_dir) for ww_dir in args.wake_word_dir]
     wake_word_dirs.append(args.download_dir / "external_wake_words")
-    available_wake_words: Dict[str, AvailableWakeWord] = {}
-
-    for wake_word_dir in wake_word_dirs:
-        for model_config_path in wake_word_dir.glob("*.json"):
-            model_id = model_config_path.stem
-            if model_id == args.stop_model:
-                # Don't show stop model as an available wake word
-                continue
 
-            with open(model_config_path, "r", encoding="utf-8") as model_config_file:
-                model_config = json.load(model_config_file)
-                model_type = WakeWordType(model_config["type"])
-                if model_type == WakeWordType.OPEN_WAKE_WORD:
-                    wake_word_path = model_config_path.parent / model_config["model"]
-                else:
-                    wake_word_path = model_config_path
-
-                available_wake_words[model_id] = AvailableWakeWord(
-                    id=model_id,
-                    type=WakeWordType(model_type),
-                    wake_word=model_config["wake_word"],
-                    trained_languages=model_config.get("trained_languages", []),
-                    wake_word_path=wake_word_path,
-                )
+    # Don't show stop model as an available wake word
+    wake_word_index = WakeWordIndex(
+        wake_word_dirs,
+        exclude_ids=[args.stop_model],
+        index_path=args.download_dir / "wake_word_index.json",
+    )
+    wake_word_index.scan()
+    available_wake_words = wake_word_index.wake_words
 
     _LOGGER.debug("Available wake words: %s", list(sorted(available_wake_words.keys())))
 
@@ -250,41 +389,40 @@ async def main() -> None:
         preferences.thinking_sound = 1
 
     # Load wake/stop models
-    active_wake_words: Set[str] = set()
-    wake_models: Dict[str, Union[MicroWakeWord, OpenWakeWord]] = {}
-    if preferences.active_wake_words:
-        # Load preferred models
-        for wake_word_id in preferences.active_wake_words:
-            wake_word = available_wake_words.get(wake_word_id)
-            if wake_word is None:
-                _LOGGER.warning("Unrecognized wake word id: %s", wake_word_id)
-                continue
-
-            _LOGGER.debug("Loading wake model: %s", wake_word_id)
-            wake_models[wake_word_id] = wake_word.load()
-            active_wake_words.add(wake_word_id)
+    model_cache = WakeWordModelCache(
+        max_bytes=int(args.wake_word_cache_mb * 1024 * 1024)
+    )
+    wake_word_ids: List[str] = []
+    for wake_word_id in preferences.active_wake_words:
+        if wake_word_id not in available_wake_words:
+            _LOGGER.warning("Unrecognized wake word id: %s", wake_word_id)
+            continue
 
-    if not wake_models:
-        # Load default model
-        wake_word_id = args.wake_model
-        wake_word = available_wake_words[wake_word_id]
+        wake_word_ids.append(wake_word_id)
 
-        _LOGGER.debug("Loading wake model: %s", wake_word_id)
-        wake_models[wake_word_id] = wake_word.load()
-        active_wake_words.add(wake_word_id)
+    if not wake_word_ids:
+        # Use default model
+        if args.wake_model in available_wake_words:
+            wake_word_ids.append(args.wake_model)
+        else:
+            _LOGGER.warning("Unrecognized wake word id: %s", args.wake_model)
 
     # TODO: allow openWakeWord for "stop"
-    stop_model: Optional[MicroWakeWord] = None
+    stop_model_info: Optional[AvailableWakeWord] = None
     for wake_word_dir in wake_word_dirs:
         stop_config_path = wake_word_dir / f"{args.stop_model}.json"
-        if not stop_config_path.exists():
-            continue
+        if stop_config_path.exists():
+            stop_model_info = load_wake_word_config(stop_config_path)
+            break
 
-        _LOGGER.debug("Loading stop model: %s", stop_config_path)
-        stop_model = MicroWakeWord.from_config(stop_config_path)
-        break
+    assert stop_model_info is not None
+    assert stop_model_info.type == WakeWordType.MICRO_WAKE_WORD
 
-    assert stop_model is not None
+    # The stop model is small and always needed, so it's loaded now. Wake word
+    # models are loaded in the background once the server is up.
+    stop_model = model_cache.load(stop_model_info)
+    assert isinstance(stop_model, MicroWakeWord)
+    active_wake_words: Set[str] = set(wake_word_ids)
 
     state = ServerState(
         name=device_name,
@@ -294,7 +432,7 @@ async def main() -> None:
         audio_queue=Queue(),
         entities=[],
         available_wake_words=available_wake_words,
-        wake_words=wake_models,
+        wake_words={},
         active_wake_words=active_wake_words,
         stop_word=stop_model,
         music_player=MpvMediaPlayer(device=args.audio_output_device),
@@ -307,19 +445,105 @@ async def main() -> None:
         preferences=preferences,
         preferences_path=preferences_path,
         refractory_seconds=args.refractory_seconds,
+        preroll_seconds=args.preroll_seconds,
+        audio_frame_seconds=args.audio_frame_seconds,
+        audio_frame_max_delay_seconds=args.audio_frame_max_delay_seconds,
+        audio_send_queue_seconds=args.audio_send_queue_seconds,
         download_dir=args.download_dir,
+        model_cache=model_cache,
+    )
+
+    state.download_cache = DownloadCache(
+        args.download_dir / "external_wake_words" / "models",
+        max_bytes=int(args.download_cache_max_mb * 1024 * 1024),
+        suffix=".tflite",
     )
 
     if args.enable_thinking_sound:
         state.save_preferences()
 
+    state.audio_buffer = PcmRingBuffer(
+        max(
+            int(args.audio_buffer_seconds * _SAMPLE_RATE),
+            _MAX_BATCH_BLOCKS * args.audio_input_block_size,
+        ),
+        channels=args.audio_input_channels,
+    )
+
+    capture_audio_thread = threading.Thread(
+        target=capture_audio,
+        args=(
+            state.audio_buffer,
+            audio_source,
+            args.audio_input_block_size,
+            (lambda: state.muted) if args.mute_closes_microphone else None,
+        ),
+        daemon=True,
+    )
+    capture_audio_thread.start()
+
+    wake_word_workers: "Optional[WakeWordWorkerPool]" = None
+    if args.wake_word_processes > 0:
+        from .wake_word_worker import WakeWordWorkerPool
+
+        wake_word_workers = WakeWordWorkerPool(
+            args.wake_word_processes,
+            args.audio_input_block_size,
+            capacity=state.audio_buffer.capacity,
+            available_wake_words=state.available_wake_words,
+            stop_word_info=stop_model_info,
+        )
+        wake_word_workers.start()
+
+    wake_word_executor: Optional[Executor] = None
+    if args.wake_word_threads > 0:
+        wake_word_executor = ThreadPoolExecutor(
+            max_workers=args.wake_word_threads, thread_name_prefix="wake_word"
+        )
+
+    mixer: "Optional[ChannelMixer]" = None
+    if args.audio_input_channels > 1:
+        from .multichannel import ChannelMixer
+
+        mixer = ChannelMixer(
+            args.audio_input_channels,
+            max_frames=_MAX_BATCH_BLOCKS * args.audio_input_block_size,
+            beamform=args.audio_input_beamform,
+        )
+
+    energy_gate: "Optional[EnergyGate]" = None
+    if (args.energy_gate_dbfs is not None) and (mixer is not None):
+        _LOGGER.warning("Energy gate is not supported with multiple channels")
+    elif args.energy_gate_dbfs is not None:
+        from .audio_gate import EnergyGate
+
+        energy_gate = EnergyGate(
+            threshold_dbfs=args.energy_gate_dbfs,
+            hangover_seconds=args.energy_gate_hangover_seconds,
+            max_chunk_samples=_MAX_BATCH_BLOCKS * args.audio_input_block_size,
+        )
+
+    models_loaded = threading.Event()
     process_audio_thread = threading.Thread(
         target=process_audio,
-        args=(state, mic, args.audio_input_block_size),
+        args=(state, state.audio_buffer, args.audio_input_block_size),
+        kwargs={
+            "executor": wake_word_executor,
+            "gate": energy_gate,
+            "mixer": mixer,
+            "workers": wake_word_workers,
+            "models_loaded": models_loaded,
+        },
         daemon=True,
     )
     process_audio_thread.start()
 
+    # Serve first: Home Assistant can connect and configure the device while
+    # the wake word models load and warm up.
+    load_task = asyncio.create_task(
+        load_wake_word_models(state, wake_word_ids, models_loaded)
+    )
+
     loop = asyncio.get_running_loop()
     server = await loop.create_server(
         lambda: VoiceSatelliteProtocol(state), host=host_ip_address, port=args.port
@@ -328,6 +552,15 @@ async def main() -> None:
     # Auto discovery (zeroconf, mDNS)
     discovery = HomeAssistantZeroconf(port=args.port, name=state.name, mac_address=state.mac_address, host_ip_address=host_ip_address)
     await discovery.register_server()
+    _LOGGER.info(
+        "Server discoverable in %.3f second(s)", time.monotonic() - start_time
+    )
+
+    rescan_task: "Optional[asyncio.Task[None]]" = None
+    if args.wake_word_rescan_seconds > 0:
+        rescan_task = asyncio.create_task(
+            rescan_wake_words(state, wake_word_index, args.wake_word_rescan_seconds)
+        )
 
     try:
         async with server:
@@ -336,114 +569,389 @@ async def main() -> None:
     except KeyboardInterrupt:
         pass
     finally:
+        load_task.cancel()
+        if rescan_task is not None:
+            rescan_task.cancel()
+
         state.audio_queue.put_nowait(None)
+        state.audio_buffer.close()
         process_audio_thread.join()
 
+        if wake_word_executor is not None:
+            wake_word_executor.shutdown()
+
+        if wake_word_workers is not None:
+            wake_word_workers.close()
+
     _LOGGER.debug("Server stopped")
 
 
 # -----------------------------------------------------------------------------
 
 
-def process_audio(state: ServerState, mic, block_size: int):
-    """Process audio chunks from the microphone."""
+async def load_wake_word_models(
+    state: ServerState, wake_word_ids: List[str], models_loaded: threading.Event
+) -> None:
+    """Load wake word models in parallel and hand them to the audio thread.
+
+    Detection starts once this is done, even if some models failed to load.
+    """
+    try:
+        await _load_wake_word_models(state, wake_word_ids)
+    except Exception:
+        _LOGGER.exception("Unexpected error loading wake word models")
+    finally:
+        models_loaded.set()
+
+
+async def _load_wake_word_models(state: ServerState, wake_word_ids: List[str]) -> None:
+    loop = asyncio.get_running_loop()
+    start_time = time.monotonic()
+
+    model_infos: Dict[str, AvailableWakeWord] = {}
+    for wake_word_id in wake_word_ids:
+        model_info = state.available_wake_words.get(wake_word_id)
+        if model_info is None:
+            _LOGGER.warning("Unrecognized wake word id: %s", wake_word_id)
+            continue
+
+        model_infos[wake_word_id] = model_info
+
+    # TFLite releases the GIL, so models load in parallel
+    with ThreadPoolExecutor(thread_name_prefix="model_loader") as model_loader:
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(model_loader, state.model_cache.load, model_info)
+                for model_info in model_infos.values()
+            ),
+            return_exceptions=True,
+        )
+
+    # Models loaded by Home Assistant in the meantime take precedence
+    wake_words = dict(state.wake_words)
+    for wake_word_id, result in zip(model_infos, results):
+        if isinstance(result, BaseException):
+            _LOGGER.error("Failed to load wake word %s: %s", wake_word_id, result)
+            continue
+
+        wake_words.setdefault(wake_word_id, result)
+
+    state.wake_words = state.model_cache.evict(wake_words, state.active_wake_words)
+    state.wake_words_changed = True
+
+    _LOGGER.info(
+        "Loaded %s wake word model(s) in %.3f second(s)",
+        len(state.wake_words),
+        time.monotonic() - start_time,
+    )
+    state.model_cache.log_report()
+
+
+async def rescan_wake_words(
+    state: ServerState, wake_word_index: "WakeWordIndex", interval: float
+) -> None:
+    """Pick up wake word configs that were added/removed while running."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            changed = await loop.run_in_executor(None, wake_word_index.scan)
+        except Exception:
+            _LOGGER.exception("Unexpected error scanning wake words")
+            continue
+
+        if not changed:
+            continue
+
+        # Updated in place, since the dict is shared (e.g., with workers)
+        wake_words = wake_word_index.wake_words
+        for wake_word_id in list(state.available_wake_words):
+            if wake_word_id not in wake_words:
+                del state.available_wake_words[wake_word_id]
+
+        state.available_wake_words.update(wake_words)
+        _LOGGER.info("Available wake words: %s", sorted(wake_words))
+
+        if state.response_cache is not None:
+            state.response_cache.invalidate()
+
+        if state.satellite is not None:
+            state.satellite.available_wake_words_changed()
+
+
+def capture_audio(
+    audio_buffer: "PcmRingBuffer",
+    source: "AudioSource",
+    block_size: int,
+    is_paused: Optional[Callable[[], bool]] = None,
+):
+    """Capture audio chunks from the source into the ring buffer.
+
+    The source is closed while is_paused returns True.
+    """
+
+    overruns = 0
+    is_open = False
+
+    try:
+        while not audio_buffer.closed:
+            if (is_paused is not None) and is_paused():
+                if is_open:
+                    source.close()
+                    is_open = False
+                    _LOGGER.debug("Closed audio input: %s", source.name)
+
+                time.sleep(_PAUSED_POLL_SECONDS)
+                continue
+
+            if not is_open:
+                source.open()
+                is_open = True
+
+            audio_chunk_array = source.read(block_size)
+            if audio_chunk_array is None:
+                _LOGGER.info("End of audio input: %s", source.name)
+                break
+
+            if (not source.is_live) and (
+                not audio_buffer.wait_for_space(len(audio_chunk_array))
+            ):
+                break
 
-    wake_words: List[Union[MicroWakeWord, OpenWakeWord]] = []
-    micro_features: Optional[MicroWakeWordFeatures] = None
-    micro_inputs: List[np.ndarray] = []
+            audio_buffer.write(audio_chunk_array)
+
+            if audio_buffer.overruns != overruns:
+                overruns = audio_buffer.overruns
+                _LOGGER.warning(
+                    "Audio buffer overrun (overruns=%s, dropped samples=%s)",
+                    overruns,
+                    audio_buffer.dropped_samples,
+                )
+    except Exception:
+        _LOGGER.exception("Unexpected error capturing audio")
+        sys.exit(1)
+    finally:
+        if is_open:
+            source.close()
+
+        # Lets processing drain what is left and stop
+        audio_buffer.close()
+
+
+def process_audio(
+    state: ServerState,
+    audio_buffer: "PcmRingBuffer",
+    block_size: int,
+    *,
+    executor: Optional[Executor] = None,
+    gate: "Optional[EnergyGate]" = None,
+    mixer: "Optional[ChannelMixer]" = None,
+    workers: "Optional[WakeWordWorkerPool]" = None,
+    models_loaded: Optional[threading.Event] = None,
+):
+    """Process audio chunks from the ring buffer.
+
+    With a mixer, wake words are detected on each channel and the best channel
+    (or beam) is streamed. With workers, models run in worker processes.
+
+    Audio is streamed while the models load; the detector is warmed up once
+    models_loaded is set.
+    """
+    import numpy as np
+
+    from .audio_buffer import pcm_bytes
+    from .multichannel import MultiChannelDetector
+    from .wake_word import WakeWordDetector, WakeWordScheduler
+
+    detector: "Union[WakeWordDetector, MultiChannelDetector, WakeWordWorkerPool]"
+    if mixer is not None:
+        detector = MultiChannelDetector(mixer.channels, executor=executor)
+    elif workers is not None:
+        detector = workers
+    else:
+        detector = WakeWordDetector(executor=executor)
 
-    oww_features: Optional[OpenWakeWordFeatures] = None
-    oww_inputs: List[np.ndarray] = []
-    has_oww = False
+    is_ready = False
+    is_warm = False
 
+    scheduler = WakeWordScheduler()
     last_active: Optional[float] = None
 
+    # Falls behind -> several blocks are read and processed as one chunk
+    audio_batch = np.zeros(
+        _MAX_BATCH_BLOCKS * block_size * audio_buffer.channels, dtype="<i2"
+    )
+    audio_batch_bytes = pcm_bytes(audio_batch)
+    read_timeout = 4 * block_size / _SAMPLE_RATE
+    last_stats = time.monotonic()
+    is_first_chunk = True
+
     try:
-        _LOGGER.debug("Opening audio input device: %s", mic.name)
-        with mic.recorder(samplerate=16000, channels=1, blocksize=block_size) as mic_in:
-            while True:
-                audio_chunk_array = mic_in.record(block_size).reshape(-1)
-                audio_chunk = (
-                    (np.clip(audio_chunk_array, -1.0, 1.0) * 32767.0)
-                    .astype("<i2")  # little-endian 16-bit signed
-                    .tobytes()
+        while True:
+            num_samples = audio_buffer.read_into(
+                audio_batch, block_size, timeout=read_timeout
+            )
+            if num_samples <= 0:
+                if audio_buffer.closed:
+                    break
+
+                continue
+
+            # Zero-copy views, only valid until the next read
+            if mixer is not None:
+                channel_chunks = mixer.split(
+                    audio_batch[: num_samples * mixer.channels]
                 )
+                audio_chunk = pcm_bytes(mixer.stream())
+            else:
+                audio_chunk = audio_batch_bytes[: num_samples * audio_batch.itemsize]
+
+            if (time.monotonic() - last_stats) > _STATS_INTERVAL_SECONDS:
+                audio_buffer.log_stats()
+                if gate is not None:
+                    gate.log_stats()
+
+                if state.satellite is not None:
+                    state.satellite.log_audio_stats()
+
+                last_stats = time.monotonic()
+
+            if (not is_ready) and ((models_loaded is None) or models_loaded.is_set()):
+                # Models in worker processes aren't warmed up
+                if isinstance(detector, (WakeWordDetector, MultiChannelDetector)):
+                    is_warm = warm_up_detector(state, detector)
 
-                if state.satellite is None:
+                # Used by benchmarks/startup.py
+                _LOGGER.info("Wake word detection ready")
+                is_ready = True
+
+            was_idle = scheduler.is_idle
+            wake_words, stop_word = scheduler.select(state)
+
+            if state.satellite is None:
+                continue
+
+            try:
+                state.satellite.handle_audio(audio_chunk)
+
+                if not is_ready:
+                    # Models are still loading
                     continue
 
-                if (not wake_words) or (state.wake_words_changed and state.wake_words):
-                    # Update list of wake word models to process
-                    state.wake_words_changed = False
-                    wake_words = [
-                        ww
-                        for ww in state.wake_words.values()
-                        if ww.id in state.active_wake_words
-                    ]
-
-                    has_oww = False
-                    for wake_word in wake_words:
-                        if isinstance(wake_word, OpenWakeWord):
-                            has_oww = True
-
-                    if micro_features is None:
-                        micro_features = MicroWakeWordFeatures()
-
-                    if has_oww and (oww_features is None):
-                        oww_features = OpenWakeWordFeatures.from_builtin()
-
-                try:
-                    state.satellite.handle_audio(audio_chunk)
-
-                    assert micro_features is not None
-                    micro_inputs.clear()
-                    micro_inputs.extend(micro_features.process_streaming(audio_chunk))
-
-                    if has_oww:
-                        assert oww_features is not None
-                        oww_inputs.clear()
-                        oww_inputs.extend(oww_features.process_streaming(audio_chunk))
-
-                    for wake_word in wake_words:
-                        activated = False
-                        if isinstance(wake_word, MicroWakeWord):
-                            for micro_input in micro_inputs:
-                                if wake_word.process_streaming(micro_input):
-                                    activated = True
-                        elif isinstance(wake_word, OpenWakeWord):
-                            for oww_input in oww_inputs:
-                                for prob in wake_word.process_streaming(oww_input):
-                                    if prob > 0.5:
-                                        activated = True
-
-                        if activated and not state.muted:
-                            # Check refractory
-                            now = time.monotonic()
-                            if (last_active is None) or (
-                                (now - last_active) > state.refractory_seconds
-                            ):
-                                state.satellite.wakeup(wake_word)
-                                last_active = now
-
-                    # Always process to keep state correct
-                    stopped = False
-                    for micro_input in micro_inputs:
-                        if state.stop_word.process_streaming(micro_input):
-                            stopped = True
-
-                    if (
-                        stopped
-                        and (state.stop_word.id in state.active_wake_words)
-                        and not state.muted
+                if (not wake_words) and (stop_word is None):
+                    # Muted, etc.
+                    continue
+
+                if was_idle and (not is_warm):
+                    # Audio was skipped, don't continue from stale state
+                    detector.reset()
+                    if gate is not None:
+                        gate.reset()
+
+                if detector.wake_words != wake_words:
+                    detector.set_wake_words(wake_words)
+
+                if gate is not None:
+                    # Skip wake word processing during silence
+                    gated_samples = gate_audio(
+                        gate, detector, audio_batch[:num_samples], stop_word
+                    )
+                    if gated_samples is None:
+                        continue
+
+                    audio_chunk = pcm_bytes(gated_samples)
+
+                if mixer is not None:
+                    assert isinstance(detector, MultiChannelDetector)
+                    activated, stopped = detector.process(channel_chunks, stop_word)
+                else:
+                    assert not isinstance(detector, MultiChannelDetector)
+                    activated, stopped = detector.process(audio_chunk, stop_word)
+
+                # Warm-up state is only reused once
+                is_warm = False
+
+                # Audio that arrived after the detection is sent as pre-roll
+                delay_samples = 0
+                if (workers is not None) and (detector is workers):
+                    delay_samples = workers.detection_delay
+
+                if is_first_chunk:
+                    # Used by benchmarks/startup.py
+                    _LOGGER.debug("Processed first audio chunk")
+                    is_first_chunk = False
+
+                for wake_word in activated:
+                    if state.muted:
+                        continue
+
+                    # Check refractory
+                    now = time.monotonic()
+                    if (last_active is None) or (
+                        (now - last_active) > state.refractory_seconds
                     ):
-                        state.satellite.stop()
-                except Exception:
-                    _LOGGER.exception("Unexpected error handling audio")
+                        if mixer is not None:
+                            assert isinstance(detector, MultiChannelDetector)
+                            mixer.select(detector.best_channel(wake_word))
+
+                        state.satellite.wakeup(wake_word, delay_samples)
+                        last_active = now
+
+                if (
+                    stopped
+                    and (state.stop_word.id in state.active_wake_words)
+                    and not state.muted
+                ):
+                    state.satellite.stop(delay_samples)
+            except Exception:
+                _LOGGER.exception("Unexpected error handling audio")
     except Exception:
         _LOGGER.exception("Unexpected error processing audio")
         sys.exit(1)
 
 
+def gate_audio(
+    gate: "EnergyGate",
+    detector: "Union[WakeWordDetector, MultiChannelDetector, WakeWordWorkerPool]",
+    samples: "np.ndarray",
+    stop_word: "Optional[MicroWakeWord]" = None,
+) -> "Optional[np.ndarray]":
+    """Return the samples to run wake word detection on, or None during silence."""
+    gated_samples = gate.process(samples)
+    if (gated_samples is not None) and gate.just_opened:
+        # Audio from before the gate opened is in front of the chunk, so
+        # don't continue from the state before it closed.
+        detector.reset(stop_word)
+
+    return gated_samples
+
+
+def warm_up_detector(
+    state: ServerState,
+    detector: "Union[WakeWordDetector, MultiChannelDetector]",
+) -> bool:
+    """Run silence through the active models so the first real chunk is fast."""
+    try:
+        start_time = time.monotonic()
+        detector.set_wake_words(
+            ww for ww in state.wake_words.values() if ww.id in state.active_wake_words
+        )
+        timings = detector.warm_up(state.stop_word)
+        for name, seconds in timings.items():
+            _LOGGER.debug("Warmed up %s in %.3f second(s)", name, seconds)
+
+        _LOGGER.info(
+            "Warmed up wake word detection in %.3f second(s)",
+            time.monotonic() - start_time,
+        )
+        return True
+    except Exception:
+        _LOGGER.exception("Unexpected error warming up wake word detection")
+
+    return False
+
+
 # -----------------------------------------------------------------------------
 
 if __name__ == "__main__":
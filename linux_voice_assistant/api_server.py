@@ -3,9 +3,12 @@
 import asyncio
 import logging
 import threading
+import time
 from abc import abstractmethod
-from collections.abc import Iterable
-from typing import TYPE_CHECKING, List, Optional
+from collections import deque
+from collections.abc import Hashable, Iterable
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
 
 # pylint: disable=no-name-in-module
 from aioesphomeapi._frame_helper.packets import make_plain_text_packets
@@ -18,33 +21,279 @@ from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
     HelloResponse,
     PingRequest,
     PingResponse,
+    VoiceAssistantAudio,
 )
 from aioesphomeapi.core import MESSAGE_TYPE_TO_PROTO
 from google.protobuf import message
 
 PROTO_TO_MESSAGE_TYPE = {v: k for k, v in MESSAGE_TYPE_TO_PROTO.items()}
+_AUDIO_MESSAGE_TYPE = PROTO_TO_MESSAGE_TYPE[VoiceAssistantAudio]
 
 _LOGGER = logging.getLogger(__name__)
 
+# Larger frames are treated as corrupt input
+_MAX_FRAME_SIZE = 1024 * 1024
+
+# Lengths and message types are uint32
+_MAX_VARUINT_BYTES = 5
+
+# Smaller payloads are copied, which is cheaper than making a view
+_MIN_VIEW_SIZE = 1024
+
+# Transport pauses writing above this, so control messages aren't stuck
+# behind seconds of audio (about 0.5 seconds of 16Khz 16-bit mono)
+_WRITE_BUFFER_HIGH = 16 * 1024
+
+# Audio that waited longer than this before it was written is late
+_LATE_AUDIO_SECONDS = 0.5
+
+# VoiceAssistantAudio.data: field 1, length-delimited
+_AUDIO_DATA_TAG = b"\x0a"
+
+Frame = Tuple[int, Union[bytes, memoryview]]
+
+
+class FrameError(Exception):
+    """Plain text frame stream is corrupt."""
+
+
+class FrameDecoder:
+    """Splits a plain text ESPHome stream into (message type, data) frames.
+
+    Large frames that arrive whole are returned as views of the received
+    data without copying. Partial frames are kept in a bytearray that is
+    compacted once per call. The stream can't be resynchronized after corrupt
+    input (payloads may contain the 0x00 preamble), so FrameError is raised
+    and the decoder is reset.
+    """
+
+    def __init__(self, max_frame_size: int = _MAX_FRAME_SIZE) -> None:
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Frame]:
+        """Return the frames completed by data."""
+        try:
+            if not self._buffer:
+                # Common case: nothing is buffered
+                frames, pos = self._decode(data)
+                if pos < len(data):
+                    self._buffer += memoryview(data)[pos:]
+
+                return frames
+
+            self._buffer += data
+            frames, pos = self._decode(self._buffer)
+            del self._buffer[:pos]
+
+            return frames
+        except FrameError:
+            self.reset()
+            raise
+
+    def reset(self) -> None:
+        self._buffer.clear()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer)
+
+    def _decode(self, data: Union[bytes, bytearray]) -> Tuple[List[Frame], int]:
+        """Return complete frames and the position after the last one."""
+        frames: List[Frame] = []
+        end = len(data)
+        max_frame_size = self.max_frame_size
+        is_buffer = data is self._buffer
+        view: Optional[memoryview] = None
+        pos = 0
+        try:
+            while pos < end:
+                if data[pos] != 0x00:
+                    raise FrameError(f"Incorrect preamble: {data[pos]}")
+
+                # Single byte varuints are the fast path
+                header_pos = pos + 1
+                if (header_pos < end) and (data[header_pos] < 0x80):
+                    length = data[header_pos]
+                    header_pos += 1
+                else:
+                    length, header_pos = _read_varuint(data, header_pos, end)
+                    if length < 0:
+                        break
+
+                if length > max_frame_size:
+                    raise FrameError(f"Frame too large: {length}")
+
+                if (header_pos < end) and (data[header_pos] < 0x80):
+                    msg_type = data[header_pos]
+                    header_pos += 1
+                else:
+                    msg_type, header_pos = _read_varuint(data, header_pos, end)
+                    if msg_type < 0:
+                        break
+
+                frame_end = header_pos + length
+                if frame_end > end:
+                    break
+
+                if length < _MIN_VIEW_SIZE:
+                    frames.append((msg_type, bytes(data[header_pos:frame_end])))
+                else:
+                    if view is None:
+                        view = memoryview(data)
+
+                    if is_buffer:
+                        # Buffer is compacted afterwards
+                        with view[header_pos:frame_end] as packet_data:
+                            frames.append((msg_type, bytes(packet_data)))
+                    else:
+                        frames.append((msg_type, view[header_pos:frame_end]))
+
+                pos = frame_end
+        finally:
+            if is_buffer and (view is not None):
+                # Buffer can't be resized while it's exported
+                view.release()
+
+        return frames, pos
+
+
+def _read_varuint(data: Union[bytes, bytearray], pos: int, end: int) -> Tuple[int, int]:
+    """Return (value, next position), or -1 if data ends first."""
+    result = 0
+    shift = 0
+    for byte_pos in range(pos, min(end, pos + _MAX_VARUINT_BYTES)):
+        byte = data[byte_pos]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, byte_pos + 1
+
+        shift += 7
+
+    if end - pos >= _MAX_VARUINT_BYTES:
+        raise FrameError("Varuint is too long")
+
+    return -1, pos
+
+
+def encode_messages(msgs: Iterable[message.Message]) -> bytes:
+    """Encode messages as plain text frames."""
+    return b"".join(
+        make_plain_text_packets(
+            [
+                (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+                for msg in msgs
+            ]
+        )
+    )
+
+
+def encode_varuint(value: int) -> bytes:
+    """Encode an unsigned protobuf varint."""
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    encoded.append(value)
+    return bytes(encoded)
+
+
+@lru_cache(maxsize=32)
+def audio_frame_header(audio_len: int) -> bytes:
+    """Frame header of a VoiceAssistantAudio message with audio_len bytes of data.
+
+    The header followed by the audio is the same as the encoded message, so
+    the audio doesn't need to be copied into a protobuf. Audio frames
+    usually have the same length, so headers are cached.
+    """
+    data_header = (
+        (_AUDIO_DATA_TAG + encode_varuint(audio_len)) if audio_len > 0 else b""
+    )
+    return (
+        b"\x00"
+        + encode_varuint(len(data_header) + audio_len)
+        + encode_varuint(_AUDIO_MESSAGE_TYPE)
+        + data_header
+    )
+
+
+class ResponseCache:
+    """Encoded frames of responses that only change with the configuration.
+
+    Entries are built on first use and kept across connections until they're
+    invalidated (or their version changes), so reconnects don't rebuild and
+    serialize the same messages again. Only used from the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Hashable, bytes]] = {}
+
+    def get(
+        self,
+        key: str,
+        build: Callable[[], Iterable[message.Message]],
+        version: Hashable = None,
+    ) -> bytes:
+        """Return the encoded frames for key, building them if needed."""
+        entry = self._entries.get(key)
+        if (entry is not None) and (entry[0] == version):
+            return entry[1]
+
+        _LOGGER.debug("Encoding cached response: %s", key)
+        frames = encode_messages(build())
+        self._entries[key] = (version, frames)
+
+        return frames
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or all entries if key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
 
 class APIServer(asyncio.Protocol):
 
     def __init__(self, name: str) -> None:
         self.name = name
 
-        self._buffer: Optional[bytes] = None
-        self._buffer_len: int = 0
-        self._pos: int = 0
+        self._decoder = FrameDecoder()
         self._transport = None
         self._writelines = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._loop_thread_id: Optional[int] = None
 
+        # Messages from any thread, written by the event loop
+        self._send_lock = threading.Lock()
+        self._send_queue: List[Union[message.Message, bytes]] = []
+        self._flush_scheduled = False
+        self.max_send_queue_depth = 0
+        self.sent_messages = 0
+        self.send_flushes = 0
+
+        # Audio is sent after control messages, and only while the transport
+        # accepts writes. Oldest audio is dropped past max_audio_queue_bytes.
+        self.max_audio_queue_bytes: Optional[int] = None
+        self._audio_queue: Deque[Tuple[float, bytes]] = deque()
+        self._audio_queue_bytes = 0
+        self._writing_paused = False
+        self.dropped_audio_frames = 0
+        self.late_audio_frames = 0
+
     @abstractmethod
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        pass
+    def handle_message(
+        self, msg: message.Message
+    ) -> Optional[Iterable[Union[message.Message, bytes]]]:
+        """Handle a message and return responses (messages or encoded frames).
+
+        Returns None if there is nothing to send.
+        """
 
-    def process_packet(self, msg_type: int, packet_data: bytes) -> None:
+    def process_packet(
+        self, msg_type: int, packet_data: Union[bytes, memoryview]
+    ) -> None:
         msg_class = MESSAGE_TYPE_TO_PROTO[msg_type]
         msg_inst = msg_class.FromString(packet_data)
 
@@ -65,40 +314,194 @@ class APIServer(asyncio.Protocol):
         elif isinstance(msg_inst, DisconnectRequest):
             self.send_messages([DisconnectResponse()])
             _LOGGER.debug("Disconnect requested")
-            if self._transport:
-                self._transport.close()
-                self._transport = None
-                self._writelines = None
+            self._close()
         elif isinstance(msg_inst, PingRequest):
             self.send_messages([PingResponse()])
         elif msgs := self.handle_message(msg_inst):
-            if isinstance(msgs, message.Message):
+            if isinstance(msgs, (message.Message, bytes)):
                 msgs = [msgs]
 
             self.send_messages(msgs)
 
-    def send_messages(self, msgs: List[message.Message]):
-        if self._writelines is None or not msgs:
+    def send_messages(self, msgs: Iterable[Union[message.Message, bytes]]):
+        """Queue messages and/or encoded frames to send. Thread-safe.
+
+        Everything queued until the event loop gets to it is sent with a
+        single writelines call, in the order it was queued (but ahead of
+        queued audio, see send_audio).
+        """
+        if self._writelines is None:
+            return
+
+        msgs = list(msgs)
+        if not msgs:
+            return
+
+        with self._send_lock:
+            self._send_queue.extend(msgs)
+            self.max_send_queue_depth = max(
+                self.max_send_queue_depth, len(self._send_queue)
+            )
+            if self._flush_scheduled:
+                return
+
+            self._flush_scheduled = True
+
+        self._schedule_flush()
+
+    def send_audio(self, audio_frames: Iterable[bytes]) -> None:
+        """Queue audio to send as VoiceAssistantAudio messages. Thread-safe.
+
+        Audio is sent after queued control messages. While the transport is
+        paused, only the most recent max_audio_queue_bytes are kept.
+        """
+        if self._writelines is None:
+            return
+
+        now = time.monotonic()
+        with self._send_lock:
+            for audio_frame in audio_frames:
+                self._audio_queue.append((now, audio_frame))
+                self._audio_queue_bytes += len(audio_frame)
+
+            self._drop_oldest_audio()
+            if self._flush_scheduled or self._writing_paused:
+                return
+
+            self._flush_scheduled = True
+
+        self._schedule_flush()
+
+    def pause_writing(self) -> None:
+        _LOGGER.debug("Transport buffer is full; holding audio")
+        with self._send_lock:
+            self._writing_paused = True
+
+    def resume_writing(self) -> None:
+        _LOGGER.debug("Transport buffer has drained; sending audio")
+        with self._send_lock:
+            self._writing_paused = False
+            if self._flush_scheduled or (not self._audio_queue):
+                return
+
+            self._flush_scheduled = True
+
+        self._schedule_flush()
+
+    @property
+    def send_queue_depth(self) -> int:
+        with self._send_lock:
+            return len(self._send_queue)
+
+    def log_send_stats(self) -> None:
+        _LOGGER.debug(
+            "Send queue: depth=%s, max_depth=%s, messages=%s, writes=%s, "
+            "audio queue=%s byte(s), dropped audio=%s, late audio=%s",
+            self.send_queue_depth,
+            self.max_send_queue_depth,
+            self.sent_messages,
+            self.send_flushes,
+            self._audio_queue_bytes,
+            self.dropped_audio_frames,
+            self.late_audio_frames,
+        )
+
+    def _schedule_flush(self) -> None:
+        loop = self._loop
+        if loop is None:
+            # Not running in an event loop
+            self._flush()
+        elif threading.get_ident() == self._loop_thread_id:
+            loop.call_soon(self._flush)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._flush)
+            except RuntimeError:
+                # Event loop was closed
+                pass
+
+    def _drop_oldest_audio(self) -> None:
+        """Keep the queued audio within max_audio_queue_bytes. Needs the lock."""
+        if self.max_audio_queue_bytes is None:
             return
 
-        packets = [
-            (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
-            for msg in msgs
-        ]
-        packet_bytes = make_plain_text_packets(packets)
-        if (
-            self._loop is not None
-            and self._loop_thread_id is not None
-            and threading.get_ident() != self._loop_thread_id
+        dropped = 0
+        while self._audio_queue and (
+            self._audio_queue_bytes > self.max_audio_queue_bytes
         ):
-            self._loop.call_soon_threadsafe(self._writelines, packet_bytes)
+            _queued_time, audio_frame = self._audio_queue.popleft()
+            self._audio_queue_bytes -= len(audio_frame)
+            dropped += 1
+
+        if dropped > 0:
+            if self.dropped_audio_frames == 0:
+                _LOGGER.warning("Connection is too slow; dropping oldest audio")
+
+            self.dropped_audio_frames += dropped
+
+    def _flush(self) -> None:
+        """Write everything that's queued. Runs on the event loop."""
+        audio: List[Tuple[float, bytes]] = []
+        with self._send_lock:
+            msgs = self._send_queue
+            self._send_queue = []
+            if not self._writing_paused:
+                audio = list(self._audio_queue)
+                self._audio_queue.clear()
+                self._audio_queue_bytes = 0
+
+            self._flush_scheduled = False
+
+        if (self._writelines is None) or ((not msgs) and (not audio)):
             return
 
+        # Control messages jump ahead of audio
+        packet_bytes: List[bytes] = []
+        packets: List[Tuple[int, bytes]] = []
+        for msg in msgs:
+            if isinstance(msg, bytes):
+                # Encoded frames (see ResponseCache)
+                if packets:
+                    packet_bytes.extend(make_plain_text_packets(packets))
+                    packets = []
+
+                packet_bytes.append(msg)
+            else:
+                packets.append(
+                    (PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.SerializeToString())
+                )
+
+        if packets:
+            packet_bytes.extend(make_plain_text_packets(packets))
+
+        if audio:
+            now = time.monotonic()
+            for queued_time, audio_frame in audio:
+                if (now - queued_time) > _LATE_AUDIO_SECONDS:
+                    self.late_audio_frames += 1
+
+                # Same bytes as VoiceAssistantAudio(data=audio_frame)
+                packet_bytes.append(audio_frame_header(len(audio_frame)))
+                packet_bytes.append(audio_frame)
+
+        self.sent_messages += len(msgs) + len(audio)
+        self.send_flushes += 1
         self._writelines(packet_bytes)
 
+    def _close(self) -> None:
+        # Queued messages (e.g., DisconnectResponse) are sent first
+        self._flush()
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+            self._writelines = None
+
     def connection_made(self, transport) -> None:
         self._transport = transport
         self._writelines = transport.writelines
+        if hasattr(transport, "set_write_buffer_limits"):
+            transport.set_write_buffer_limits(high=_WRITE_BUFFER_HIGH)
+
         try:
             self._loop = asyncio.get_running_loop()
         except RuntimeError:
@@ -107,93 +510,23 @@ class APIServer(asyncio.Protocol):
             self._loop_thread_id = threading.get_ident()
 
     def data_received(self, data: bytes):
-        if self._buffer is None:
-            self._buffer = data
-            self._buffer_len = len(data)
-        else:
-            self._buffer += data
-            self._buffer_len += len(data)
-
-        while self._buffer_len >= 3:
-            self._pos = 0
-            # Read preamble, which should always 0x00
-            if (preamble := self._read_varuint()) != 0x00:
-                _LOGGER.error("Incorrect preamble: %s", preamble)
-                return
-
-            if (length := self._read_varuint()) == -1:
-                _LOGGER.error("Incorrect length: %s", length)
-                return
-
-            if (msg_type := self._read_varuint()) == -1:
-                _LOGGER.error("Incorrect message type: %s", msg_type)
-                return
-
-            if length == 0:
-                # Empty message (allowed)
-                self._remove_from_buffer()
-                self.process_packet(msg_type, b"")
-                continue
-
-            if (packet_data := self._read(length)) is None:
-                return
+        try:
+            frames = self._decoder.feed(data)
+        except FrameError as err:
+            _LOGGER.error("Closing connection after corrupt data: %s", err)
+            self._close()
+            return
 
-            self._remove_from_buffer()
+        for msg_type, packet_data in frames:
             self.process_packet(msg_type, packet_data)
 
-    def _read(self, length: int) -> bytes | None:
-        """Read exactly length bytes from the buffer or None if all the bytes are not yet available."""
-        new_pos = self._pos + length
-        if self._buffer_len < new_pos:
-            return None
-        original_pos = self._pos
-        self._pos = new_pos
-        if TYPE_CHECKING:
-            assert self._buffer is not None, "Buffer should be set"
-        cstr = self._buffer
-        # Important: we must keep the bounds check (self._buffer_len < new_pos)
-        # above to verify we never try to read past the end of the buffer
-        return cstr[original_pos:new_pos]
-
     def connection_lost(self, exc):
         self._transport = None
         self._writelines = None
         self._loop = None
         self._loop_thread_id = None
-
-    def _read_varuint(self) -> int:
-        """Read a varuint from the buffer or -1 if the buffer runs out of bytes."""
-        if not self._buffer:
-            return -1
-
-        result = 0
-        bitpos = 0
-        cstr = self._buffer
-        while self._buffer_len > self._pos:
-            val = cstr[self._pos]
-            self._pos += 1
-            result |= (val & 0x7F) << bitpos
-            if (val & 0x80) == 0:
-                return result
-            bitpos += 7
-        return -1
-
-    def _remove_from_buffer(self) -> None:
-        """Remove data from the buffer."""
-        end_of_frame_pos = self._pos
-        self._buffer_len -= end_of_frame_pos
-        if self._buffer_len == 0:
-            # This is the best case scenario, we can just set the buffer to None
-            # and don't have to copy the data. This is the most common case as well.
-            self._buffer = None
-            return
-        if TYPE_CHECKING:
-            assert self._buffer is not None, "Buffer should be set"
-        # This is the worst case scenario, we have to copy the data
-        # and can't just use the buffer directly. This should only happen
-        # when we read multiple frames at once because the event loop
-        # is blocked and we cannot pull the data out of the buffer fast enough.
-        cstr = self._buffer
-        # Important: we must use the explicit length for the slice
-        # since Cython will stop at any '\0' character if we don't
-        self._buffer = cstr[end_of_frame_pos : self._buffer_len + end_of_frame_pos]
+        with self._send_lock:
+            self._send_queue.clear()
+            self._audio_queue.clear()
+            self._audio_queue_bytes = 0
+            self._writing_paused = False
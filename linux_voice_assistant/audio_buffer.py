@@ -0,0 +1,371 @@
+"""Audio buffers shared between capture and wake word processing."""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+# Longer gaps between chunks mean the stream was stopped
+_MAX_ACTIVE_GAP_SECONDS = 1.0
+
+
+class PcmFrontEnd:
+    """Converts float32 capture blocks to 16-bit PCM in preallocated buffers.
+
+    The returned arrays and views are reused by the next call, so consumers
+    must copy anything they keep.
+    """
+
+    def __init__(self, max_samples: int) -> None:
+        self.max_samples = max_samples
+        self._scratch = np.zeros(max_samples, dtype=np.float32)
+        self._samples = np.zeros(max_samples, dtype="<i2")
+
+    def convert(self, audio: np.ndarray) -> np.ndarray:
+        """Convert float samples in [-1, 1] to little-endian 16-bit samples."""
+        audio = audio.reshape(-1)
+        num_samples = len(audio)
+        if num_samples > self.max_samples:
+            raise ValueError(
+                f"Block too large: {num_samples} > {self.max_samples} samples"
+            )
+
+        # Scale first and clip with the ufuncs directly (np.clip has a lot of
+        # per-call overhead). Casting inside a ufunc allocates a temporary
+        # buffer, so convert to int16 separately with copyto.
+        scratch = self._scratch[:num_samples]
+        samples = self._samples[:num_samples]
+        np.multiply(audio, 32767.0, out=scratch)
+        np.minimum(scratch, 32767.0, out=scratch)
+        np.maximum(scratch, -32767.0, out=scratch)
+        np.copyto(samples, scratch, casting="unsafe")
+
+        return samples
+
+
+def pcm_bytes(samples: np.ndarray) -> memoryview:
+    """Return a zero-copy byte view of 16-bit samples."""
+    return samples.data.cast("B")
+
+
+class PcmRingBuffer:
+    """Preallocated ring buffer of 16-bit PCM frames.
+
+    Multi-channel audio is written and read interleaved. Capacity, positions,
+    and counters are in frames (one sample per channel), so channels are never
+    split.
+
+    There must be exactly one writer (the capture thread) and one reader (the
+    processing thread). Each side only advances its own position counter, so
+    no lock is taken on the data path.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1) -> None:
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive: {capacity}")
+
+        if channels <= 0:
+            raise ValueError(f"Channels must be positive: {channels}")
+
+        self.capacity = capacity
+        self.channels = channels
+        self._samples = np.zeros((capacity, channels), dtype="<i2")
+
+        # Total number of frames ever written/read. Only the writer updates
+        # _write_pos and only the reader updates _read_pos.
+        self._write_pos = 0
+        self._read_pos = 0
+
+        self._data_ready = threading.Event()
+        self._space_ready = threading.Event()
+        self._closed = False
+
+        self.overruns = 0
+        self.dropped_samples = 0
+        self.underruns = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of frames waiting to be read."""
+        return self._write_pos - self._read_pos
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop the buffer and wake up a waiting reader or writer."""
+        self._closed = True
+        self._data_ready.set()
+        self._space_ready.set()
+
+    def wait_for_space(self, num_frames: int) -> bool:
+        """Block the writer until num_frames can be written without loss.
+
+        Only for sources that can be paused (files, pipes), never for a
+        microphone. Returns False if the buffer was closed.
+        """
+        num_frames = min(num_frames, self.capacity)
+        while (self.capacity - self.depth) < num_frames:
+            if self._closed:
+                return False
+
+            self._space_ready.clear()
+            if (self.capacity - self.depth) >= num_frames:
+                break
+
+            self._space_ready.wait()
+
+        return not self._closed
+
+    def write(self, samples: np.ndarray) -> int:
+        """Write interleaved samples and return how many frames were stored.
+
+        Frames that do not fit are dropped and counted as an overrun.
+        """
+        frames = samples.reshape(-1, self.channels)
+        num_frames = len(frames)
+        free = self.capacity - self.depth
+        if num_frames > free:
+            self.overruns += 1
+            self.dropped_samples += (num_frames - free) * self.channels
+            num_frames = free
+
+        if num_frames > 0:
+            start = self._write_pos % self.capacity
+            first = min(num_frames, self.capacity - start)
+            self._samples[start : start + first] = frames[:first]
+            if first < num_frames:
+                self._samples[: num_frames - first] = frames[first:num_frames]
+
+            self._write_pos += num_frames
+            self.max_depth = max(self.max_depth, self.depth)
+
+        self._data_ready.set()
+        return num_frames
+
+    def read_into(
+        self, out: np.ndarray, min_frames: int, timeout: Optional[float] = None
+    ) -> int:
+        """Read interleaved samples into out once min_frames are available.
+
+        Reads as many whole multiples of min_frames as fit in out, so a reader
+        that fell behind catches up in one batch. Once the buffer is closed,
+        the last partial block is padded with silence to min_frames. Returns
+        the number of frames read, or 0 if the buffer was closed and empty or
+        the timeout expired (counted as an underrun).
+        """
+        padding = 0
+        while self.depth < min_frames:
+            if self._closed:
+                if self.depth <= 0:
+                    return 0
+
+                # End of a file/pipe source
+                padding = min_frames - self.depth
+                break
+
+            self._data_ready.clear()
+            if self.depth >= min_frames:
+                break
+
+            if not self._data_ready.wait(timeout):
+                self.underruns += 1
+                return 0
+
+        out_frames = out.reshape(-1, self.channels)
+        available = min(self.depth, len(out_frames))
+        num_frames = available
+        if padding == 0:
+            num_frames -= available % min_frames
+
+        start = self._read_pos % self.capacity
+        first = min(num_frames, self.capacity - start)
+        out_frames[:first] = self._samples[start : start + first]
+        if first < num_frames:
+            out_frames[first:num_frames] = self._samples[: num_frames - first]
+
+        out_frames[num_frames : num_frames + padding] = 0
+        self._read_pos += num_frames
+        self._space_ready.set()
+        return num_frames + padding
+
+    def log_stats(self) -> None:
+        _LOGGER.debug(
+            "Audio buffer: depth=%s, max_depth=%s, overruns=%s (dropped=%s), underruns=%s",
+            self.depth,
+            self.max_depth,
+            self.overruns,
+            self.dropped_samples,
+            self.underruns,
+        )
+
+
+class PreRollBuffer:
+    """Keeps the most recent audio bytes, overwriting the oldest.
+
+    Not thread-safe; only the audio thread may use it. Other threads may
+    read bytes_written to mark a position for drain.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self._buffer = np.zeros(self.max_bytes, dtype=np.uint8)
+        self._write_pos = 0
+        self._length = 0
+
+        # Total bytes passed to write
+        self.bytes_written = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def write(self, audio_bytes: Union[bytes, memoryview]) -> None:
+        data = np.frombuffer(audio_bytes, dtype=np.uint8)
+        self.bytes_written += len(data)
+        if self.max_bytes <= 0:
+            return
+
+        if len(data) >= self.max_bytes:
+            self._buffer[:] = data[-self.max_bytes :]
+            self._write_pos = 0
+            self._length = self.max_bytes
+            return
+
+        first = min(len(data), self.max_bytes - self._write_pos)
+        self._buffer[self._write_pos : self._write_pos + first] = data[:first]
+        if first < len(data):
+            self._buffer[: len(data) - first] = data[first:]
+
+        self._write_pos = (self._write_pos + len(data)) % self.max_bytes
+        self._length = min(self.max_bytes, self._length + len(data))
+
+    def drain(self, since: Optional[int] = None) -> bytes:
+        """Return buffered audio (oldest first) and clear the buffer.
+
+        If since is a previous value of bytes_written, only audio written
+        after that is returned.
+        """
+        if since is not None:
+            self._length = max(0, min(self._length, self.bytes_written - since))
+
+        start = (self._write_pos - self._length) % max(1, self.max_bytes)
+        if start + self._length <= self.max_bytes:
+            audio_bytes = self._buffer[start : start + self._length].tobytes()
+        else:
+            audio_bytes = (
+                self._buffer[start:].tobytes()
+                + self._buffer[: self._write_pos].tobytes()
+            )
+
+        self._length = 0
+        return audio_bytes
+
+
+class AudioFramer:
+    """Coalesces audio chunks into frames for the network stream.
+
+    Frames are frame_bytes long, except when audio has been waiting for
+    max_delay_seconds; then everything pending is sent as a shorter frame.
+    The delay is only checked when audio arrives. With frame_bytes <= 0, each
+    chunk is its own frame.
+
+    Not thread-safe; only the audio thread may use it.
+    """
+
+    def __init__(self, frame_bytes: int, max_delay_seconds: float) -> None:
+        self.frame_bytes = max(0, frame_bytes)
+        self.max_delay_seconds = max_delay_seconds
+        self._pending = bytearray()
+        self._pending_since: Optional[float] = None
+
+        self.frames = 0
+        self.bytes = 0
+        self.active_seconds = 0.0
+        self._last_add_time: Optional[float] = None
+
+    @property
+    def frames_per_second(self) -> float:
+        if self.active_seconds <= 0:
+            return 0.0
+
+        return self.frames / self.active_seconds
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.active_seconds <= 0:
+            return 0.0
+
+        return self.bytes / self.active_seconds
+
+    def clear(self) -> None:
+        """Drop pending audio, e.g. when a new stream starts."""
+        self._pending.clear()
+        self._pending_since = None
+        self._last_add_time = None
+
+    def add(
+        self, audio_bytes: Union[bytes, memoryview], now: Optional[float] = None
+    ) -> List[bytes]:
+        """Add audio and return the frames that are ready to send."""
+        if now is None:
+            now = time.monotonic()
+
+        if (self._last_add_time is not None) and (
+            (now - self._last_add_time) <= _MAX_ACTIVE_GAP_SECONDS
+        ):
+            # Only count time while audio is flowing
+            self.active_seconds += now - self._last_add_time
+
+        self._last_add_time = now
+
+        if self.frame_bytes <= 0:
+            return self._count([bytes(audio_bytes)])
+
+        if not self._pending:
+            self._pending_since = now
+
+        self._pending += audio_bytes
+        num_pending = len(self._pending)
+        frames: List[bytes] = []
+
+        if num_pending >= self.frame_bytes:
+            num_frame_bytes = num_pending - (num_pending % self.frame_bytes)
+            frames.extend(
+                bytes(self._pending[i : i + self.frame_bytes])
+                for i in range(0, num_frame_bytes, self.frame_bytes)
+            )
+            del self._pending[:num_frame_bytes]
+            self._pending_since = now
+        elif (self._pending_since is not None) and (
+            (now - self._pending_since) >= self.max_delay_seconds
+        ):
+            frames.append(self.flush())
+
+        return self._count(frames)
+
+    def flush(self) -> bytes:
+        """Return all pending audio."""
+        audio_bytes = bytes(self._pending)
+        self._pending.clear()
+        self._pending_since = None
+        return audio_bytes
+
+    def log_stats(self) -> None:
+        _LOGGER.debug(
+            "Audio stream: frames=%s, bytes=%s, frames/sec=%.1f, bytes/sec=%.0f",
+            self.frames,
+            self.bytes,
+            self.frames_per_second,
+            self.bytes_per_second,
+        )
+
+    def _count(self, frames: List[bytes]) -> List[bytes]:
+        self.frames += len(frames)
+        self.bytes += sum(len(frame) for frame in frames)
+        return frames
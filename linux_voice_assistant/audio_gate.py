@@ -0,0 +1,127 @@
+"""Energy gate that skips wake word processing during silence."""
+
+import logging
+import math
+from typing import Optional
+
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+_SAMPLE_RATE = 16000
+_FULL_SCALE = 32768.0
+
+
+class EnergyGate:
+    """Opens when a chunk is louder than a threshold and stays open for a while.
+
+    While the gate is closed, the most recent audio is kept. When it opens,
+    that audio is returned in front of the current chunk so that keyword
+    onsets aren't clipped. The features/models must be reset first (see
+    just_opened), since the audio before the gate closed is not continuous
+    with it.
+    """
+
+    def __init__(
+        self,
+        threshold_dbfs: float,
+        hangover_seconds: float,
+        max_chunk_samples: int,
+        lookback_seconds: float = 1.0,
+    ) -> None:
+        self.threshold_dbfs = threshold_dbfs
+        self._threshold_energy = (_FULL_SCALE * math.pow(10, threshold_dbfs / 20)) ** 2
+        self._hangover_samples = int(hangover_seconds * _SAMPLE_RATE)
+        self._max_chunk_samples = max_chunk_samples
+
+        lookback_samples = int(lookback_seconds * _SAMPLE_RATE)
+        self._history = np.zeros(lookback_samples, dtype="<i2")
+        self._history_len = 0
+        self._output = np.zeros(lookback_samples + max_chunk_samples, dtype="<i2")
+        self._scratch = np.zeros(max_chunk_samples, dtype=np.float32)
+
+        # Start closed
+        self._samples_since_loud = self._hangover_samples + 1
+
+        # True if the gate opened with the last chunk
+        self.just_opened = False
+
+        self.chunks_processed = 0
+        self.chunks_skipped = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._samples_since_loud <= self._hangover_samples
+
+    @property
+    def skip_ratio(self) -> float:
+        total = self.chunks_processed + self.chunks_skipped
+        return (self.chunks_skipped / total) if total > 0 else 0.0
+
+    def reset(self) -> None:
+        """Close the gate and forget remembered audio."""
+        self._samples_since_loud = self._hangover_samples + 1
+        self.just_opened = False
+        self._history_len = 0
+
+    def process(self, samples: np.ndarray) -> Optional[np.ndarray]:
+        """Return the samples to run wake word detection on, or None to skip.
+
+        The returned array may be reused by the next call.
+        """
+        num_samples = len(samples)
+        if num_samples > self._max_chunk_samples:
+            raise ValueError(
+                f"Chunk too large: {num_samples} > {self._max_chunk_samples} samples"
+            )
+
+        scratch = self._scratch[:num_samples]
+        np.copyto(scratch, samples)
+        energy = np.dot(scratch, scratch) / max(1, num_samples)
+
+        was_open = self.is_open
+        if energy >= self._threshold_energy:
+            self._samples_since_loud = 0
+        else:
+            self._samples_since_loud += num_samples
+
+        self.just_opened = self.is_open and (not was_open)
+
+        if not self.is_open:
+            self._remember(samples)
+            self.chunks_skipped += 1
+            return None
+
+        self.chunks_processed += 1
+        if self._history_len <= 0:
+            return samples
+
+        # Gate just opened
+        history_len = self._history_len
+        self._output[:history_len] = self._history[-history_len:]
+        self._output[history_len : history_len + num_samples] = samples
+        self._history_len = 0
+
+        return self._output[: history_len + num_samples]
+
+    def log_stats(self) -> None:
+        _LOGGER.debug(
+            "Energy gate: processed=%s, skipped=%s, skip_ratio=%.3f",
+            self.chunks_processed,
+            self.chunks_skipped,
+            self.skip_ratio,
+        )
+
+    def _remember(self, samples: np.ndarray) -> None:
+        history_size = len(self._history)
+        if history_size <= 0:
+            return
+
+        num_samples = len(samples)
+        if num_samples >= history_size:
+            self._history[:] = samples[-history_size:]
+        else:
+            self._history[:-num_samples] = self._history[num_samples:]
+            self._history[-num_samples:] = samples
+
+        self._history_len = min(history_size, self._history_len + num_samples)
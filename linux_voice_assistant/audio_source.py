@@ -0,0 +1,300 @@
+"""Sources of 16Khz 16-bit mono audio for wake word processing."""
+
+import logging
+import math
+import stat
+import sys
+import time
+import wave
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+from .audio_buffer import PcmFrontEnd
+from .resample import PolyphaseResampler
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+
+class AudioSource(ABC):
+    """Delivers blocks of 16-bit mono samples at 16Khz.
+
+    Live sources (microphones) drop audio if it isn't consumed quickly enough,
+    so the capture thread must never wait on them. Other sources are paced by
+    the consumer instead.
+    """
+
+    is_live = False
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def read(self, block_size: int) -> Optional[np.ndarray]:
+        """Read up to block_size samples or None at the end of the stream.
+
+        The returned array may be reused by the next read.
+        """
+
+    def __enter__(self) -> "AudioSource":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+# -----------------------------------------------------------------------------
+
+
+class SoundcardSource(AudioSource):
+    """Microphone from the soundcard library.
+
+    With more than one channel, blocks are interleaved.
+
+    With a capture rate, audio is recorded at that rate (the device's native
+    rate) and resampled here instead of by the sound server. Blocks may then
+    be a sample longer or shorter than requested.
+    """
+
+    is_live = True
+
+    def __init__(
+        self,
+        mic,
+        block_size: int,
+        channels: int = CHANNELS,
+        capture_rate: Optional[int] = None,
+    ) -> None:
+        super().__init__(mic.name)
+
+        self.mic = mic
+        self.block_size = block_size
+        self.channels = channels
+        self.capture_rate = capture_rate or SAMPLE_RATE
+        self._capture_block_size = block_size
+        self._resampler: Optional[PolyphaseResampler] = None
+        self._resampled: Optional[np.ndarray] = None
+
+        max_block_size = block_size
+        if self.capture_rate != SAMPLE_RATE:
+            self._resampler = PolyphaseResampler(
+                self.capture_rate, SAMPLE_RATE, channels=channels
+            )
+            self._capture_block_size = math.ceil(
+                block_size * self.capture_rate / SAMPLE_RATE
+            )
+            max_block_size = self._resampler.max_output_frames(self._capture_block_size)
+            self._resampled = np.zeros((max_block_size, channels), dtype=np.float32)
+
+        self._frontend = PcmFrontEnd(max_block_size * channels)
+        self._exit_stack = ExitStack()
+        self._mic_in = None
+
+    def open(self) -> None:
+        _LOGGER.debug(
+            "Opening audio input device: %s (rate=%s)", self.name, self.capture_rate
+        )
+        if self._resampler is not None:
+            self._resampler.reset()
+
+        self._mic_in = self._exit_stack.enter_context(
+            self.mic.recorder(
+                samplerate=self.capture_rate,
+                channels=self.channels,
+                blocksize=self._capture_block_size,
+            )
+        )
+
+    def close(self) -> None:
+        self._exit_stack.close()
+        self._mic_in = None
+
+    def read(self, block_size: int) -> Optional[np.ndarray]:
+        assert self._mic_in is not None
+        if self._resampler is None:
+            return self._frontend.convert(self._mic_in.record(block_size))
+
+        audio = self._mic_in.record(
+            math.ceil(block_size * self.capture_rate / SAMPLE_RATE)
+        )
+        return self._frontend.convert(
+            self._resampler.process(audio, out=self._resampled)
+        )
+
+
+# -----------------------------------------------------------------------------
+
+
+class _StreamAudioSource(AudioSource):
+    """Audio from a file or pipe, optionally paced in real time.
+
+    Files continue where they left off when they're opened again (e.g., after
+    being closed while muted).
+    """
+
+    def __init__(self, name: str, realtime: bool) -> None:
+        super().__init__(name)
+
+        self.realtime = realtime
+        self._start_time: Optional[float] = None
+        self._samples_read = 0
+
+    def _restart_pace(self) -> None:
+        """Pace from now on, so audio isn't rushed after a pause."""
+        self._start_time = None
+        self._samples_read = 0
+
+    def _pace(self, num_samples: int) -> None:
+        """Sleep so that samples are delivered no faster than real time."""
+        if not self.realtime:
+            return
+
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+
+        self._samples_read += num_samples
+        delay = self._start_time + (self._samples_read / SAMPLE_RATE) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class WavFileSource(_StreamAudioSource):
+    """WAV file with 16Khz 16-bit mono audio."""
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True) -> None:
+        super().__init__(str(path), realtime)
+
+        self.path = Path(path)
+        self._wav_file: Optional[wave.Wave_read] = None
+        self._position = 0
+
+    def open(self) -> None:
+        _LOGGER.debug("Opening WAV file: %s", self.path)
+        wav_file = wave.open(str(self.path), "rb")
+        try:
+            if (
+                (wav_file.getframerate() != SAMPLE_RATE)
+                or (wav_file.getsampwidth() != SAMPLE_WIDTH)
+                or (wav_file.getnchannels() != CHANNELS)
+            ):
+                raise ValueError(
+                    f"Expected 16Khz 16-bit mono audio: {self.path} "
+                    f"(rate={wav_file.getframerate()}, "
+                    f"width={wav_file.getsampwidth()}, "
+                    f"channels={wav_file.getnchannels()})"
+                )
+            wav_file.setpos(self._position)
+        except Exception:
+            wav_file.close()
+            raise
+
+        self._wav_file = wav_file
+        self._restart_pace()
+
+    def close(self) -> None:
+        if self._wav_file is not None:
+            self._position = self._wav_file.tell()
+            self._wav_file.close()
+            self._wav_file = None
+
+    def read(self, block_size: int) -> Optional[np.ndarray]:
+        assert self._wav_file is not None
+        audio_bytes = self._wav_file.readframes(block_size)
+        if not audio_bytes:
+            return None
+
+        samples = np.frombuffer(audio_bytes, dtype="<i2")
+        self._pace(len(samples))
+        return samples
+
+
+class RawPcmSource(_StreamAudioSource):
+    """Raw 16Khz 16-bit mono audio from a file, named pipe, or stdin ("-")."""
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True) -> None:
+        super().__init__(str(path), realtime)
+
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._audio_bytes = bytearray()
+        self._position = 0
+
+    def open(self) -> None:
+        if self.path == "-":
+            _LOGGER.debug("Reading raw audio from stdin")
+            self._file = sys.stdin.buffer
+        else:
+            # Blocks until a writer opens the pipe
+            _LOGGER.debug("Opening raw audio: %s", self.path)
+            self._file = open(self.path, "rb")  # pylint: disable=consider-using-with
+            if self._file.seekable():
+                # Pipes start over with a new writer
+                self._file.seek(self._position)
+
+        self._restart_pace()
+
+    def close(self) -> None:
+        if (self._file is not None) and (self._file is not sys.stdin.buffer):
+            if self._file.seekable():
+                self._position = self._file.tell()
+
+            self._file.close()
+
+        self._file = None
+
+    def read(self, block_size: int) -> Optional[np.ndarray]:
+        assert self._file is not None
+
+        num_bytes = block_size * SAMPLE_WIDTH
+        if len(self._audio_bytes) != num_bytes:
+            self._audio_bytes = bytearray(num_bytes)
+
+        # Pipes may return less than requested
+        audio_view = memoryview(self._audio_bytes)
+        bytes_read = 0
+        while bytes_read < num_bytes:
+            chunk_size = self._file.readinto(audio_view[bytes_read:])  # type: ignore[attr-defined]
+            if not chunk_size:
+                break
+
+            bytes_read += chunk_size
+
+        # Drop incomplete sample at the end of the stream
+        bytes_read -= bytes_read % SAMPLE_WIDTH
+        if bytes_read <= 0:
+            return None
+
+        samples = np.frombuffer(
+            self._audio_bytes, dtype="<i2", count=bytes_read // SAMPLE_WIDTH
+        )
+        self._pace(len(samples))
+        return samples
+
+
+def open_audio_file(path: Union[str, Path], realtime: bool = True) -> AudioSource:
+    """Create an audio source for a WAV file, raw PCM file, named pipe, or stdin."""
+    if str(path) == "-":
+        return RawPcmSource("-", realtime=realtime)
+
+    path = Path(path)
+    if stat.S_ISFIFO(path.stat().st_mode):
+        return RawPcmSource(path, realtime=realtime)
+
+    if path.suffix.lower() == ".wav":
+        return WavFileSource(path, realtime=realtime)
+
+    return RawPcmSource(path, realtime=realtime)
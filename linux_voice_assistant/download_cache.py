@@ -0,0 +1,310 @@
+"""Content-addressed cache for downloaded wake word models.
+
+Files are stored by SHA-256 and hashed while they download. An index keeps
+the size and modification time of each file, so unchanged files are never
+hashed again. Interrupted downloads are resumed, and the least recently used
+files are removed when the cache grows past its size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.client import HTTPException
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Optional
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+_LOGGER = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 64 * 1024
+_INDEX_NAME = "index.json"
+_PARTIAL_SUFFIX = ".part"
+
+# Seconds to wait for a connection or data before giving up
+_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass
+class CacheEntry:
+    """Index entry for a cached file."""
+
+    sha256: str
+    size: int
+    mtime_ns: int
+    last_used: float
+
+
+class DownloadCache:
+    """Downloads files into a directory named by their SHA-256 hash.
+
+    Entries are looked up by key (e.g., a wake word id). Thread-safe.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: Optional[int] = None,
+        suffix: str = "",
+        timeout: float = _TIMEOUT_SECONDS,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.timeout = timeout
+
+        self._index_path = cache_dir / _INDEX_NAME
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+        self._load_index()
+
+    def path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}{self.suffix}"
+
+    def fetch(
+        self, key: str, url: str, size: int, sha256: str, keep: Iterable[str] = ()
+    ) -> Optional[Path]:
+        """Return the path to a file with the expected size and hash.
+
+        The file is only downloaded if it's not already cached. Afterwards,
+        entries are evicted if the cache is too large (except key and the
+        keys in keep).
+        """
+        sha256 = sha256.lower()
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            file_path = self.path(sha256)
+
+            if not self._is_cached(sha256, size):
+                _LOGGER.debug("Downloading %s to %s", url, file_path)
+                start_time = time.monotonic()
+                if not self._download(url, size, sha256):
+                    return None
+
+                _LOGGER.debug(
+                    "Downloaded %s byte(s) in %.2f second(s)",
+                    size,
+                    time.monotonic() - start_time,
+                )
+
+            stat = file_path.stat()
+            old_entry = self._entries.get(key)
+            self._entries[key] = CacheEntry(
+                sha256=sha256,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                last_used=time.time(),
+            )
+            if (old_entry is not None) and (old_entry.sha256 != sha256):
+                self._remove_unused(old_entry.sha256)
+
+            self._evict(keep={key, *keep})
+            self._save_index()
+
+            return file_path
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self._file_sizes().values())
+
+    # -------------------------------------------------------------------------
+
+    def _is_cached(self, sha256: str, size: int) -> bool:
+        file_path = self.path(sha256)
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return False
+
+        if stat.st_size != size:
+            _LOGGER.debug("Size mismatch: %s", file_path)
+            file_path.unlink()
+            return False
+
+        for entry in self._entries.values():
+            if (
+                (entry.sha256 == sha256)
+                and (entry.size == stat.st_size)
+                and (entry.mtime_ns == stat.st_mtime_ns)
+            ):
+                # Unchanged since it was verified
+                return True
+
+        # Not indexed, or modified
+        with open(file_path, "rb") as cached_file:
+            file_hash = _hash_file(cached_file)
+
+        if file_hash.hexdigest() != sha256:
+            _LOGGER.debug("Hash mismatch: %s", file_path)
+            file_path.unlink()
+            return False
+
+        return True
+
+    def _download(self, url: str, size: int, sha256: str) -> bool:
+        file_path = self.path(sha256)
+        partial_path = file_path.with_name(file_path.name + _PARTIAL_SUFFIX)
+
+        file_hash = hashlib.sha256()
+        offset = 0
+        if partial_path.exists():
+            if partial_path.stat().st_size < size:
+                # Resume from the end of the partial file
+                with open(partial_path, "rb") as partial_file:
+                    file_hash = _hash_file(partial_file)
+                    offset = partial_file.tell()
+            else:
+                partial_path.unlink()
+
+        request = Request(url)
+        if offset > 0:
+            request.add_header("Range", f"bytes={offset}-")
+
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                if response.status == 200:
+                    if offset > 0:
+                        # Range not supported
+                        _LOGGER.debug("Restarting download: %s", url)
+                        file_hash = hashlib.sha256()
+                        offset = 0
+                elif response.status == 206:
+                    _LOGGER.debug("Resuming download at byte %s: %s", offset, url)
+                else:
+                    _LOGGER.warning(
+                        "Failed to download: %s, status=%s", url, response.status
+                    )
+                    return False
+
+                with open(partial_path, "r+b" if offset > 0 else "wb") as partial_file:
+                    partial_file.seek(offset)
+                    partial_file.truncate()
+                    # read1 returns what has arrived, so a timeout doesn't
+                    # lose data that was already received.
+                    while chunk := response.read1(_CHUNK_SIZE):
+                        offset += len(chunk)
+                        if offset > size:
+                            break
+
+                        file_hash.update(chunk)
+                        partial_file.write(chunk)
+        except HTTPError as err:
+            if (err.code == 416) and partial_path.exists():
+                # Partial file is from a different version
+                partial_path.unlink()
+
+            _LOGGER.warning("Failed to download: %s, status=%s", url, err.code)
+            return False
+        except socket.timeout:
+            # Partial file is kept so the download can be resumed
+            _LOGGER.warning("Timed out downloading: %s (%s byte(s))", url, offset)
+            return False
+        except (OSError, HTTPException):
+            # Partial file is kept so the download can be resumed
+            _LOGGER.exception("Failed to download: %s", url)
+            return False
+
+        if offset < size:
+            _LOGGER.warning(
+                "Incomplete download: %s (size=%s, expected size=%s)",
+                url,
+                offset,
+                size,
+            )
+            return False
+
+        if (offset != size) or (file_hash.hexdigest() != sha256):
+            _LOGGER.warning(
+                "Downloaded file doesn't match: %s (size=%s, expected size=%s)",
+                url,
+                offset,
+                size,
+            )
+            partial_path.unlink()
+            return False
+
+        os.replace(partial_path, file_path)
+        return True
+
+    def _file_sizes(self) -> Dict[str, int]:
+        return {entry.sha256: entry.size for entry in self._entries.values()}
+
+    def _evict(self, keep: Iterable[str]) -> None:
+        if self.max_bytes is None:
+            return
+
+        file_sizes = self._file_sizes()
+        total_bytes = sum(file_sizes.values())
+        if total_bytes <= self.max_bytes:
+            return
+
+        keep_hashes = {
+            self._entries[key].sha256 for key in keep if key in self._entries
+        }
+
+        # Most recent use of each file
+        last_used: Dict[str, float] = {}
+        for entry in self._entries.values():
+            last_used[entry.sha256] = max(
+                entry.last_used, last_used.get(entry.sha256, 0)
+            )
+
+        for sha256 in sorted(last_used, key=last_used.__getitem__):
+            if total_bytes <= self.max_bytes:
+                break
+
+            if sha256 in keep_hashes:
+                continue
+
+            _LOGGER.debug("Evicting %s from cache", sha256)
+            self.path(sha256).unlink(missing_ok=True)
+            total_bytes -= file_sizes[sha256]
+            self._entries = {
+                key: entry
+                for key, entry in self._entries.items()
+                if entry.sha256 != sha256
+            }
+
+    def _remove_unused(self, sha256: str) -> None:
+        if all(entry.sha256 != sha256 for entry in self._entries.values()):
+            _LOGGER.debug("Removing replaced file %s from cache", sha256)
+            self.path(sha256).unlink(missing_ok=True)
+
+    def _load_index(self) -> None:
+        if not self._index_path.exists():
+            return
+
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as index_file:
+                self._entries = {
+                    key: CacheEntry(**entry_dict)
+                    for key, entry_dict in json.load(index_file).items()
+                }
+        except (ValueError, TypeError):
+            _LOGGER.warning("Ignoring invalid cache index: %s", self._index_path)
+
+    def _save_index(self) -> None:
+        temp_path = self._index_path.with_name(self._index_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(
+                {key: asdict(entry) for key, entry in self._entries.items()},
+                index_file,
+                indent=4,
+            )
+
+        os.replace(temp_path, self._index_path)
+
+
+def _hash_file(cached_file: BinaryIO) -> "hashlib._Hash":
+    file_hash = hashlib.sha256()
+    while chunk := cached_file.read(_CHUNK_SIZE):
+        file_hash.update(chunk)
+
+    return file_hash
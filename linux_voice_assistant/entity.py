@@ -1,6 +1,16 @@
 from abc import abstractmethod
 from collections.abc import Iterable
-from typing import Callable, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 import logging
 
 # pylint: disable=no-name-in-module
@@ -22,10 +32,12 @@ from aioesphomeapi.model import (
 )
 from google.protobuf import message
 
-from .api_server import APIServer
-from .mpv_player import MpvMediaPlayer
+from .api_server import PROTO_TO_MESSAGE_TYPE, APIServer
 from .util import call_all
 
+if TYPE_CHECKING:
+    from .mpv_player import MpvMediaPlayer
+
 SUPPORTED_MEDIA_PLAYER_FEATURES = (
     MediaPlayerEntityFeature.PLAY
     | MediaPlayerEntityFeature.PAUSE
@@ -36,8 +48,14 @@ SUPPORTED_MEDIA_PLAYER_FEATURES = (
     | MediaPlayerEntityFeature.MEDIA_ANNOUNCE
 )
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class ESPHomeEntity:
+    # Command requests (with a key) that are sent to this entity
+    command_types: Tuple[Type[message.Message], ...] = ()
+    key: int
+
     def __init__(self, server: APIServer) -> None:
         self.server = server
 
@@ -46,18 +64,77 @@ class ESPHomeEntity:
         pass
 
 
+class EntityRegistry:
+    """Entities indexed by key and the command requests they handle.
+
+    A command request goes straight to its entity instead of being offered
+    to every entity, so adding entities doesn't slow down command handling.
+    """
+
+    def __init__(self, entities: Iterable[ESPHomeEntity] = ()) -> None:
+        self.entities: List[ESPHomeEntity] = []
+        self._commands: Dict[Tuple[int, int], ESPHomeEntity] = {}
+        self.update(entities)
+
+    def update(self, entities: Iterable[ESPHomeEntity]) -> None:
+        """Rebuild the index after entities were added or removed."""
+        self.entities = list(entities)
+        self._commands = {}
+        for entity in self.entities:
+            for command_type in entity.command_types:
+                index_key = (PROTO_TO_MESSAGE_TYPE[command_type], entity.key)
+                if index_key in self._commands:
+                    _LOGGER.warning(
+                        "Duplicate entity key for %s: %s",
+                        command_type.__name__,
+                        entity.key,
+                    )
+                    continue
+
+                self._commands[index_key] = entity
+
+    @property
+    def command_types(self) -> Set[int]:
+        """Message ids of command requests handled by an entity."""
+        return {msg_type for msg_type, _key in self._commands}
+
+    def get(self, msg_type: int, key: int) -> Optional[ESPHomeEntity]:
+        return self._commands.get((msg_type, key))
+
+    def handle_command(self, msg: message.Message) -> Iterable[message.Message]:
+        """Send a command request to the entity with its key."""
+        entity = self._commands.get((PROTO_TO_MESSAGE_TYPE[msg.__class__], msg.key))
+        if entity is None:
+            _LOGGER.warning(
+                "No entity for %s with key: %s", msg.__class__.__name__, msg.key
+            )
+            return []
+
+        return entity.handle_message(msg)
+
+    def handle_all(self, msg: message.Message) -> List[message.Message]:
+        """Send a message to every entity and collect the responses."""
+        responses: List[message.Message] = []
+        for entity in self.entities:
+            responses.extend(entity.handle_message(msg))
+
+        return responses
+
+
 # -----------------------------------------------------------------------------
 
 
 class MediaPlayerEntity(ESPHomeEntity):
+    command_types = (MediaPlayerCommandRequest,)
+
     def __init__(
         self,
         server: APIServer,
         key: int,
         name: str,
         object_id: str,
-        music_player: MpvMediaPlayer,
-        announce_player: MpvMediaPlayer,
+        music_player: "MpvMediaPlayer",
+        announce_player: "MpvMediaPlayer",
     ) -> None:
         ESPHomeEntity.__init__(self, server)
 
@@ -202,6 +279,8 @@ class MediaPlayerEntity(ESPHomeEntity):
 
 
 class MuteSwitchEntity(ESPHomeEntity):
+    command_types = (SwitchCommandRequest,)
+
     def __init__(
         self,
         server: APIServer,
@@ -257,6 +336,8 @@ class MuteSwitchEntity(ESPHomeEntity):
 
 
 class ThinkingSoundEntity(ESPHomeEntity):
+    command_types = (SwitchCommandRequest,)
+
     def __init__(
         self,
         server: APIServer,
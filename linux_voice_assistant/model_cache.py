@@ -0,0 +1,226 @@
+"""Memory-bounded cache of loaded wake word models."""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .models import AvailableWakeWord, WakeWordType
+from .wake_word import WakeWord
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelMemory:
+    """Memory used by a loaded wake word model."""
+
+    wake_word_id: str
+    # From the "micro" block of the config (microWakeWord only)
+    tensor_arena_size: Optional[int]
+    # Size of the .tflite file, which TFLite keeps in memory
+    file_size: int
+    load_seconds: float
+
+    @property
+    def size(self) -> int:
+        """Best estimate of the model's memory in bytes.
+
+        Resident memory can't be measured per model, since models are loaded
+        concurrently.
+        """
+        return self.file_size + (self.tensor_arena_size or 0)
+
+
+class WakeWordModelCache:
+    """Keeps track of loaded models and unloads inactive ones.
+
+    Models stay loaded after they're deactivated, so switching back is
+    instant. When the loaded models use more than max_bytes, the least
+    recently active models are dropped; their memory is released once the
+    audio thread lets go of them too.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self.memory: Dict[str, ModelMemory] = {}
+
+        self._last_active: Dict[str, float] = {}
+        self._models: Dict[str, WakeWord] = {}
+        self._loading: "Dict[str, Future[WakeWord]]" = {}
+        self._lock = threading.Lock()
+
+    def load(self, model_info: AvailableWakeWord) -> WakeWord:
+        """Load a model and estimate its memory. Can run in any thread.
+
+        A model that is already loaded, or being loaded by another thread
+        (e.g., at startup while Home Assistant changes the wake words), is
+        shared instead of loaded again.
+        """
+        with self._lock:
+            model = self._models.get(model_info.id)
+            if model is not None:
+                return model
+
+            pending = self._loading.get(model_info.id)
+            if pending is None:
+                future: "Future[WakeWord]" = Future()
+                self._loading[model_info.id] = future
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            model = self._load(model_info)
+        except BaseException as err:
+            with self._lock:
+                self._loading.pop(model_info.id, None)
+
+            future.set_exception(err)
+            raise
+
+        with self._lock:
+            self._loading.pop(model_info.id, None)
+            self._models[model_info.id] = model
+
+        future.set_result(model)
+        return model
+
+    def _load(self, model_info: AvailableWakeWord) -> WakeWord:
+        start_time = time.monotonic()
+        model = model_info.load()
+        memory = ModelMemory(
+            wake_word_id=model_info.id,
+            tensor_arena_size=_tensor_arena_size(model_info),
+            file_size=_model_file_size(model_info),
+            load_seconds=time.monotonic() - start_time,
+        )
+        _LOGGER.info(
+            "Loaded wake word %s in %.3f second(s) (model=%.1f KiB, tensor arena=%s)",
+            model_info.id,
+            memory.load_seconds,
+            memory.file_size / 1024,
+            memory.tensor_arena_size,
+        )
+
+        with self._lock:
+            self.memory[model_info.id] = memory
+            self._last_active[model_info.id] = time.monotonic()
+
+        return model
+
+    def evict(
+        self, wake_words: Dict[str, WakeWord], active_wake_words: Iterable[str]
+    ) -> Dict[str, WakeWord]:
+        """Return wake_words without the least recently active models that don't fit.
+
+        Active models are never removed.
+        """
+        active_wake_words = set(active_wake_words)
+        with self._lock:
+            now = time.monotonic()
+            for wake_word_id in active_wake_words:
+                self._last_active[wake_word_id] = now
+
+            if self.max_bytes is None:
+                return wake_words
+
+            total_bytes = sum(self._size(wake_word_id) for wake_word_id in wake_words)
+            inactive = sorted(
+                (
+                    wake_word_id
+                    for wake_word_id in wake_words
+                    if wake_word_id not in active_wake_words
+                ),
+                key=lambda wake_word_id: self._last_active.get(wake_word_id, 0),
+            )
+
+            kept = dict(wake_words)
+            for wake_word_id in inactive:
+                if total_bytes <= self.max_bytes:
+                    break
+
+                total_bytes -= self._size(wake_word_id)
+                kept.pop(wake_word_id)
+                self._unload(wake_word_id)
+
+            return kept
+
+    def unload(self, wake_word_id: str) -> None:
+        """Forget a model that was dropped by the caller."""
+        with self._lock:
+            self._unload(wake_word_id)
+
+    def report(self) -> List[ModelMemory]:
+        """Memory of loaded models, largest first."""
+        with self._lock:
+            return sorted(
+                self.memory.values(), key=lambda memory: memory.size, reverse=True
+            )
+
+    def log_report(self) -> None:
+        report = self.report()
+        _LOGGER.info(
+            "Loaded wake word models: %s, %.1f KiB (process rss=%.1f KiB)",
+            len(report),
+            sum(memory.size for memory in report) / 1024,
+            get_rss() / 1024,
+        )
+        for memory in report:
+            _LOGGER.debug(
+                "%s: model=%.1f KiB, tensor arena=%s, load=%.3f second(s)",
+                memory.wake_word_id,
+                memory.file_size / 1024,
+                memory.tensor_arena_size,
+                memory.load_seconds,
+            )
+
+    def _unload(self, wake_word_id: str) -> None:
+        _LOGGER.debug("Unloading wake word: %s", wake_word_id)
+        self.memory.pop(wake_word_id, None)
+        self._last_active.pop(wake_word_id, None)
+        self._models.pop(wake_word_id, None)
+
+    def _size(self, wake_word_id: str) -> int:
+        memory = self.memory.get(wake_word_id)
+        return 0 if memory is None else memory.size
+
+
+def get_rss() -> int:
+    """Resident memory of this process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _model_file_size(model_info: AvailableWakeWord) -> int:
+    try:
+        if model_info.type == WakeWordType.MICRO_WAKE_WORD:
+            # Path is the config
+            with open(model_info.wake_word_path, "r", encoding="utf-8") as config_file:
+                model_path = (
+                    model_info.wake_word_path.parent / json.load(config_file)["model"]
+                )
+        else:
+            model_path = model_info.wake_word_path
+
+        return model_path.stat().st_size
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def _tensor_arena_size(model_info: AvailableWakeWord) -> Optional[int]:
+    if model_info.type != WakeWordType.MICRO_WAKE_WORD:
+        return None
+
+    try:
+        with open(model_info.wake_word_path, "r", encoding="utf-8") as config_file:
+            return json.load(config_file)["micro"].get("tensor_arena_size")
+    except (OSError, ValueError, KeyError):
+        return None
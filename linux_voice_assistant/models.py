@@ -12,12 +12,16 @@ if TYPE_CHECKING:
     from pymicro_wakeword import MicroWakeWord
     from pyopen_wakeword import OpenWakeWord
 
+    from .api_server import ResponseCache
+    from .audio_buffer import PcmRingBuffer
+    from .download_cache import DownloadCache
     from .entity import (
         ESPHomeEntity,
         MediaPlayerEntity,
         MuteSwitchEntity,
         ThinkingSoundEntity,
     )
+    from .model_cache import WakeWordModelCache
     from .mpv_player import MpvMediaPlayer
     from .satellite import VoiceSatelliteProtocol
 
@@ -82,13 +86,21 @@ class ServerState:
     preferences: Preferences
     preferences_path: Path
     download_dir: Path
+    model_cache: "WakeWordModelCache"
 
     media_player_entity: "Optional[MediaPlayerEntity]" = None
     satellite: "Optional[VoiceSatelliteProtocol]" = None
     mute_switch_entity: "Optional[MuteSwitchEntity]" = None
     thinking_sound_entity: "Optional[ThinkingSoundEntity]" = None
+    audio_buffer: "Optional[PcmRingBuffer]" = None
+    download_cache: "Optional[DownloadCache]" = None
+    response_cache: "Optional[ResponseCache]" = None
     wake_words_changed: bool = False
     refractory_seconds: float = 2.0
+    preroll_seconds: float = 0.0
+    audio_frame_seconds: float = 0.0
+    audio_frame_max_delay_seconds: float = 0.1
+    audio_send_queue_seconds: float = 2.0
     thinking_sound_enabled: bool = False
     muted: bool = False
     connected: bool = False
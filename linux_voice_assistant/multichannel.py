@@ -0,0 +1,306 @@
+"""Wake word detection on multi-channel microphones."""
+
+import logging
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple, cast
+from weakref import WeakKeyDictionary
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pymicro_wakeword import MicroWakeWord
+
+from .audio_buffer import pcm_bytes
+from .wake_word import WakeWord, WakeWordDetector, reset_streaming_state
+
+_LOGGER = logging.getLogger(__name__)
+
+# 0.5 ms at 16Khz, about 17 cm of path difference
+DEFAULT_MAX_DELAY_SAMPLES = 8
+
+
+def clone_wake_word(wake_word: WakeWord) -> WakeWord:
+    """Load another instance of a wake word model with its own state."""
+    if isinstance(wake_word, MicroWakeWord):
+        return MicroWakeWord(
+            id=wake_word.id,
+            wake_word=wake_word.wake_word,
+            tflite_model=wake_word.tflite_model,
+            probability_cutoff=wake_word.probability_cutoff,
+            sliding_window_size=wake_word.sliding_window_size,
+            trained_languages=wake_word.trained_languages,
+            libtensorflowlite_c_path=wake_word.libtensorflowlite_c_path,
+        )
+
+    from pyopen_wakeword import OpenWakeWord
+
+    oww_model = OpenWakeWord(
+        id=wake_word.id,
+        tflite_model=wake_word.tflite_model,
+        libtensorflowlite_c_path=wake_word.libtensorflowlite_c_path,
+    )
+    setattr(oww_model, "wake_word", getattr(wake_word, "wake_word", wake_word.id))
+
+    return oww_model
+
+
+class ChannelMixer:
+    """Splits interleaved audio into channels and mixes the audio to stream.
+
+    The streamed audio is either the channel that scored highest for the last
+    detection, or a delay-and-sum beam of all channels aligned to it. The beam
+    lags the input by max_delay_samples.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        max_frames: int,
+        beamform: bool = False,
+        max_delay_samples: int = DEFAULT_MAX_DELAY_SAMPLES,
+    ) -> None:
+        self.channels = channels
+        self.max_frames = max_frames
+        self.beamform = beamform
+        self.best_channel = 0
+
+        # Delay of each channel relative to the best channel
+        self.delays = np.zeros(channels, dtype=np.int64)
+        self._max_delay = max_delay_samples
+
+        self._split = np.zeros((channels, max_frames), dtype="<i2")
+        self._num_frames = 0
+
+        # Previous audio in front for alignment
+        self._history_len = 2 * max_delay_samples
+        self._history = np.zeros(
+            (channels, self._history_len + max_frames), dtype=np.float32
+        )
+        self._beam = np.zeros(max_frames, dtype=np.float32)
+        self._beam_samples = np.zeros(max_frames, dtype="<i2")
+
+    def split(self, samples: np.ndarray) -> List[memoryview]:
+        """Split interleaved samples and return a byte view of each channel.
+
+        The views are reused by the next call.
+        """
+        frames = samples.reshape(-1, self.channels)
+        num_frames = len(frames)
+        if num_frames > self.max_frames:
+            raise ValueError(f"Chunk too large: {num_frames} > {self.max_frames}")
+
+        split = self._split[:, :num_frames]
+        np.copyto(split, frames.T)
+
+        if self.beamform:
+            # Keep the end of the previous chunk in front
+            history_len = self._history_len
+            prev_frames = self._num_frames
+            history = self._history
+            history[:, :history_len] = history[
+                :, prev_frames : prev_frames + history_len
+            ]
+            history[:, history_len : history_len + num_frames] = split
+
+        self._num_frames = num_frames
+
+        return [
+            pcm_bytes(self._split[channel, :num_frames])
+            for channel in range(self.channels)
+        ]
+
+    def select(self, channel: int) -> None:
+        """Stream a channel (or steer the beam towards it)."""
+        self.best_channel = channel
+        if self.beamform:
+            self._estimate_delays()
+
+        _LOGGER.debug("Streaming channel %s (delays=%s)", channel, self.delays.tolist())
+
+    def stream(self) -> np.ndarray:
+        """Return the audio to stream for the last split chunk.
+
+        The returned array is reused by the next call.
+        """
+        num_frames = self._num_frames
+        if not self.beamform:
+            return self._split[self.best_channel, :num_frames]
+
+        beam = self._beam[:num_frames]
+        beam.fill(0)
+        for channel, delay in enumerate(self.delays):
+            # Sample j of the beam is at index max_delay + j in the history,
+            # so each channel is read ahead by its delay.
+            start = self._max_delay + delay
+            np.add(beam, self._history[channel, start : start + num_frames], out=beam)
+
+        np.multiply(beam, 1 / self.channels, out=beam)
+        beam_samples = self._beam_samples[:num_frames]
+        np.copyto(beam_samples, beam, casting="unsafe")
+
+        return beam_samples
+
+    def _estimate_delays(self) -> None:
+        """Align each channel to the best channel by cross-correlation."""
+        num_frames = self._num_frames
+        max_delay = self._max_delay
+        reference = self._history[self.best_channel, max_delay : max_delay + num_frames]
+
+        for channel in range(self.channels):
+            if channel == self.best_channel:
+                self.delays[channel] = 0
+                continue
+
+            # One row per candidate delay in [-max_delay, max_delay]
+            windows = sliding_window_view(
+                self._history[channel, : self._history_len + num_frames], num_frames
+            )
+            self.delays[channel] = int(np.argmax(windows @ reference)) - max_delay
+
+
+class MultiChannelDetector:
+    """Runs wake word detection on each channel separately.
+
+    Every channel needs its own instance of each model, since models keep
+    streaming state. Channel 0 uses the models it's given; the others use
+    copies that are loaded on first use. With an executor, channels are
+    processed concurrently.
+    """
+
+    def __init__(self, channels: int, executor: Optional[Executor] = None) -> None:
+        self.channels = channels
+        self.executor = executor
+        self.wake_words: List[WakeWord] = []
+        self.detectors = [WakeWordDetector() for _ in range(channels)]
+
+        # model -> copies for channels 1..N-1 (dropped with the model when it's
+        # unloaded)
+        self._copies: "WeakKeyDictionary[WakeWord, List[WakeWord]]" = (
+            WeakKeyDictionary()
+        )
+        self._running: List[int] = []
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Highest probability of each wake word (columns) on each channel (rows)."""
+        return np.array([detector.scores for detector in self.detectors])
+
+    def set_wake_words(self, wake_words: Iterable[WakeWord]) -> None:
+        """Change the wake word models to process."""
+        self.wake_words = list(wake_words)
+        for channel, detector in enumerate(self.detectors):
+            detector.set_wake_words(
+                [self._channel_model(ww, channel) for ww in self.wake_words]
+            )
+
+    def reset(self, stop_word: Optional[MicroWakeWord] = None) -> None:
+        """Clear streaming state of each channel, e.g. after audio was skipped."""
+        for channel, detector in enumerate(self.detectors):
+            detector.reset(self._channel_stop_word(stop_word, channel))
+
+    def warm_up(self, stop_word: Optional[MicroWakeWord] = None) -> Dict[str, float]:
+        """Warm up the detector of each channel (see WakeWordDetector.warm_up).
+
+        Returns the seconds spent in each feature extractor and model, summed
+        over all channels.
+        """
+        timings: Dict[str, float] = {}
+        for channel, detector in enumerate(self.detectors):
+            channel_stop_word = self._channel_stop_word(stop_word, channel)
+            for name, seconds in detector.warm_up(channel_stop_word).items():
+                timings[name] = timings.get(name, 0.0) + seconds
+
+        return timings
+
+    def best_channel(self, wake_word: WakeWord) -> int:
+        """Return the channel with the highest probability for a wake word."""
+        wake_word_idx = self.wake_words.index(wake_word)
+        return int(np.argmax(self.scores[:, wake_word_idx]))
+
+    def process(
+        self,
+        channel_chunks: List[memoryview],
+        stop_word: Optional[MicroWakeWord] = None,
+    ) -> Tuple[List[WakeWord], bool]:
+        """Process 16Khz 16-bit audio for each channel.
+
+        Returns the wake words that were activated on any channel (in the
+        order of wake_words) and whether the stop model was activated.
+        """
+        self._reset_copies(stop_word)
+        channel_stop_words = [
+            self._channel_stop_word(stop_word, channel)
+            for channel in range(self.channels)
+        ]
+
+        if self.executor is not None:
+            futures = [
+                self.executor.submit(
+                    detector.process,
+                    channel_chunks[channel],
+                    channel_stop_words[channel],
+                )
+                for channel, detector in enumerate(self.detectors)
+                if channel > 0
+            ]
+            results = [
+                self.detectors[0].process(channel_chunks[0], channel_stop_words[0])
+            ]
+            results.extend(future.result() for future in futures)
+        else:
+            results = [
+                detector.process(channel_chunks[channel], channel_stop_words[channel])
+                for channel, detector in enumerate(self.detectors)
+            ]
+
+        # Copies are reported as their channel 0 model
+        activated: List[WakeWord] = []
+        for wake_word_idx, wake_word in enumerate(self.wake_words):
+            if any(
+                self.detectors[channel].wake_words[wake_word_idx] in channel_activated
+                for channel, (channel_activated, _stopped) in enumerate(results)
+            ):
+                activated.append(wake_word)
+
+        stopped = any(channel_stopped for _activated, channel_stopped in results)
+
+        return activated, stopped
+
+    def _channel_model(self, model: WakeWord, channel: int) -> WakeWord:
+        if channel == 0:
+            return model
+
+        copies = self._copies.get(model)
+        if copies is None:
+            _LOGGER.debug(
+                "Loading %s more instance(s) of %s", self.channels - 1, model.id
+            )
+            copies = [clone_wake_word(model) for _ in range(self.channels - 1)]
+            self._copies[model] = copies
+
+        return copies[channel - 1]
+
+    def _channel_stop_word(
+        self, stop_word: Optional[MicroWakeWord], channel: int
+    ) -> Optional[MicroWakeWord]:
+        if stop_word is None:
+            return None
+
+        # Copies have the same type as the original
+        return cast(MicroWakeWord, self._channel_model(stop_word, channel))
+
+    def _reset_copies(self, stop_word: Optional[MicroWakeWord]) -> None:
+        """Reset copies of models that just started running.
+
+        The scheduler resets channel 0's models when they start running again,
+        so their copies must follow.
+        """
+        models = [model for model in [*self.wake_words, stop_word] if model is not None]
+        for model in models:
+            if id(model) in self._running:
+                continue
+
+            for channel in range(1, self.channels):
+                reset_streaming_state(self._channel_model(model, channel))
+
+        self._running = [id(model) for model in models]
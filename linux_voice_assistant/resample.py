@@ -0,0 +1,113 @@
+"""Streaming polyphase resampler."""
+
+import math
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Zero crossings of the windowed sinc on each side (at the lower rate)
+_ZERO_CROSSINGS = 16
+_KAISER_BETA = 8.6
+_ROLLOFF = 0.92
+
+
+class PolyphaseResampler:
+    """Resamples float audio by a rational factor, block by block.
+
+    The end of each block is kept so the next block continues seamlessly.
+    Latency is about half the filter length (latency_samples at the input
+    rate).
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1) -> None:
+        if (in_rate <= 0) or (out_rate <= 0):
+            raise ValueError(f"Invalid rates: {in_rate} -> {out_rate}")
+
+        divisor = math.gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+
+        # Taps per phase, in input samples
+        ratio = max(1.0, self.down / self.up)
+        self.num_taps = 2 * _ZERO_CROSSINGS * math.ceil(ratio)
+
+        # Prototype low-pass filter at the upsampled rate
+        filter_len = self.num_taps * self.up
+        cutoff = _ROLLOFF / (2 * max(self.up, self.down))
+        t = np.arange(filter_len) - ((filter_len - 1) / 2)
+        prototype = (
+            2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(filter_len, _KAISER_BETA)
+        )
+        prototype *= self.up / np.sum(prototype)
+
+        # Phase p uses taps p, p + up, p + 2*up, ... reversed so that they can
+        # be applied to input windows in time order.
+        self._filters = np.ascontiguousarray(
+            prototype.reshape(self.num_taps, self.up).T[:, ::-1], dtype=np.float32
+        )
+
+        self.latency_samples = (filter_len - 1) / (2 * self.up)
+
+        self._history = np.zeros((self.num_taps - 1, channels), dtype=np.float32)
+        self._buffer = np.zeros((0, channels), dtype=np.float32)
+
+        # Position of the next output sample at the upsampled rate, relative
+        # to the start of the next block.
+        self._next_pos = 0
+
+    def max_output_frames(self, num_frames: int) -> int:
+        """Most frames that resampling num_frames can return."""
+        return math.ceil(num_frames * self.up / self.down) + 1
+
+    def reset(self) -> None:
+        self._history.fill(0)
+        self._next_pos = 0
+
+    def process(
+        self, audio: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Resample a block of frames (frames x channels, or mono frames)."""
+        frames = audio.reshape(-1, self.channels)
+        num_frames = len(frames)
+        history_len = len(self._history)
+        buffer_len = history_len + num_frames
+        if len(self._buffer) < buffer_len:
+            self._buffer = np.zeros((buffer_len, self.channels), dtype=np.float32)
+
+        buffer = self._buffer[:buffer_len]
+        buffer[:history_len] = self._history
+        buffer[history_len:] = frames
+
+        end_pos = num_frames * self.up
+        num_out = max(0, math.ceil((end_pos - self._next_pos) / self.down))
+        if out is None:
+            out = np.empty((num_out, self.channels), dtype=np.float32)
+        else:
+            out = out.reshape(-1, self.channels)[:num_out]
+
+        if num_out > 0:
+            positions = self._next_pos + (self.down * np.arange(num_out))
+            for channel in range(self.channels):
+                # Window i ends at input sample i of this block
+                windows = sliding_window_view(buffer[:, channel], self.num_taps)
+                if self.up == 1:
+                    # Integer decimation: one phase, strided windows (no copy)
+                    out[:, channel] = (
+                        windows[self._next_pos :: self.down][:num_out]
+                        @ self._filters[0]
+                    )
+                else:
+                    out[:, channel] = np.einsum(
+                        "ij,ij->i",
+                        windows[positions // self.up],
+                        self._filters[positions % self.up],
+                    )
+
+        self._next_pos += (num_out * self.down) - end_pos
+        self._history[:] = buffer[num_frames:]
+
+        return out
@@ -1,14 +1,16 @@
 """Voice satellite protocol."""
 
 import asyncio
-import hashlib
 import logging
+import os
 import posixpath
 import re
 import shutil
 import time
 from collections.abc import Iterable
-from typing import Dict, Optional, Set, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.client import HTTPException
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 from urllib.parse import urlparse, urlunparse
 from urllib.request import urlopen
 
@@ -19,12 +21,9 @@ from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
     DeviceInfoResponse,
     ListEntitiesDoneResponse,
     ListEntitiesRequest,
-    MediaPlayerCommandRequest,
     SubscribeHomeAssistantStatesRequest,
-    SwitchCommandRequest,
     VoiceAssistantAnnounceFinished,
     VoiceAssistantAnnounceRequest,
-    VoiceAssistantAudio,
     VoiceAssistantConfigurationRequest,
     VoiceAssistantConfigurationResponse,
     VoiceAssistantEventResponse,
@@ -41,18 +40,48 @@ from aioesphomeapi.model import (
     VoiceAssistantTimerEventType,
 )
 from google.protobuf import message
-from pymicro_wakeword import MicroWakeWord
-from pyopen_wakeword import OpenWakeWord
 
-from .api_server import APIServer
-from .entity import MediaPlayerEntity, MuteSwitchEntity, ThinkingSoundEntity
+from .api_server import APIServer, ResponseCache
+from .audio_buffer import AudioFramer, PreRollBuffer
+from .download_cache import DownloadCache
+from .entity import (
+    EntityRegistry,
+    MediaPlayerEntity,
+    MuteSwitchEntity,
+    ThinkingSoundEntity,
+)
 from .models import AvailableWakeWord, ServerState, WakeWordType
 from .util import call_all
+from .wake_word import WakeWord
 
 _LOGGER = logging.getLogger(__name__)
 
 PROTO_TO_MESSAGE_TYPE = {v: k for k, v in MESSAGE_TYPE_TO_PROTO.items()}
 
+# 16Khz 16-bit mono
+_SAMPLE_WIDTH = 2
+_BYTES_PER_SECOND = 16000 * _SAMPLE_WIDTH
+_PREROLL_MESSAGE_BYTES = 2048
+
+_MessageHandler = Callable[
+    [message.Message], Optional[Iterable[Union[message.Message, bytes]]]
+]
+
+# Keys of cached responses
+_DEVICE_INFO = "device_info"
+_LIST_ENTITIES = "list_entities"
+_CONFIGURATION = "configuration"
+
+
+def _call_soon_threadsafe(
+    loop: asyncio.AbstractEventLoop, callback: Callable[..., Any], *args: Any
+) -> None:
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # Event loop was closed
+        pass
+
 
 class VoiceSatelliteProtocol(APIServer):
 
@@ -63,6 +92,16 @@ class VoiceSatelliteProtocol(APIServer):
         self.state.satellite = self
         self.state.connected = False
 
+        # Shared by all connections
+        if self.state.response_cache is None:
+            self.state.response_cache = ResponseCache()
+
+        self._responses = self.state.response_cache
+        self.max_audio_queue_bytes = int(
+            self.state.audio_send_queue_seconds * _BYTES_PER_SECOND
+        )
+        entities_before = list(self.state.entities)
+
         existing_media_players = [
             entity
             for entity in self.state.entities
@@ -165,7 +204,42 @@ class VoiceSatelliteProtocol(APIServer):
         )
         thinking_sound_switch.sync_with_state()
 
+        if self.state.entities != entities_before:
+            self._responses.invalidate(_LIST_ENTITIES)
+
+        self._entities = EntityRegistry(self.state.entities)
+
+        # Message id -> handler
+        self._handlers: Dict[int, _MessageHandler] = {
+            PROTO_TO_MESSAGE_TYPE[msg_class]: handler
+            for msg_class, handler in (
+                (VoiceAssistantEventResponse, self._handle_voice_event_response),
+                (VoiceAssistantAnnounceRequest, self._handle_announce_request),
+                (VoiceAssistantTimerEventResponse, self._handle_timer_event_response),
+                (DeviceInfoRequest, self._handle_device_info_request),
+                (ListEntitiesRequest, self._handle_list_entities_request),
+                (SubscribeHomeAssistantStatesRequest, self._entities.handle_all),
+                (
+                    VoiceAssistantConfigurationRequest,
+                    self._handle_configuration_request,
+                ),
+                (VoiceAssistantSetConfiguration, self._handle_set_configuration),
+            )
+        }
+        for msg_type in self._entities.command_types:
+            self._handlers[msg_type] = self._entities.handle_command
+
         self._is_streaming_audio = False
+        self._preroll = PreRollBuffer(
+            int(self.state.preroll_seconds * _BYTES_PER_SECOND)
+        )
+        self._send_preroll = False
+        self._preroll_mark: Optional[int] = None
+        self._audio_framer = AudioFramer(
+            # Whole samples only
+            int(self.state.audio_frame_seconds * _BYTES_PER_SECOND) & ~1,
+            self.state.audio_frame_max_delay_seconds,
+        )
         self._tts_url: Optional[str] = None
         self._tts_played = False
         self._continue_conversation = False
@@ -173,6 +247,12 @@ class VoiceSatelliteProtocol(APIServer):
         self._processing = False
         self._pipeline_active = False
         self._external_wake_words: Dict[str, VoiceAssistantExternalWakeWord] = {}
+        self._wake_word_loader = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="wake_word_loader"
+        )
+        self._wake_words_generation = 0
+        self._requested_wake_words: Optional[List[str]] = None
+        self._configuration_requested = False
         self._disconnect_event = asyncio.Event()
 
     def _set_thinking_sound_enabled(self, new_state: bool) -> None:
@@ -264,40 +344,89 @@ class VoiceSatelliteProtocol(APIServer):
                 self.duck()
                 self._play_timer_finished()
 
-    def handle_message(self, msg: message.Message) -> Iterable[message.Message]:
-        if isinstance(msg, VoiceAssistantEventResponse):
-            # Pipeline event
-            data: Dict[str, str] = {}
-            for arg in msg.data:
-                data[arg.name] = arg.value
+    def handle_message(
+        self, msg: message.Message
+    ) -> Optional[Iterable[Union[message.Message, bytes]]]:
+        handler = self._handlers.get(PROTO_TO_MESSAGE_TYPE.get(msg.__class__, -1))
+        if handler is None:
+            return None
+
+        return handler(msg)
 
-            self.handle_voice_event(VoiceAssistantEventType(msg.event_type), data)
-        elif isinstance(msg, VoiceAssistantAnnounceRequest):
-            _LOGGER.debug("Announcing: %s", msg.text)
+    def _handle_voice_event_response(self, msg: message.Message) -> None:
+        # Pipeline event
+        data: Dict[str, str] = {}
+        for arg in msg.data:
+            data[arg.name] = arg.value
 
-            assert self.state.media_player_entity is not None
+        self.handle_voice_event(VoiceAssistantEventType(msg.event_type), data)
 
-            urls = []
-            if msg.preannounce_media_id:
-                urls.append(msg.preannounce_media_id)
+    def _handle_announce_request(self, msg: message.Message) -> None:
+        _LOGGER.debug("Announcing: %s", msg.text)
 
-            urls.append(msg.media_id)
+        assert self.state.media_player_entity is not None
 
-            self.state.active_wake_words.add(self.state.stop_word.id)
-            self._continue_conversation = msg.start_conversation
+        urls = []
+        if msg.preannounce_media_id:
+            urls.append(msg.preannounce_media_id)
 
-            self.duck()
-            self.state.tts_player.play(urls, done_callback=self._tts_finished)
-        elif isinstance(msg, VoiceAssistantTimerEventResponse):
-            self.handle_timer_event(VoiceAssistantTimerEventType(msg.event_type), msg)
-        elif isinstance(msg, DeviceInfoRequest):
-            # Compute dynamic device name
-            base_name = re.sub(r"[\s-]+", "-", self.state.name.lower()).strip("-")
-            mac_no_colon = self.state.mac_address.replace(":", "").lower()
-            mac_last6 = mac_no_colon[-6:]
-            device_name = f"{base_name}-{mac_last6}"
+        urls.append(msg.media_id)
 
-            yield DeviceInfoResponse(
+        self.state.active_wake_words.add(self.state.stop_word.id)
+        self._continue_conversation = msg.start_conversation
+
+        self.duck()
+        self.state.tts_player.play(urls, done_callback=self._tts_finished)
+
+    def _handle_timer_event_response(self, msg: message.Message) -> None:
+        self.handle_timer_event(VoiceAssistantTimerEventType(msg.event_type), msg)
+
+    def _handle_device_info_request(self, msg: message.Message) -> List[bytes]:
+        return [self._responses.get(_DEVICE_INFO, self._device_info_response)]
+
+    def _handle_list_entities_request(self, msg: message.Message) -> List[bytes]:
+        return [self._responses.get(_LIST_ENTITIES, self._list_entities_responses)]
+
+    def _handle_configuration_request(self, msg: message.Message) -> List[bytes]:
+        # Home Assistant sends all of its external wake words each time
+        self._external_wake_words = {}
+        for eww in msg.external_wake_words:
+            if eww.model_type != "micro":
+                continue
+
+            self._external_wake_words[eww.id] = eww
+
+        self._configuration_requested = True
+        _LOGGER.info("Connected to Home Assistant")
+        return [self._encoded_configuration_response()]
+
+    def _handle_set_configuration(self, msg: message.Message) -> None:
+        # Change active wake words.
+        # Models are downloaded/loaded in the background, and the current
+        # wake words keep working until they're ready.
+        self._wake_words_generation += 1
+        generation = self._wake_words_generation
+        self._requested_wake_words = list(msg.active_wake_words)
+        self._responses.invalidate(_CONFIGURATION)
+        loop = asyncio.get_running_loop()
+        future = self._wake_word_loader.submit(
+            self._load_wake_words, list(msg.active_wake_words)
+        )
+        future.add_done_callback(
+            lambda f: _call_soon_threadsafe(
+                loop, self._wake_words_loaded, generation, f
+            )
+        )
+
+    def _device_info_response(self) -> List[message.Message]:
+        # Compute dynamic device name
+        base_name = re.sub(r"[\s-]+", "-", self.state.name.lower()).strip("-")
+        mac_no_colon = self.state.mac_address.replace(":", "").lower()
+        mac_last6 = mac_no_colon[-6:]
+        device_name = f"{base_name}-{mac_last6}"
+
+        return [
+            DeviceInfoResponse(
                 uses_password=False,
                 name=device_name,
                 mac_address=self.state.mac_address,
@@ -311,99 +440,225 @@ class VoiceSatelliteProtocol(APIServer):
                     | VoiceAssistantFeature.TIMERS
                 ),
             )
-        elif isinstance(
-            msg,
-            (
-                ListEntitiesRequest,
-                SubscribeHomeAssistantStatesRequest,
-                MediaPlayerCommandRequest,
-                SwitchCommandRequest,
+        ]
+
+    def _list_entities_responses(self) -> List[message.Message]:
+        responses = self._entities.handle_all(ListEntitiesRequest())
+        responses.append(ListEntitiesDoneResponse())
+        return responses
+
+    def _encoded_configuration_response(self) -> bytes:
+        # External wake words are sent by Home Assistant with each request,
+        # and the active wake words can change outside of this connection.
+        requested_wake_words = self._requested_wake_words
+        return self._responses.get(
+            _CONFIGURATION,
+            lambda: [self._configuration_response()],
+            version=(
+                tuple(self._external_wake_words),
+                tuple(self.state.available_wake_words),
+                tuple(sorted(self.state.active_wake_words)),
+                (None if requested_wake_words is None else tuple(requested_wake_words)),
             ),
-        ):
-            for entity in self.state.entities:
-                yield from entity.handle_message(msg)
+        )
 
-            if isinstance(msg, ListEntitiesRequest):
-                yield ListEntitiesDoneResponse()
-        elif isinstance(msg, VoiceAssistantConfigurationRequest):
-            available_wake_words = [
+    def _configuration_response(self) -> VoiceAssistantConfigurationResponse:
+        available_wake_words = [
+            VoiceAssistantWakeWord(
+                id=ww.id,
+                wake_word=ww.wake_word,
+                trained_languages=ww.trained_languages,
+            )
+            for ww in self.state.available_wake_words.values()
+        ]
+
+        for eww in self._external_wake_words.values():
+            if eww.id in self.state.available_wake_words:
+                # Already downloaded
+                continue
+
+            available_wake_words.append(
                 VoiceAssistantWakeWord(
-                    id=ww.id,
-                    wake_word=ww.wake_word,
-                    trained_languages=ww.trained_languages,
+                    id=eww.id,
+                    wake_word=eww.wake_word,
+                    trained_languages=eww.trained_languages,
                 )
+            )
+
+        if self._requested_wake_words is not None:
+            # Report what was asked for while the models are still loading
+            available_ids = {ww.id for ww in available_wake_words}
+            active_wake_words = [
+                wake_word_id
+                for wake_word_id in self._requested_wake_words
+                if wake_word_id in available_ids
+            ]
+        else:
+            active_wake_words = [
+                ww.id
                 for ww in self.state.available_wake_words.values()
+                if ww.id in self.state.active_wake_words
             ]
 
-            for eww in msg.external_wake_words:
-                if eww.model_type != "micro":
-                    continue
-
-                available_wake_words.append(
-                    VoiceAssistantWakeWord(
-                        id=eww.id,
-                        wake_word=eww.wake_word,
-                        trained_languages=eww.trained_languages,
-                    )
-                )
+        return VoiceAssistantConfigurationResponse(
+            available_wake_words=available_wake_words,
+            active_wake_words=active_wake_words,
+            max_active_wake_words=2,
+        )
 
-                self._external_wake_words[eww.id] = eww
+    def available_wake_words_changed(self) -> None:
+        """Offer the current wake words to Home Assistant again."""
+        self._responses.invalidate(_CONFIGURATION)
+        if self._configuration_requested:
+            self.send_messages([self._encoded_configuration_response()])
+
+    def _load_wake_words(
+        self, wake_word_ids: List[str]
+    ) -> Tuple[Set[str], Dict[str, Tuple[AvailableWakeWord, WakeWord]]]:
+        """Download/load models for wake words. Runs in the loader thread.
+
+        Returns the new active wake words and the models that were loaded.
+        """
+        active_wake_words: Set[str] = set()
+        loaded: Dict[str, Tuple[AvailableWakeWord, WakeWord]] = {}
+
+        for wake_word_id in wake_word_ids:
+            if wake_word_id in self.state.wake_words:
+                # Already active
+                active_wake_words.add(wake_word_id)
+                continue
 
-            yield VoiceAssistantConfigurationResponse(
-                available_wake_words=available_wake_words,
-                active_wake_words=[
-                    ww.id
-                    for ww in self.state.wake_words.values()
-                    if ww.id in self.state.active_wake_words
-                ],
-                max_active_wake_words=2,
-            )
-            _LOGGER.info("Connected to Home Assistant")
-        elif isinstance(msg, VoiceAssistantSetConfiguration):
-            # Change active wake words
-            active_wake_words: Set[str] = set()
-
-            for wake_word_id in msg.active_wake_words:
-                if wake_word_id in self.state.wake_words:
-                    # Already active
-                    active_wake_words.add(wake_word_id)
+            model_info = self.state.available_wake_words.get(wake_word_id)
+            if not model_info:
+                # Check external wake words (may require download)
+                external_wake_word = self._external_wake_words.get(wake_word_id)
+                if not external_wake_word:
                     continue
 
-                model_info = self.state.available_wake_words.get(wake_word_id)
+                model_info = self._download_external_wake_word(external_wake_word)
                 if not model_info:
-                    # Check external wake words (may require download)
-                    external_wake_word = self._external_wake_words.get(wake_word_id)
-                    if not external_wake_word:
-                        continue
+                    continue
 
-                    model_info = self._download_external_wake_word(external_wake_word)
-                    if not model_info:
-                        continue
+            _LOGGER.debug("Loading wake word: %s", model_info.wake_word_path)
+            model = self.state.model_cache.load(model_info)
+            loaded[wake_word_id] = (model_info, model)
 
-                    self.state.available_wake_words[wake_word_id] = model_info
+            active_wake_words.add(wake_word_id)
+            break
 
-                _LOGGER.debug("Loading wake word: %s", model_info.wake_word_path)
-                self.state.wake_words[wake_word_id] = model_info.load()
+        return active_wake_words, loaded
 
-                _LOGGER.info("Wake word set: %s", wake_word_id)
-                active_wake_words.add(wake_word_id)
-                break
+    def _wake_words_loaded(
+        self,
+        generation: int,
+        future: "Future[Tuple[Set[str], Dict[str, Tuple[AvailableWakeWord, WakeWord]]]]",
+    ) -> None:
+        """Swap in wake words from the loader. Runs on the event loop."""
+        is_current = generation == self._wake_words_generation
+        if is_current:
+            self._requested_wake_words = None
+            self._responses.invalidate(_CONFIGURATION)
+
+        try:
+            active_wake_words, loaded = future.result()
+        except Exception:
+            _LOGGER.exception("Unexpected error loading wake words")
+            return
+
+        if not is_current:
+            # Superseded by a newer configuration or the connection was lost
+            for wake_word_id in loaded:
+                if wake_word_id not in self.state.wake_words:
+                    self.state.model_cache.unload(wake_word_id)
+
+            return
+
+        for wake_word_id, model_info in list(self.state.available_wake_words.items()):
+            if not model_info.wake_word_path.exists():
+                # Evicted from download cache
+                del self.state.available_wake_words[wake_word_id]
+
+        wake_words = dict(self.state.wake_words)
+        for wake_word_id, (model_info, model) in loaded.items():
+            self.state.available_wake_words[wake_word_id] = model_info
+            wake_words[wake_word_id] = model
+            _LOGGER.info("Wake word set: %s", wake_word_id)
+
+        # The audio thread reads these without a lock. New models are added
+        # before they're made active, so it never sees an active wake word
+        # that isn't loaded.
+        self.state.wake_words = self.state.model_cache.evict(
+            wake_words, active_wake_words
+        )
+        self.state.active_wake_words = active_wake_words
+        self._responses.invalidate(_CONFIGURATION)
+        _LOGGER.debug("Active wake words: %s", active_wake_words)
+        self.state.model_cache.log_report()
 
-            self.state.active_wake_words = active_wake_words
-            _LOGGER.debug("Active wake words: %s", active_wake_words)
+        self.state.preferences.active_wake_words = list(active_wake_words)
+        self.state.save_preferences()
+        self.state.wake_words_changed = True
 
-            self.state.preferences.active_wake_words = list(active_wake_words)
-            self.state.save_preferences()
-            self.state.wake_words_changed = True
+    def handle_audio(self, audio_chunk: Union[bytes, memoryview]) -> None:
+        """Handle audio from the audio thread.
 
-    def handle_audio(self, audio_chunk: bytes) -> None:
+        Must only be called from the audio thread.
+        """
+        if self.state.muted:
+            return
 
-        if not self._is_streaming_audio or self.state.muted:
+        if not self._is_streaming_audio:
+            # Keep recent audio to send when streaming starts
+            self._preroll.write(audio_chunk)
             return
 
-        self.send_messages([VoiceAssistantAudio(data=audio_chunk)])
+        # Frames are copies, since views into the audio thread's buffer are
+        # reused.
+        audio_frames: List[bytes] = []
+        if self._send_preroll:
+            # New stream
+            self._send_preroll = False
+            self._audio_framer.clear()
+            preroll_bytes = self._preroll.drain(since=self._preroll_mark)
+            if preroll_bytes:
+                _LOGGER.debug(
+                    "Sending %s byte(s) of pre-roll audio", len(preroll_bytes)
+                )
 
-    def wakeup(self, wake_word: Union[MicroWakeWord, OpenWakeWord]) -> None:
+            for i in range(0, len(preroll_bytes), _PREROLL_MESSAGE_BYTES):
+                audio_frames.extend(
+                    self._audio_framer.add(
+                        preroll_bytes[i : i + _PREROLL_MESSAGE_BYTES]
+                    )
+                )
+
+        audio_frames.extend(self._audio_framer.add(audio_chunk))
+        if audio_frames:
+            self.send_audio(audio_frames)
+
+    def log_audio_stats(self) -> None:
+        """Log packet rate of the audio stream. Called from the audio thread."""
+        self._audio_framer.log_stats()
+        self.log_send_stats()
+
+    def _start_streaming_audio(self, delay_samples: int = 0) -> None:
+        """Start streaming audio, beginning with the pre-roll audio.
+
+        delay_samples is the audio that arrived after the chunk the wake/stop
+        word was detected in (detection lags with worker processes).
+        """
+        # Only audio from after the detection is sent, so the wake word or the
+        # end of the TTS response doesn't go to speech-to-text.
+        self._preroll_mark = max(
+            0, self._preroll.bytes_written - (delay_samples * _SAMPLE_WIDTH)
+        )
+
+        # The pre-roll buffer is only touched from the audio thread, so it's
+        # sent with the next chunk.
+        self._send_preroll = True
+        self._is_streaming_audio = True
+
+    def wakeup(self, wake_word: WakeWord, delay_samples: int = 0) -> None:
         if self._timer_finished:
             # Stop timer instead
             self._timer_finished = False
@@ -421,10 +676,10 @@ class VoiceSatelliteProtocol(APIServer):
             [VoiceAssistantRequest(start=True, wake_word_phrase=wake_word_phrase)]
         )
         self.duck()
-        self._is_streaming_audio = True
+        self._start_streaming_audio(delay_samples)
         self.state.tts_player.play(self.state.wakeup_sound)
 
-    def stop(self) -> None:
+    def stop(self, delay_samples: int = 0) -> None:
         self.state.active_wake_words.discard(self.state.stop_word.id)
         self.state.tts_player.stop()
 
@@ -433,7 +688,7 @@ class VoiceSatelliteProtocol(APIServer):
             _LOGGER.debug("Stopping timer finished sound")
         else:
             _LOGGER.debug("TTS response stopped manually")
-            self._tts_finished()
+            self._tts_finished(delay_samples)
 
     def play_tts(self) -> None:
         if (not self._tts_url) or self._tts_played:
@@ -453,13 +708,13 @@ class VoiceSatelliteProtocol(APIServer):
         _LOGGER.debug("Unducking music")
         self.state.music_player.unduck()
 
-    def _tts_finished(self) -> None:
+    def _tts_finished(self, delay_samples: int = 0) -> None:
         self.state.active_wake_words.discard(self.state.stop_word.id)
         self.send_messages([VoiceAssistantAnnounceFinished()])
 
         if self._continue_conversation:
             self.send_messages([VoiceAssistantRequest(start=True)])
-            self._is_streaming_audio = True
+            self._start_streaming_audio(delay_samples)
             _LOGGER.debug("Continuing conversation")
         else:
             self.unduck()
@@ -482,6 +737,14 @@ class VoiceSatelliteProtocol(APIServer):
         super().connection_lost(exc)
 
         self._disconnect_event.set()
+
+        # Discard wake words that are still loading for this connection
+        self._wake_words_generation += 1
+        self._requested_wake_words = None
+        self._wake_word_loader.shutdown(wait=False)
+
+        # The cached response is shared with the next connection
+        self._responses.invalidate(_CONFIGURATION)
         self._is_streaming_audio = False
         self._tts_url = None
         self._tts_played = False
@@ -509,17 +772,15 @@ class VoiceSatelliteProtocol(APIServer):
 
         _LOGGER.info("Disconnected from Home Assistant; waiting for reconnection")
 
-    def process_packet(self, msg_type: int, packet_data: bytes) -> None:
+    def process_packet(
+        self, msg_type: int, packet_data: Union[bytes, memoryview]
+    ) -> None:
         super().process_packet(msg_type, packet_data)
 
         if msg_type == PROTO_TO_MESSAGE_TYPE[AuthenticationRequest]:
             self.state.connected = True
             # Send states after connect
-            states = []
-            for entity in self.state.entities:
-                states.extend(
-                    entity.handle_message(SubscribeHomeAssistantStatesRequest())
-                )
+            states = self._entities.handle_all(SubscribeHomeAssistantStatesRequest())
             self.send_messages(states)
             _LOGGER.debug("Sent entity states after connect")
 
@@ -529,58 +790,71 @@ class VoiceSatelliteProtocol(APIServer):
         eww_dir = self.state.download_dir / "external_wake_words"
         eww_dir.mkdir(parents=True, exist_ok=True)
 
-        config_path = eww_dir / f"{external_wake_word.id}.json"
-        should_download_config = not config_path.exists()
+        if self.state.download_cache is None:
+            self.state.download_cache = DownloadCache(
+                eww_dir / "models", suffix=".tflite"
+            )
 
-        # Check if we need to download the model file
+        # Download model file (if not already cached)
         model_path = eww_dir / f"{external_wake_word.id}.tflite"
-        should_download_model = True
-        if model_path.exists():
-            model_size = model_path.stat().st_size
-            if model_size == external_wake_word.model_size:
-                with open(model_path, "rb") as model_file:
-                    model_hash = hashlib.sha256(model_file.read()).hexdigest()
-
-                if model_hash == external_wake_word.model_hash:
-                    should_download_model = False
-                    _LOGGER.debug(
-                        "Model size and hash match for %s. Skipping download.",
-                        external_wake_word.id,
-                    )
+        parsed_url = urlparse(external_wake_word.url)
+        parsed_url = parsed_url._replace(
+            path=posixpath.join(posixpath.dirname(parsed_url.path), model_path.name)
+        )
+        model_url = urlunparse(parsed_url)
+
+        cached_path = self.state.download_cache.fetch(
+            external_wake_word.id,
+            model_url,
+            size=external_wake_word.model_size,
+            sha256=external_wake_word.model_hash,
+            keep=list(self.state.wake_words),
+        )
+        if cached_path is None:
+            return None
 
-        if should_download_config or should_download_model:
+        # Config refers to <id>.tflite, which links into the cache
+        link_target = os.path.relpath(cached_path, eww_dir)
+        model_changed = (not model_path.is_symlink()) or (
+            os.readlink(model_path) != link_target
+        )
+        if model_changed:
+            model_path.unlink(missing_ok=True)
+            model_path.symlink_to(link_target)
+
+        config_path = eww_dir / f"{external_wake_word.id}.json"
+        if model_changed or (not config_path.exists()):
             # Download config
             _LOGGER.debug("Downloading %s to %s", external_wake_word.url, config_path)
-            with urlopen(external_wake_word.url) as request:
-                if request.status != 200:
-                    _LOGGER.warning(
-                        "Failed to download: %s, status=%s",
-                        external_wake_word.url,
-                        request.status,
-                    )
-                    return None
-
-                with open(config_path, "wb") as model_file:
-                    shutil.copyfileobj(request, model_file)
-
-        if should_download_model:
-            # Download model file
-            parsed_url = urlparse(external_wake_word.url)
-            parsed_url = parsed_url._replace(
-                path=posixpath.join(posixpath.dirname(parsed_url.path), model_path.name)
-            )
-            model_url = urlunparse(parsed_url)
-
-            _LOGGER.debug("Downloading %s to %s", model_url, model_path)
-            with urlopen(model_url) as request:
-                if request.status != 200:
-                    _LOGGER.warning(
-                        "Failed to download: %s, status=%s", model_url, request.status
-                    )
-                    return None
-
-                with open(model_path, "wb") as model_file:
-                    shutil.copyfileobj(request, model_file)
+            partial_path = config_path.with_name(config_path.name + ".part")
+            try:
+                with urlopen(
+                    external_wake_word.url, timeout=self.state.download_cache.timeout
+                ) as request:
+                    if request.status != 200:
+                        _LOGGER.warning(
+                            "Failed to download: %s, status=%s",
+                            external_wake_word.url,
+                            request.status,
+                        )
+                        return None
+
+                    with open(partial_path, "wb") as model_file:
+                        shutil.copyfileobj(request, model_file)
+            except (OSError, HTTPException):
+                # Downloaded again next time
+                _LOGGER.exception("Failed to download: %s", external_wake_word.url)
+                partial_path.unlink(missing_ok=True)
+                return None
+
+            os.replace(partial_path, config_path)
+
+        # Remove wake words whose models were evicted from the cache
+        for link_path in eww_dir.glob("*.tflite"):
+            if link_path.is_symlink() and (not link_path.exists()):
+                _LOGGER.debug("Removing evicted wake word: %s", link_path.stem)
+                link_path.unlink()
+                (eww_dir / f"{link_path.stem}.json").unlink(missing_ok=True)
 
         return AvailableWakeWord(
             id=external_wake_word.id,
@@ -0,0 +1,473 @@
+"""Wake word discovery and streaming detection."""
+
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+import numpy as np
+from pymicro_wakeword import MicroWakeWord, MicroWakeWordFeatures
+
+from .models import AvailableWakeWord, WakeWordType
+
+if TYPE_CHECKING:
+    from pyopen_wakeword import OpenWakeWord, OpenWakeWordFeatures
+
+    from .models import ServerState
+
+_LOGGER = logging.getLogger(__name__)
+
+# pyopen_wakeword is only imported once an openWakeWord model is used
+WakeWord = Union[MicroWakeWord, "OpenWakeWord"]
+
+_OWW_THRESHOLD = 0.5
+_SAMPLE_RATE = 16000
+
+# Enough audio for the features and models to produce outputs
+_WARM_UP_SECONDS = 0.5
+
+
+def reset_streaming_state(model: WakeWord) -> None:
+    """Clear a model's buffered features and probabilities.
+
+    MicroWakeWord.reset() also reloads the TFLite interpreter, which is too
+    slow for the audio thread. Its internal state is kept, but detection
+    waits for a full window of new probabilities.
+    """
+    if isinstance(model, MicroWakeWord):
+        # pylint: disable=protected-access
+        model._features.clear()
+        model._probabilities.clear()
+    else:
+        # Only clears openWakeWord's buffers
+        model.reset()
+
+
+def find_available_wake_words(
+    wake_word_dirs: Iterable[Path], exclude_ids: Iterable[str] = ()
+) -> Dict[str, AvailableWakeWord]:
+    """Find wake word configs (.json) in directories."""
+    exclude_ids = set(exclude_ids)
+    available_wake_words: Dict[str, AvailableWakeWord] = {}
+
+    for wake_word_dir in wake_word_dirs:
+        for model_config_path in wake_word_dir.glob("*.json"):
+            model_id = model_config_path.stem
+            if model_id in exclude_ids:
+                continue
+
+            available_wake_words[model_id] = load_wake_word_config(model_config_path)
+
+    return available_wake_words
+
+
+def load_wake_word_config(model_config_path: Path) -> AvailableWakeWord:
+    """Load a wake word config (.json)."""
+    with open(model_config_path, "r", encoding="utf-8") as model_config_file:
+        model_config = json.load(model_config_file)
+
+    model_type = WakeWordType(model_config["type"])
+    if model_type == WakeWordType.OPEN_WAKE_WORD:
+        wake_word_path = model_config_path.parent / model_config["model"]
+    else:
+        wake_word_path = model_config_path
+
+    return AvailableWakeWord(
+        id=model_config_path.stem,
+        type=WakeWordType(model_type),
+        wake_word=model_config["wake_word"],
+        trained_languages=model_config.get("trained_languages", []),
+        wake_word_path=wake_word_path,
+    )
+
+
+@dataclass
+class _IndexEntry:
+    mtime_ns: int
+    size: int
+    wake_word: AvailableWakeWord
+
+
+class WakeWordIndex:
+    """Finds wake word configs, only parsing the ones that changed.
+
+    Entries are keyed by config path and checked against the file's
+    modification time and size. The index is saved to index_path (if given),
+    so unchanged configs aren't parsed again on the next start either.
+    """
+
+    def __init__(
+        self,
+        wake_word_dirs: Iterable[Path],
+        exclude_ids: Iterable[str] = (),
+        index_path: Optional[Path] = None,
+    ) -> None:
+        self.wake_word_dirs = list(wake_word_dirs)
+        self.exclude_ids = set(exclude_ids)
+        self.index_path = index_path
+
+        self._entries: Dict[str, _IndexEntry] = {}
+        self._load_index()
+
+    @property
+    def wake_words(self) -> Dict[str, AvailableWakeWord]:
+        """Available wake words from the last scan."""
+        return {entry.wake_word.id: entry.wake_word for entry in self._entries.values()}
+
+    def scan(self) -> bool:
+        """Rescan the directories. Returns True if anything changed."""
+        entries: Dict[str, _IndexEntry] = {}
+        num_parsed = 0
+
+        for wake_word_dir in self.wake_word_dirs:
+            for model_config_path in wake_word_dir.glob("*.json"):
+                if model_config_path.stem in self.exclude_ids:
+                    continue
+
+                try:
+                    stat = model_config_path.stat()
+                except FileNotFoundError:
+                    continue
+
+                key = str(model_config_path)
+                entry = self._entries.get(key)
+                if (
+                    (entry is None)
+                    or (entry.mtime_ns != stat.st_mtime_ns)
+                    or (entry.size != stat.st_size)
+                ):
+                    try:
+                        wake_word = load_wake_word_config(model_config_path)
+                    except (OSError, ValueError, KeyError):
+                        # May still be being written
+                        _LOGGER.warning(
+                            "Skipping invalid wake word config: %s", model_config_path
+                        )
+                        continue
+
+                    entry = _IndexEntry(
+                        mtime_ns=stat.st_mtime_ns,
+                        size=stat.st_size,
+                        wake_word=wake_word,
+                    )
+                    num_parsed += 1
+
+                entries[key] = entry
+
+        changed = (num_parsed > 0) or (entries.keys() != self._entries.keys())
+        self._entries = entries
+
+        if changed:
+            _LOGGER.debug(
+                "Wake word configs changed (parsed=%s, total=%s)",
+                num_parsed,
+                len(entries),
+            )
+            self._save_index()
+
+        return changed
+
+    def _load_index(self) -> None:
+        if (self.index_path is None) or (not self.index_path.exists()):
+            return
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as index_file:
+                for key, entry_dict in json.load(index_file).items():
+                    wake_word_dict = entry_dict["wake_word"]
+                    self._entries[key] = _IndexEntry(
+                        mtime_ns=entry_dict["mtime_ns"],
+                        size=entry_dict["size"],
+                        wake_word=AvailableWakeWord(
+                            id=wake_word_dict["id"],
+                            type=WakeWordType(wake_word_dict["type"]),
+                            wake_word=wake_word_dict["wake_word"],
+                            trained_languages=wake_word_dict["trained_languages"],
+                            wake_word_path=Path(wake_word_dict["wake_word_path"]),
+                        ),
+                    )
+        except (ValueError, KeyError, TypeError):
+            _LOGGER.warning("Ignoring invalid wake word index: %s", self.index_path)
+            self._entries.clear()
+
+    def _save_index(self) -> None:
+        if self.index_path is None:
+            return
+
+        index_dict = {}
+        for key, entry in self._entries.items():
+            wake_word_dict = asdict(entry.wake_word)
+            wake_word_dict["type"] = entry.wake_word.type.value
+            wake_word_dict["wake_word_path"] = str(entry.wake_word.wake_word_path)
+            index_dict[key] = {
+                "mtime_ns": entry.mtime_ns,
+                "size": entry.size,
+                "wake_word": wake_word_dict,
+            }
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(index_dict, index_file, indent=4)
+
+        os.replace(temp_path, self.index_path)
+
+
+class WakeWordDetector:
+    """Streams audio through the feature extractors and wake word models.
+
+    Features are computed once per chunk and shared by all models. With an
+    executor, the feature extractors and then all models (including the stop
+    model) run concurrently; TFLite releases the GIL during inference.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        self.wake_words: List[WakeWord] = []
+        self.executor = executor
+
+        # Highest probability of each wake word in the last chunk
+        self.scores: List[float] = []
+
+        self._micro_features: Optional[MicroWakeWordFeatures] = None
+        self._micro_inputs: List[np.ndarray] = []
+
+        self._oww_features: "Optional[OpenWakeWordFeatures]" = None
+        self._oww_inputs: List[np.ndarray] = []
+        self._has_oww = False
+
+    def set_wake_words(self, wake_words: Iterable[WakeWord]) -> None:
+        """Change the wake word models to process."""
+        self.wake_words = list(wake_words)
+        self._has_oww = any(
+            not isinstance(wake_word, MicroWakeWord) for wake_word in self.wake_words
+        )
+
+        if self._micro_features is None:
+            self._micro_features = MicroWakeWordFeatures()
+
+        if self._has_oww and (self._oww_features is None):
+            from pyopen_wakeword import OpenWakeWordFeatures
+
+            self._oww_features = OpenWakeWordFeatures.from_builtin()
+
+    def reset(self, stop_word: Optional[MicroWakeWord] = None) -> None:
+        """Clear streaming state of the features and models.
+
+        Used when audio was skipped, so detection doesn't continue from
+        stale state.
+        """
+        if self._micro_features is not None:
+            self._micro_features.reset()
+
+        if self._oww_features is not None:
+            self._oww_features.reset()
+
+        for model in [*self.wake_words, stop_word]:
+            if model is not None:
+                reset_streaming_state(model)
+
+    def process(
+        self,
+        audio_chunk: Union[bytes, memoryview],
+        stop_word: Optional[MicroWakeWord] = None,
+    ) -> Tuple[List[WakeWord], bool]:
+        """Process 16Khz 16-bit mono audio.
+
+        Returns the activated wake words (in the order of wake_words) and
+        whether the stop model was activated.
+        """
+        if self._micro_features is None:
+            self.set_wake_words(self.wake_words)
+
+        if (self.executor is not None) and self._has_oww:
+            oww_future = self.executor.submit(self._process_oww_features, audio_chunk)
+            self._process_micro_features(audio_chunk)
+            oww_future.result()
+        else:
+            self._process_micro_features(audio_chunk)
+            if self._has_oww:
+                self._process_oww_features(audio_chunk)
+
+        num_models = len(self.wake_words) + (1 if stop_word is not None else 0)
+        if (self.executor is not None) and (num_models > 1):
+            # Results are merged in submission order, so the outcome doesn't
+            # depend on which model finishes first.
+            wake_word_futures = [
+                self.executor.submit(self._process_wake_word, wake_word)
+                for wake_word in self.wake_words
+            ]
+            stopped = (stop_word is not None) and self._process_stop_word(stop_word)
+            self.scores = [future.result() for future in wake_word_futures]
+        else:
+            self.scores = [
+                self._process_wake_word(wake_word) for wake_word in self.wake_words
+            ]
+            stopped = (stop_word is not None) and self._process_stop_word(stop_word)
+
+        activated_wake_words = [
+            wake_word
+            for wake_word, score in zip(self.wake_words, self.scores)
+            if score > _threshold(wake_word)
+        ]
+
+        return activated_wake_words, stopped
+
+    def warm_up(
+        self,
+        stop_word: Optional[MicroWakeWord] = None,
+        seconds: float = _WARM_UP_SECONDS,
+        chunk_samples: int = 1024,
+    ) -> Dict[str, float]:
+        """Run silence through the feature extractors and models.
+
+        The first chunk after creating or resetting openWakeWord features
+        is much slower, since their buffers are filled first. Afterwards,
+        the feature buffers and the models' probability windows hold the
+        silence, as if it came right before the next chunk. That's kept on
+        purpose: reset would make the next openWakeWord chunk slow again.
+
+        Returns the seconds spent in each feature extractor and model.
+        """
+        if self._micro_features is None:
+            self.set_wake_words(self.wake_words)
+
+        timings: Dict[str, float] = {}
+
+        def timed(name: str, func: Callable[..., Any], *args: Any) -> None:
+            start_time = time.monotonic()
+            func(*args)
+            timings[name] = timings.get(name, 0.0) + (time.monotonic() - start_time)
+
+        silence = bytes(chunk_samples * 2)
+        for _ in range(max(1, int(seconds * _SAMPLE_RATE / chunk_samples))):
+            timed("micro_features", self._process_micro_features, silence)
+            if self._has_oww:
+                timed("oww_features", self._process_oww_features, silence)
+
+            for wake_word in self.wake_words:
+                timed(wake_word.id, self._process_wake_word, wake_word)
+
+            if stop_word is not None:
+                timed(stop_word.id, self._process_stop_word, stop_word)
+
+        return timings
+
+    def _process_micro_features(self, audio_chunk: Union[bytes, memoryview]) -> None:
+        assert self._micro_features is not None
+        self._micro_inputs.clear()
+        # memoryviews work too, the library is only annotated with bytes
+        self._micro_inputs.extend(
+            self._micro_features.process_streaming(cast(bytes, audio_chunk))
+        )
+
+    def _process_oww_features(self, audio_chunk: Union[bytes, memoryview]) -> None:
+        assert self._oww_features is not None
+        self._oww_inputs.clear()
+        self._oww_inputs.extend(
+            self._oww_features.process_streaming(cast(bytes, audio_chunk))
+        )
+
+    def _process_wake_word(self, wake_word: WakeWord) -> float:
+        """Return the highest probability of the wake word."""
+        score = 0.0
+        if isinstance(wake_word, MicroWakeWord):
+            for micro_input in self._micro_inputs:
+                prob = wake_word.process_streaming_prob(micro_input)
+                if prob is not None:
+                    score = max(score, prob)
+        else:
+            for oww_input in self._oww_inputs:
+                for prob in wake_word.process_streaming(oww_input):
+                    score = max(score, prob)
+
+        return score
+
+    def _process_stop_word(self, stop_word: MicroWakeWord) -> bool:
+        # Always process to keep state correct
+        stopped = False
+        for micro_input in self._micro_inputs:
+            if stop_word.process_streaming(micro_input):
+                stopped = True
+
+        return stopped
+
+
+def _threshold(wake_word: WakeWord) -> float:
+    if isinstance(wake_word, MicroWakeWord):
+        return wake_word.probability_cutoff
+
+    return _OWW_THRESHOLD
+
+
+class WakeWordScheduler:
+    """Decides which models need to run for each chunk of audio.
+
+    Nothing runs while muted or disconnected, and the stop model only runs
+    while it's active (TTS response, announcement, or timer ringing). Models
+    that start running again are reset so they don't continue from stale
+    state.
+    """
+
+    def __init__(self) -> None:
+        self._active_wake_words: List[WakeWord] = []
+        self._running: Set[int] = set()
+
+    def select(
+        self, state: "ServerState"
+    ) -> Tuple[List[WakeWord], Optional[MicroWakeWord]]:
+        """Return the wake word models and stop model (if any) to run."""
+        if state.muted or (state.satellite is None):
+            self._running.clear()
+            return [], None
+
+        if (not self._active_wake_words) or (
+            state.wake_words_changed and state.wake_words
+        ):
+            # Update list of wake word models to process
+            state.wake_words_changed = False
+            self._active_wake_words = [
+                ww
+                for ww in state.wake_words.values()
+                if ww.id in state.active_wake_words
+            ]
+
+        wake_words = self._active_wake_words
+        stop_word: Optional[MicroWakeWord] = None
+        if state.stop_word.id in state.active_wake_words:
+            stop_word = state.stop_word
+
+        running: Set[int] = set()
+        for model in [*wake_words, stop_word]:
+            if model is None:
+                continue
+
+            if id(model) not in self._running:
+                _LOGGER.debug("Resetting model: %s", model.id)
+                reset_streaming_state(model)
+
+            running.add(id(model))
+
+        self._running = running
+
+        return wake_words, stop_word
+
+    @property
+    def is_idle(self) -> bool:
+        """True if no models ran for the last chunk."""
+        return not self._running
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""Offline wake word evaluation and throughput benchmark.
+
+Runs wake word models over a directory of WAV files (16Khz 16-bit mono)
+through the same streaming path as the satellite and prints JSON results.
+
+A WAV file may have a sidecar JSON file with the same name that labels the
+keywords spoken in it:
+
+    {"keywords": [{"wake_word": "Okay Nabu", "end": 1.52}]}
+
+where "wake_word" is a wake word phrase or model id, and "end" is the time in
+seconds when the keyword ends. Detections that don't match a labelled keyword
+are false accepts.
+
+    python3 -m linux_voice_assistant.wake_word_benchmark /path/to/audio
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .audio_buffer import pcm_bytes
+from .audio_gate import EnergyGate
+from .audio_source import SAMPLE_RATE, WavFileSource
+from .models import AvailableWakeWord
+from .wake_word import WakeWord, WakeWordDetector, find_available_wake_words
+
+_LOGGER = logging.getLogger(__name__)
+_MODULE_DIR = Path(__file__).parent
+_REPO_DIR = _MODULE_DIR.parent
+_WAKEWORDS_DIR = _REPO_DIR / "wakewords"
+
+
+@dataclass
+class LabelledAudio:
+    wav_path: Path
+    # Dicts with normalized "wake_word" and "end" in seconds
+    keywords: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ModelResult:
+    audio_seconds: float = 0.0
+    processing_seconds: float = 0.0
+    chunk_seconds: List[float] = field(default_factory=list)
+    detection_latencies: List[float] = field(default_factory=list)
+    num_keywords: int = 0
+    false_accepts: int = 0
+
+
+def _normalize(wake_word: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", wake_word.lower())
+
+
+def _percentiles_ms(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "mean": 1000 * float(np.mean(values)),
+        "p50": 1000 * float(p50),
+        "p90": 1000 * float(p90),
+        "p99": 1000 * float(p99),
+        "max": 1000 * float(np.max(values)),
+    }
+
+
+def find_labelled_audio(audio_dir: Path) -> List[LabelledAudio]:
+    """Find WAV files and their keyword labels."""
+    labelled_audio: List[LabelledAudio] = []
+    for wav_path in sorted(audio_dir.rglob("*.wav")):
+        audio = LabelledAudio(wav_path=wav_path)
+        labels_path = wav_path.with_suffix(".json")
+        if labels_path.exists():
+            with open(labels_path, "r", encoding="utf-8") as labels_file:
+                labels = json.load(labels_file)
+
+            for keyword in labels.get("keywords", []):
+                audio.keywords.append(
+                    {
+                        "wake_word": _normalize(keyword["wake_word"]),
+                        "end": float(keyword["end"]),
+                    }
+                )
+
+        labelled_audio.append(audio)
+
+    return labelled_audio
+
+
+def select_wake_word_ids(
+    available_wake_words: Dict[str, AvailableWakeWord],
+    wake_word_ids: Optional[List[str]],
+    stop_model_id: str,
+) -> List[str]:
+    """Return the requested ids, or all except the stop model."""
+    if wake_word_ids:
+        return wake_word_ids
+
+    return sorted(
+        wake_word_id
+        for wake_word_id in available_wake_words
+        if wake_word_id != stop_model_id
+    )
+
+
+def evaluate_model(
+    model_info: AvailableWakeWord,
+    labelled_audio: List[LabelledAudio],
+    *,
+    block_size: int,
+    refractory_seconds: float,
+    max_keyword_seconds: float,
+    max_delay_seconds: float,
+    energy_gate_dbfs: Optional[float] = None,
+    energy_gate_hangover_seconds: float = 2.0,
+) -> Dict[str, Any]:
+    """Evaluate a single wake word model on all audio."""
+    start_time = time.perf_counter()
+    wake_word = model_info.load()
+    load_seconds = time.perf_counter() - start_time
+
+    model_names = {_normalize(model_info.id), _normalize(model_info.wake_word)}
+    result = ModelResult()
+    chunks_processed = 0
+    chunks_skipped = 0
+
+    for audio in labelled_audio:
+        # Start from a clean state for each file
+        wake_word.reset()
+        detector = WakeWordDetector()
+        detector.set_wake_words([wake_word])
+
+        gate: Optional[EnergyGate] = None
+        if energy_gate_dbfs is not None:
+            gate = EnergyGate(
+                threshold_dbfs=energy_gate_dbfs,
+                hangover_seconds=energy_gate_hangover_seconds,
+                max_chunk_samples=block_size,
+            )
+
+        keyword_ends = [
+            keyword["end"]
+            for keyword in audio.keywords
+            if keyword["wake_word"] in model_names
+        ]
+        detected_keywords = set()
+        result.num_keywords += len(keyword_ends)
+
+        samples_processed = 0
+        last_detection: Optional[float] = None
+        with WavFileSource(audio.wav_path, realtime=False) as source:
+            while (samples := source.read(block_size)) is not None:
+                chunk_start_time = time.perf_counter()
+                activated: List[WakeWord] = []
+                gated_samples = samples if gate is None else gate.process(samples)
+                if (gate is not None) and gate.just_opened:
+                    # Same as the satellite
+                    detector.reset()
+
+                if gated_samples is not None:
+                    activated, _stopped = detector.process(pcm_bytes(gated_samples))
+
+                chunk_seconds = time.perf_counter() - chunk_start_time
+
+                result.chunk_seconds.append(chunk_seconds)
+                result.processing_seconds += chunk_seconds
+                samples_processed += len(samples)
+
+                if not activated:
+                    continue
+
+                # Detection is reported at the end of the chunk
+                detection_time = samples_processed / SAMPLE_RATE
+                if (last_detection is not None) and (
+                    (detection_time - last_detection) <= refractory_seconds
+                ):
+                    continue
+
+                last_detection = detection_time
+                matched = False
+                for keyword_idx, keyword_end in enumerate(keyword_ends):
+                    if keyword_idx in detected_keywords:
+                        continue
+
+                    if (
+                        (keyword_end - max_keyword_seconds)
+                        <= detection_time
+                        <= (keyword_end + max_delay_seconds)
+                    ):
+                        detected_keywords.add(keyword_idx)
+                        result.detection_latencies.append(
+                            max(0.0, detection_time - keyword_end)
+                        )
+                        matched = True
+                        break
+
+                if not matched:
+                    result.false_accepts += 1
+
+        result.audio_seconds += samples_processed / SAMPLE_RATE
+        if gate is not None:
+            chunks_processed += gate.chunks_processed
+            chunks_skipped += gate.chunks_skipped
+
+    audio_hours = result.audio_seconds / (60 * 60)
+    num_detected = len(result.detection_latencies)
+
+    return {
+        "id": model_info.id,
+        "type": model_info.type.value,
+        "wake_word": model_info.wake_word,
+        "load_seconds": load_seconds,
+        "audio_seconds": result.audio_seconds,
+        "processing_seconds": result.processing_seconds,
+        "real_time_factor": (
+            result.processing_seconds / result.audio_seconds
+            if result.audio_seconds > 0
+            else None
+        ),
+        "chunk_latency_ms": _percentiles_ms(result.chunk_seconds),
+        "keywords": result.num_keywords,
+        "detected": num_detected,
+        "missed": result.num_keywords - num_detected,
+        "recall": (
+            num_detected / result.num_keywords if result.num_keywords > 0 else None
+        ),
+        "detection_latency_ms": _percentiles_ms(result.detection_latencies),
+        "false_accepts": result.false_accepts,
+        "false_accepts_per_hour": (
+            result.false_accepts / audio_hours if audio_hours > 0 else None
+        ),
+        "energy_gate_skip_ratio": (
+            chunks_skipped / (chunks_processed + chunks_skipped)
+            if (chunks_processed + chunks_skipped) > 0
+            else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument(
+        "audio_dir", help="Directory with WAV files and optional JSON labels"
+    )
+    parser.add_argument(
+        "--wake-word-dir",
+        action="append",
+        help="Directory with wake word models (.tflite) and configs (.json)",
+    )
+    parser.add_argument(
+        "--wake-word",
+        action="append",
+        help="Id of wake word model to evaluate (default: all except the stop model)",
+    )
+    parser.add_argument(
+        "--stop-model",
+        default="stop",
+        help="Id of stop model, only evaluated if given with --wake-word",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=1024,
+        help="Audio block size in samples (see --audio-input-block-size)",
+    )
+    parser.add_argument("--refractory-seconds", type=float, default=2.0)
+    parser.add_argument(
+        "--max-keyword-seconds",
+        type=float,
+        default=2.0,
+        help="Earliest a detection can happen before the keyword ends",
+    )
+    parser.add_argument(
+        "--max-delay-seconds",
+        type=float,
+        default=1.5,
+        help="Latest a detection can happen after the keyword ends",
+    )
+    parser.add_argument(
+        "--energy-gate-dbfs",
+        type=float,
+        help="Skip processing while audio is quieter than this level (see satellite)",
+    )
+    parser.add_argument("--energy-gate-hangover-seconds", type=float, default=2.0)
+    parser.add_argument("--output", help="Write JSON results to a file")
+    parser.add_argument(
+        "--debug", action="store_true", help="Print DEBUG messages to console"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    wake_word_dirs = [Path(d) for d in args.wake_word_dir or []] or [
+        _WAKEWORDS_DIR,
+        _WAKEWORDS_DIR / "openWakeWord",
+    ]
+    available_wake_words = find_available_wake_words(wake_word_dirs)
+    wake_word_ids = select_wake_word_ids(
+        available_wake_words, args.wake_word, args.stop_model
+    )
+
+    labelled_audio = find_labelled_audio(Path(args.audio_dir))
+    if not labelled_audio:
+        _LOGGER.fatal("No WAV files found in %s", args.audio_dir)
+        sys.exit(1)
+
+    models: List[Dict[str, Any]] = []
+    for wake_word_id in wake_word_ids:
+        model_info = available_wake_words.get(wake_word_id)
+        if model_info is None:
+            _LOGGER.warning("Unrecognized wake word id: %s", wake_word_id)
+            continue
+
+        _LOGGER.info("Evaluating %s", wake_word_id)
+        models.append(
+            evaluate_model(
+                model_info,
+                labelled_audio,
+                block_size=args.block_size,
+                refractory_seconds=args.refractory_seconds,
+                max_keyword_seconds=args.max_keyword_seconds,
+                max_delay_seconds=args.max_delay_seconds,
+                energy_gate_dbfs=args.energy_gate_dbfs,
+                energy_gate_hangover_seconds=args.energy_gate_hangover_seconds,
+            )
+        )
+
+    results = {
+        "block_size": args.block_size,
+        "files": len(labelled_audio),
+        "models": models,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print("")
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""Wake word detection in worker processes.
+
+Audio is shared with the workers through a ring buffer in shared memory, and
+only detection events come back. This keeps inference out of the main
+interpreter, so the event loop and audio streaming stay responsive.
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from pymicro_wakeword import MicroWakeWord
+
+from .audio_buffer import pcm_bytes
+from .models import AvailableWakeWord
+from .wake_word import WakeWord, WakeWordDetector, reset_streaming_state
+
+_LOGGER = logging.getLogger(__name__)
+
+# write position, closed flag
+_HEADER_ITEMS = 2
+_HEADER_BYTES = _HEADER_ITEMS * 8
+_MAX_BATCH_BLOCKS = 8
+_WAIT_SECONDS = 0.5
+
+
+@dataclass
+class WakeWordEvent:
+    """Detection sent back from a worker."""
+
+    wake_word_id: str
+    score: Optional[float]
+    # Samples written to the ring buffer before the end of the detected chunk
+    position: int
+    # time.monotonic() in the worker when detected
+    timestamp: float
+    is_stop: bool = False
+
+
+class SharedPcmRing:
+    """Ring buffer of 16-bit PCM samples in shared memory.
+
+    There is one writer. Readers keep their own positions and can't slow the
+    writer down; a reader that falls more than the capacity behind skips
+    ahead.
+    """
+
+    def __init__(
+        self, capacity: int, name: Optional[str] = None, create: bool = True
+    ) -> None:
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=create, size=_HEADER_BYTES + (capacity * 2)
+        )
+        self._header = np.ndarray(
+            (_HEADER_ITEMS,), dtype=np.int64, buffer=self._shm.buf
+        )
+        self._samples = np.ndarray(
+            (capacity,), dtype="<i2", buffer=self._shm.buf, offset=_HEADER_BYTES
+        )
+        self._owner = create
+        if create:
+            self._header[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def write_pos(self) -> int:
+        return int(self._header[0])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[1])
+
+    def write(self, samples: np.ndarray) -> None:
+        samples = samples[-self.capacity :]
+        num_samples = len(samples)
+        write_pos = int(self._header[0])
+        start = write_pos % self.capacity
+        first = min(num_samples, self.capacity - start)
+        self._samples[start : start + first] = samples[:first]
+        if first < num_samples:
+            self._samples[: num_samples - first] = samples[first:]
+
+        # Position is only advanced after the samples are in place
+        self._header[0] = write_pos + num_samples
+
+    def read(
+        self, read_pos: int, out: np.ndarray, min_samples: int
+    ) -> Tuple[int, int, int]:
+        """Read whole multiples of min_samples from read_pos into out.
+
+        Returns the new read position, the number of samples read, and the
+        number of samples lost because the reader fell behind.
+        """
+        write_pos = self.write_pos
+        lost = 0
+        if (write_pos - read_pos) > self.capacity:
+            lost = write_pos - read_pos - self.capacity
+            read_pos += lost
+
+        available = min(write_pos - read_pos, len(out))
+        num_samples = available - (available % min_samples)
+        if num_samples <= 0:
+            return read_pos, 0, lost
+
+        start = read_pos % self.capacity
+        first = min(num_samples, self.capacity - start)
+        out[:first] = self._samples[start : start + first]
+        if first < num_samples:
+            out[first:num_samples] = self._samples[: num_samples - first]
+
+        if (self.write_pos - read_pos) > self.capacity:
+            # Overwritten while copying
+            return self.write_pos - self.capacity, 0, lost + num_samples
+
+        return read_pos + num_samples, num_samples, lost
+
+    def close(self) -> None:
+        """Tell readers that no more audio will be written."""
+        self._header[1] = 1
+
+    def release(self) -> None:
+        """Detach from (and, for the owner, free) the shared memory."""
+        # Views must be dropped before the memory can be closed
+        del self._header
+        del self._samples
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class WakeWordWorkerPool:
+    """Runs wake word models in worker processes.
+
+    Used in place of a WakeWordDetector: the models given to set_wake_words
+    are loaded again in the workers (from available_wake_words, by id) and
+    spread across them round-robin. Each worker computes its own features
+    from the shared audio.
+
+    Detections are asynchronous, so process returns the wake words that
+    workers detected since the last call. detection_delay is the number of
+    samples written after the chunk that the latest of them was detected in.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        block_size: int,
+        capacity: int,
+        available_wake_words: Dict[str, AvailableWakeWord],
+        stop_word_info: AvailableWakeWord,
+    ) -> None:
+        self.num_workers = num_workers
+        self.block_size = block_size
+        self.available_wake_words = available_wake_words
+        self.stop_word_info = stop_word_info
+        self.ring = SharedPcmRing(max(capacity, _MAX_BATCH_BLOCKS * block_size))
+
+        self.wake_words: List[WakeWord] = []
+        self._wake_words_by_id: Dict[str, WakeWord] = {}
+        self._use_stop_word = False
+        self.detection_delay = 0
+
+        # Processes are spawned, since the main process has threads
+        self._context = multiprocessing.get_context("spawn")
+        self._events: Any = self._context.Queue()
+        self._commands: List[Any] = []
+        self._data_ready: List[Any] = []
+        self._processes: List[Any] = []
+
+    def start(self) -> None:
+        for worker_idx in range(self.num_workers):
+            commands = self._context.Queue()
+            data_ready = self._context.Event()
+            process = self._context.Process(
+                target=run_worker,
+                args=(self.ring.name, self.ring.capacity, commands, self._events),
+                kwargs={
+                    "worker_idx": worker_idx,
+                    "block_size": self.block_size,
+                    "data_ready": data_ready,
+                    "log_level": logging.getLogger().getEffectiveLevel(),
+                },
+                name=f"wake_word_{worker_idx}",
+                daemon=True,
+            )
+            process.start()
+            self._commands.append(commands)
+            self._data_ready.append(data_ready)
+            self._processes.append(process)
+
+        _LOGGER.debug("Started %s wake word worker(s)", self.num_workers)
+
+    def set_wake_words(self, wake_words: List[WakeWord]) -> None:
+        """Change which models run in the workers."""
+        self.wake_words = list(wake_words)
+        self._wake_words_by_id = {}
+        for wake_word in self.wake_words:
+            if wake_word.id not in self.available_wake_words:
+                _LOGGER.warning("Can't run wake word in worker: %s", wake_word.id)
+                continue
+
+            self._wake_words_by_id[wake_word.id] = wake_word
+
+        self._send_models()
+
+    def process(
+        self,
+        audio_chunk: Union[bytes, memoryview],
+        stop_word: Optional[MicroWakeWord] = None,
+    ) -> Tuple[List[WakeWord], bool]:
+        """Send 16Khz 16-bit mono audio to the workers.
+
+        Returns the wake words that were detected since the last call and
+        whether the stop model was activated.
+        """
+        if (stop_word is not None) != self._use_stop_word:
+            self._use_stop_word = stop_word is not None
+            self._send_models()
+
+        self.write(np.frombuffer(audio_chunk, dtype="<i2"))
+
+        activated: List[WakeWord] = []
+        stopped = False
+        events = self.get_events()
+        if events:
+            self.detection_delay = max(
+                0, self.ring.write_pos - max(event.position for event in events)
+            )
+
+        for event in events:
+            _LOGGER.debug(
+                "Detected %s in worker (score=%s, delay=%.1f ms)",
+                event.wake_word_id,
+                event.score,
+                (time.monotonic() - event.timestamp) * 1000,
+            )
+            if event.is_stop:
+                stopped = stopped or self._use_stop_word
+            elif (wake_word := self._wake_words_by_id.get(event.wake_word_id)) and (
+                wake_word not in activated
+            ):
+                activated.append(wake_word)
+
+        return activated, stopped
+
+    def _send_models(self) -> None:
+        assignments: List[List[Tuple[AvailableWakeWord, bool]]] = [
+            [] for _ in range(self.num_workers)
+        ]
+        models = [
+            (self.available_wake_words[wake_word_id], False)
+            for wake_word_id in self._wake_words_by_id
+        ]
+        if self._use_stop_word:
+            models.append((self.stop_word_info, True))
+
+        for model_idx, model in enumerate(models):
+            assignments[model_idx % self.num_workers].append(model)
+
+        for commands, assigned in zip(self._commands, assignments):
+            commands.put(("set", assigned))
+
+    def reset(self, stop_word: Optional[MicroWakeWord] = None) -> None:
+        """Clear streaming state in all workers, e.g. after audio was skipped.
+
+        Workers reset their own copy of the stop model.
+        """
+        for commands in self._commands:
+            commands.put(("reset",))
+
+    def write(self, samples: np.ndarray) -> None:
+        self.ring.write(samples)
+        for data_ready in self._data_ready:
+            data_ready.set()
+
+    def get_events(self) -> List[WakeWordEvent]:
+        """Return detections received since the last call (non-blocking)."""
+        events: List[WakeWordEvent] = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+
+        return events
+
+    def close(self) -> None:
+        self.ring.close()
+        for commands, data_ready in zip(self._commands, self._data_ready):
+            commands.put(None)
+            data_ready.set()
+
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        self.ring.release()
+
+
+def run_worker(
+    ring_name: str,
+    capacity: int,
+    commands: Any,
+    events: Any,
+    *,
+    worker_idx: int,
+    block_size: int,
+    data_ready: Any,
+    log_level: int,
+) -> None:
+    """Entry point of a worker process."""
+    logging.basicConfig(level=log_level)
+    ring = SharedPcmRing(capacity, name=ring_name, create=False)
+
+    detector = WakeWordDetector()
+    loaded: Dict[str, WakeWord] = {}
+    wake_words: List[WakeWord] = []
+    stop_word: Optional[WakeWord] = None
+    stop_word_id = ""
+
+    audio_batch = np.zeros(_MAX_BATCH_BLOCKS * block_size, dtype="<i2")
+    audio_batch_bytes = pcm_bytes(audio_batch)
+    read_pos = ring.write_pos
+    samples_lost = 0
+
+    try:
+        while True:
+            # Commands are handled between chunks
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+
+                if command is None:
+                    return
+
+                if command[0] == "reset":
+                    detector.reset()
+                    for model in [*wake_words, stop_word]:
+                        if model is not None:
+                            reset_streaming_state(model)
+                elif command[0] == "set":
+                    wake_words, stop_word, stop_word_id = _set_models(
+                        worker_idx,
+                        loaded,
+                        command[1],
+                        running={id(model) for model in [*wake_words, stop_word]},
+                        stop_word_id=stop_word_id,
+                    )
+                    detector.set_wake_words(wake_words)
+
+            if not data_ready.wait(_WAIT_SECONDS):
+                if ring.closed:
+                    return
+
+                continue
+
+            data_ready.clear()
+
+            while True:
+                read_pos, num_samples, lost = ring.read(
+                    read_pos, audio_batch, block_size
+                )
+                if lost > 0:
+                    samples_lost += lost
+                    _LOGGER.warning(
+                        "Worker %s fell behind (samples lost=%s)",
+                        worker_idx,
+                        samples_lost,
+                    )
+
+                if num_samples <= 0:
+                    break
+
+                if (not wake_words) and (stop_word is None):
+                    continue
+
+                activated, stopped = detector.process(
+                    audio_batch_bytes[: num_samples * audio_batch.itemsize],
+                    stop_word,  # type: ignore[arg-type]
+                )
+                now = time.monotonic()
+                for wake_word in activated:
+                    events.put(
+                        WakeWordEvent(
+                            wake_word_id=_model_id(loaded, wake_word),
+                            score=detector.scores[detector.wake_words.index(wake_word)],
+                            position=read_pos,
+                            timestamp=now,
+                        )
+                    )
+
+                if stopped:
+                    events.put(
+                        WakeWordEvent(
+                            wake_word_id=stop_word_id,
+                            score=None,
+                            position=read_pos,
+                            timestamp=now,
+                            is_stop=True,
+                        )
+                    )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.release()
+
+
+def _set_models(
+    worker_idx: int,
+    loaded: Dict[str, WakeWord],
+    assigned: List[Tuple[AvailableWakeWord, bool]],
+    running: Set[int],
+    stop_word_id: str,
+) -> Tuple[List[WakeWord], Optional[WakeWord], str]:
+    """Load the assigned models and unload the others.
+
+    The stop model stays loaded, since it's small and switched on and off
+    whenever a response plays.
+
+    Returns the wake words, the stop model (if assigned), and its id.
+    """
+    wake_words: List[WakeWord] = []
+    stop_word: Optional[WakeWord] = None
+    for info, is_stop in assigned:
+        model = loaded.get(info.id)
+        if model is None:
+            _LOGGER.debug("Worker %s loading: %s", worker_idx, info.id)
+            model = info.load()
+            loaded[info.id] = model
+        elif id(model) not in running:
+            # Don't continue from stale state
+            reset_streaming_state(model)
+
+        if is_stop:
+            stop_word = model
+            stop_word_id = info.id
+        else:
+            wake_words.append(model)
+
+    assigned_ids = {info.id for info, _is_stop in assigned}
+    for model_id in list(loaded):
+        if (model_id not in assigned_ids) and (model_id != stop_word_id):
+            # Released once the detector lets go of it
+            _LOGGER.debug("Worker %s unloading: %s", worker_idx, model_id)
+            loaded.pop(model_id)
+
+    return wake_words, stop_word, stop_word_id
+
+
+def _model_id(loaded: Dict[str, WakeWord], model: WakeWord) -> str:
+    for model_id, loaded_model in loaded.items():
+        if loaded_model is model:
+            return model_id
+
+    return model.id
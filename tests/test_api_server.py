@@ -0,0 +1,221 @@
+import asyncio
+
+# pylint: disable=no-name-in-module
+from aioesphomeapi._frame_helper.packets import make_plain_text_packets
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    DeviceInfoResponse,
+    ListEntitiesDoneResponse,
+    PingResponse,
+    VoiceAssistantAudio,
+)
+import pytest
+
+from linux_voice_assistant import api_server
+from linux_voice_assistant.api_server import (
+    APIServer,
+    FrameDecoder,
+    FrameError,
+    ResponseCache,
+    audio_frame_header,
+    encode_messages,
+)
+
+# Empty, multi-byte length (returned as a view), and multi-byte message type
+_FRAMES = [(7, b""), (1, b"hello"), (106, bytes(range(256)) * 8), (300, b"x")]
+
+
+class FakeTransport:
+    def __init__(self) -> None:
+        self.written = []
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writelines(self, data) -> None:
+        self.written.append(b"".join(data))
+
+
+class EchoServer(APIServer):
+    def handle_message(self, msg):
+        return []
+
+
+def test_response_cache():
+    cache = ResponseCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return [DeviceInfoResponse(name="test"), ListEntitiesDoneResponse()]
+
+    frames = cache.get("key", build)
+    assert frames == encode_messages(
+        [DeviceInfoResponse(name="test"), ListEntitiesDoneResponse()]
+    )
+    assert cache.get("key", build) is frames
+    assert len(builds) == 1
+
+    # Rebuilt for a new version or after invalidation
+    cache.get("key", build, version=("a",))
+    assert len(builds) == 2
+    cache.get("key", build, version=("a",))
+    assert len(builds) == 2
+
+    cache.invalidate("key")
+    cache.get("key", build, version=("a",))
+    assert len(builds) == 3
+
+    cache.invalidate()
+    cache.get("key", build, version=("a",))
+    assert len(builds) == 4
+
+
+def test_send_encoded_frames():
+    server = EchoServer("test")
+    transport = FakeTransport()
+    server.connection_made(transport)
+
+    frames = encode_messages([DeviceInfoResponse(name="test")])
+    server.send_messages([PingResponse(), frames, ListEntitiesDoneResponse()])
+
+    assert transport.written == [
+        encode_messages(
+            [
+                PingResponse(),
+                DeviceInfoResponse(name="test"),
+                ListEntitiesDoneResponse(),
+            ]
+        )
+    ]
+
+
+def _stream(frames):
+    return b"".join(make_plain_text_packets(frames))
+
+
+def _decode_chunks(decoder, data, chunk_size):
+    frames = []
+    for start in range(0, len(data), chunk_size):
+        frames.extend(decoder.feed(data[start : start + chunk_size]))
+
+    return [(msg_type, bytes(packet_data)) for msg_type, packet_data in frames]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 100, 10_000])
+def test_decode_fragmented(chunk_size):
+    decoder = FrameDecoder()
+    data = _stream(_FRAMES) * 3
+    assert _decode_chunks(decoder, data, chunk_size) == _FRAMES * 3
+    assert decoder.buffered_bytes == 0
+
+
+def test_decode_corrupt():
+    decoder = FrameDecoder(max_frame_size=100)
+
+    # Buffered data is dropped with the corrupt data
+    data = _stream([(1, b"hello")])
+    decoder.feed(data[:4])
+    with pytest.raises(FrameError):
+        decoder.feed(data[4:] + b"\x01\x00\x00")
+
+    assert decoder.buffered_bytes == 0
+    assert _decode_chunks(decoder, _stream([(1, b"hello")]), 2) == [(1, b"hello")]
+
+    with pytest.raises(FrameError):
+        decoder.feed(_stream([(1, bytes(101))]))
+
+    with pytest.raises(FrameError):
+        decoder.feed(b"\x00" + b"\xff" * 5)
+
+
+def test_close_on_corrupt_data():
+    server = EchoServer("test")
+    transport = FakeTransport()
+    server.connection_made(transport)
+
+    server.data_received(b"\x01\x00\x00")
+    assert transport.closed
+
+
+def test_send_from_threads_in_order():
+    async def send():
+        server = EchoServer("test")
+        transport = FakeTransport()
+        server.connection_made(transport)
+
+        # Queued until the event loop runs again
+        server.send_messages([PingResponse()])
+        server.send_messages([ListEntitiesDoneResponse()])
+        assert transport.written == []
+
+        await asyncio.sleep(0)
+        assert transport.written == [
+            encode_messages([PingResponse(), ListEntitiesDoneResponse()])
+        ]
+
+        # From another thread
+        transport.written.clear()
+        msgs = [DeviceInfoResponse(name=str(i)) for i in range(100)]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, lambda: [server.send_messages([msg]) for msg in msgs]
+        )
+        await asyncio.sleep(0)
+
+        assert b"".join(transport.written) == encode_messages(msgs)
+        assert server.sent_messages == 102
+        assert server.send_queue_depth == 0
+
+    asyncio.run(send())
+
+
+def test_audio_backpressure(monkeypatch):
+    server = EchoServer("test")
+    server.max_audio_queue_bytes = 3000
+    transport = FakeTransport()
+    server.connection_made(transport)
+
+    # Only the newest audio is kept while paused
+    server.pause_writing()
+    frames = [bytes([i]) * 1000 for i in range(5)]
+    server.send_audio(frames)
+    assert transport.written == []
+    assert server.dropped_audio_frames == 2
+
+    # Control messages are still sent
+    server.send_messages([PingResponse()])
+    assert transport.written == [encode_messages([PingResponse()])]
+
+    now = api_server.time.monotonic()
+    monkeypatch.setattr(api_server.time, "monotonic", lambda: now + 1)
+    server.resume_writing()
+    assert transport.written[1] == encode_messages(
+        [VoiceAssistantAudio(data=frame) for frame in frames[2:]]
+    )
+    assert server.late_audio_frames == 3
+
+
+def test_control_ahead_of_audio():
+    async def send():
+        server = EchoServer("test")
+        transport = FakeTransport()
+        server.connection_made(transport)
+
+        server.send_audio([b"audio"])
+        server.send_messages([PingResponse()])
+        await asyncio.sleep(0)
+
+        assert transport.written == [
+            encode_messages([PingResponse(), VoiceAssistantAudio(data=b"audio")])
+        ]
+
+    asyncio.run(send())
+
+
+@pytest.mark.parametrize("audio_len", [0, 1, 117, 118, 127, 128, 2048, 16383, 20000])
+def test_audio_frame_header(audio_len):
+    audio = bytes(i % 256 for i in range(audio_len))
+    assert audio_frame_header(audio_len) + audio == encode_messages(
+        [VoiceAssistantAudio(data=audio)]
+    )
@@ -0,0 +1,177 @@
+import threading
+
+import numpy as np
+import pytest
+
+from linux_voice_assistant.audio_buffer import (
+    AudioFramer,
+    PcmFrontEnd,
+    PcmRingBuffer,
+    PreRollBuffer,
+    pcm_bytes,
+)
+
+
+def test_frontend_matches_legacy_conversion():
+    frontend = PcmFrontEnd(1024)
+    audio = np.random.default_rng(0).uniform(-1.5, 1.5, size=(1024, 1))
+    audio = audio.astype(np.float32)
+
+    expected = (np.clip(audio.reshape(-1), -1.0, 1.0) * 32767.0).astype("<i2")
+    samples = frontend.convert(audio)
+
+    assert samples.dtype == np.dtype("<i2")
+    assert bytes(pcm_bytes(samples)) == expected.tobytes()
+
+    # Buffers are reused
+    assert np.shares_memory(frontend.convert(audio[:512]), samples)
+
+
+def test_write_read_wraps_around():
+    buffer = PcmRingBuffer(8)
+    out = np.zeros(8, dtype="<i2")
+
+    assert buffer.write(np.arange(6, dtype="<i2")) == 6
+    assert buffer.read_into(out, 2) == 6
+    assert list(out[:6]) == [0, 1, 2, 3, 4, 5]
+
+    # Crosses the end of the buffer
+    assert buffer.write(np.arange(10, 16, dtype="<i2")) == 6
+    assert buffer.depth == 6
+    assert buffer.read_into(out, 3) == 6
+    assert list(out[:6]) == [10, 11, 12, 13, 14, 15]
+    assert buffer.depth == 0
+
+
+def test_read_whole_blocks_only():
+    buffer = PcmRingBuffer(16)
+    out = np.zeros(16, dtype="<i2")
+
+    buffer.write(np.arange(7, dtype="<i2"))
+    assert buffer.read_into(out, 3) == 6
+    assert buffer.depth == 1
+
+
+def test_read_pads_last_block_after_close():
+    buffer = PcmRingBuffer(16)
+    out = np.ones(16, dtype="<i2")
+
+    buffer.write(np.arange(1, 8, dtype="<i2"))
+    buffer.close()
+    assert buffer.read_into(out, 3) == 6
+    assert buffer.read_into(out, 3) == 3
+    assert list(out[:3]) == [7, 0, 0]
+    assert buffer.read_into(out, 3) == 0
+
+
+def test_overrun_drops_new_samples():
+    buffer = PcmRingBuffer(4)
+    out = np.zeros(4, dtype="<i2")
+
+    assert buffer.write(np.arange(6, dtype="<i2")) == 4
+    assert buffer.overruns == 1
+    assert buffer.dropped_samples == 2
+    assert buffer.max_depth == 4
+
+    assert buffer.read_into(out, 4) == 4
+    assert list(out) == [0, 1, 2, 3]
+
+
+def test_underrun_and_close():
+    buffer = PcmRingBuffer(4)
+    out = np.zeros(4, dtype="<i2")
+
+    assert buffer.read_into(out, 2, timeout=0.01) == 0
+    assert buffer.underruns == 1
+
+    threading.Timer(0.05, buffer.close).start()
+    assert buffer.read_into(out, 2, timeout=5) == 0
+    assert buffer.closed
+
+
+def test_wait_for_space():
+    buffer = PcmRingBuffer(4)
+    out = np.zeros(4, dtype="<i2")
+
+    buffer.write(np.arange(4, dtype="<i2"))
+    threading.Timer(0.05, lambda: buffer.read_into(out, 2)).start()
+    assert buffer.wait_for_space(2)
+    assert buffer.write(np.arange(4, dtype="<i2")) == 4
+    assert buffer.overruns == 0
+
+    threading.Timer(0.05, buffer.close).start()
+    assert not buffer.wait_for_space(2)
+
+
+def test_preroll_keeps_latest_audio():
+    preroll = PreRollBuffer(6)
+    assert preroll.drain() == b""
+
+    preroll.write(b"abcd")
+    preroll.write(memoryview(b"efgh"))
+    assert len(preroll) == 6
+    assert preroll.drain() == b"cdefgh"
+    assert len(preroll) == 0
+
+    preroll.write(b"0123456789")
+    assert preroll.drain() == b"456789"
+
+    preroll.write(b"xy")
+    assert preroll.drain() == b"xy"
+
+
+def test_preroll_since_mark():
+    preroll = PreRollBuffer(6)
+    preroll.write(b"abcd")
+    mark = preroll.bytes_written
+
+    preroll.write(b"ef")
+    assert preroll.drain(since=mark) == b"ef"
+
+    # Older audio was overwritten
+    preroll.write(b"0123456789")
+    assert preroll.drain(since=mark) == b"456789"
+    assert preroll.drain(since=preroll.bytes_written) == b""
+
+
+def test_preroll_disabled():
+    preroll = PreRollBuffer(0)
+    preroll.write(b"abcd")
+    assert preroll.drain() == b""
+
+
+def test_framer_coalesces():
+    framer = AudioFramer(frame_bytes=1000, max_delay_seconds=1.0)
+    assert framer.add(b"a" * 600, now=0.0) == []
+    assert framer.add(b"b" * 600, now=0.1) == [b"a" * 600 + b"b" * 400]
+    assert framer.add(b"c" * 2000, now=0.2) == [
+        b"b" * 200 + b"c" * 800,
+        b"c" * 1000,
+    ]
+    assert framer.flush() == b"c" * 200
+
+    assert framer.frames == 3
+    assert framer.bytes == 3000
+    assert framer.frames_per_second == pytest.approx(3 / 0.2)
+
+
+def test_framer_max_delay():
+    framer = AudioFramer(frame_bytes=1000, max_delay_seconds=0.1)
+    assert framer.add(b"a" * 100, now=0.0) == []
+    assert framer.add(b"b" * 100, now=0.05) == []
+    assert framer.add(b"c" * 100, now=0.1) == [b"a" * 100 + b"b" * 100 + b"c" * 100]
+    assert framer.add(b"d" * 100, now=0.15) == []
+
+
+def test_framer_passthrough():
+    framer = AudioFramer(frame_bytes=0, max_delay_seconds=0.1)
+    chunk = np.arange(10, dtype="<i2")
+    frames = framer.add(pcm_bytes(chunk), now=0.0)
+    chunk[:] = 0
+
+    assert frames == [np.arange(10, dtype="<i2").tobytes()]
+
+    # Gaps between streams aren't counted
+    framer.add(b"x", now=0.5)
+    framer.add(b"x", now=10.0)
+    assert framer.active_seconds == pytest.approx(0.5)
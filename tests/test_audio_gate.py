@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+
+from linux_voice_assistant.__main__ import gate_audio
+from linux_voice_assistant.audio_buffer import pcm_bytes
+from linux_voice_assistant.audio_gate import EnergyGate
+from linux_voice_assistant.wake_word import WakeWordDetector, find_available_wake_words
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def _chunk(value, size=1600):
+    return np.full(size, value, dtype="<i2")
+
+
+def test_gate_skips_silence():
+    gate = EnergyGate(threshold_dbfs=-40, hangover_seconds=0.2, max_chunk_samples=1600)
+
+    assert gate.process(_chunk(0)) is None
+    assert gate.process(_chunk(10)) is None
+    assert not gate.is_open
+    assert gate.chunks_skipped == 2
+    assert gate.skip_ratio == 1.0
+
+
+def test_gate_lookback_and_hangover():
+    gate = EnergyGate(
+        threshold_dbfs=-40,
+        hangover_seconds=0.2,
+        max_chunk_samples=1600,
+        lookback_seconds=0.15,
+    )
+
+    assert gate.process(_chunk(1)) is None
+    assert gate.process(_chunk(2)) is None
+
+    # Opens with the last 0.15 seconds in front
+    samples = gate.process(_chunk(10000))
+    assert samples is not None
+    assert gate.just_opened
+    assert len(samples) == 2400 + 1600
+    assert list(samples[:800]) == [1] * 800
+    assert list(samples[800:2400]) == [2] * 1600
+    assert list(samples[2400:]) == [10000] * 1600
+
+    # Hangover (0.2 seconds = 2 chunks)
+    assert len(gate.process(_chunk(0))) == 1600
+    assert not gate.just_opened
+    assert len(gate.process(_chunk(0))) == 1600
+    assert gate.process(_chunk(0)) is None
+
+    assert gate.chunks_processed == 3
+    assert gate.chunks_skipped == 3
+    assert gate.skip_ratio == 0.5
+
+
+def test_detection_after_gated_silence():
+    """Detection when the gate opens matches a fresh detector on the same audio."""
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR / "openWakeWord"])
+    rng = np.random.default_rng(0)
+
+    def noise(size=1600):
+        return rng.integers(-8000, 8000, size=size, dtype="<i2")
+
+    gate = EnergyGate(threshold_dbfs=-40, hangover_seconds=0, max_chunk_samples=1600)
+    detector = WakeWordDetector()
+    detector.set_wake_words([available_wake_words["ok_nabu_v0.1"].load()])
+
+    # Open, then closed during silence
+    for _ in range(20):
+        samples = gate_audio(gate, detector, noise())
+        assert samples is not None
+        detector.process(pcm_bytes(samples))
+
+    for _ in range(5):
+        assert gate_audio(gate, detector, _chunk(1)) is None
+
+    samples = gate_audio(gate, detector, noise())
+    assert gate.just_opened
+    assert samples is not None
+    samples = samples.copy()
+    detector.process(pcm_bytes(samples))
+
+    fresh_detector = WakeWordDetector()
+    fresh_detector.set_wake_words([available_wake_words["ok_nabu_v0.1"].load()])
+    fresh_detector.process(pcm_bytes(samples))
+
+    assert detector.scores == fresh_detector.scores
@@ -0,0 +1,114 @@
+import os
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from linux_voice_assistant.audio_source import (
+    RawPcmSource,
+    WavFileSource,
+    open_audio_file,
+)
+
+
+def _write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setframerate(rate)
+        wav_file.setsampwidth(2)
+        wav_file.setnchannels(channels)
+        wav_file.writeframes(samples.astype("<i2").tobytes())
+
+
+def _read_all(source, block_size):
+    blocks = []
+    with source:
+        while (block := source.read(block_size)) is not None:
+            blocks.append(block.copy())
+
+    return blocks
+
+
+def test_wav_file_blocks(tmp_path):
+    samples = np.arange(2500, dtype="<i2")
+    wav_path = tmp_path / "test.wav"
+    _write_wav(wav_path, samples)
+
+    source = open_audio_file(wav_path, realtime=False)
+    assert isinstance(source, WavFileSource)
+
+    blocks = _read_all(source, 1024)
+    assert [len(block) for block in blocks] == [1024, 1024, 452]
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+def test_wav_file_wrong_format(tmp_path):
+    wav_path = tmp_path / "test.wav"
+    _write_wav(wav_path, np.zeros(100), rate=48000)
+
+    with pytest.raises(ValueError):
+        with WavFileSource(wav_path):
+            pass
+
+
+def test_raw_file_blocks(tmp_path):
+    samples = np.arange(2500, dtype="<i2")
+    raw_path = tmp_path / "test.raw"
+    # Trailing odd byte is dropped
+    raw_path.write_bytes(samples.tobytes() + b"\x01")
+
+    source = open_audio_file(raw_path, realtime=False)
+    assert isinstance(source, RawPcmSource)
+
+    blocks = _read_all(source, 1000)
+    assert [len(block) for block in blocks] == [1000, 1000, 500]
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+@pytest.mark.parametrize("suffix", [".wav", ".raw"])
+def test_reopen_continues(tmp_path, suffix):
+    samples = np.arange(2500, dtype="<i2")
+    path = tmp_path / f"test{suffix}"
+    if suffix == ".wav":
+        _write_wav(path, samples)
+    else:
+        path.write_bytes(samples.tobytes())
+
+    # Closed while muted
+    source = open_audio_file(path, realtime=False)
+    with source:
+        first_block = source.read(1000).copy()
+
+    blocks = [first_block] + _read_all(source, 1000)
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+def test_named_pipe(tmp_path):
+    samples = np.arange(3000, dtype="<i2")
+    fifo_path = tmp_path / "audio.fifo"
+    os.mkfifo(fifo_path)
+
+    source = open_audio_file(fifo_path, realtime=False)
+    assert isinstance(source, RawPcmSource)
+
+    pid = os.fork()
+    if pid == 0:
+        with open(fifo_path, "wb") as fifo:
+            for i in range(0, len(samples), 700):
+                fifo.write(samples[i : i + 700].tobytes())
+                fifo.flush()
+        os._exit(0)
+
+    blocks = _read_all(source, 1024)
+    os.waitpid(pid, 0)
+
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+def test_realtime_pacing(tmp_path):
+    raw_path = tmp_path / "test.raw"
+    raw_path.write_bytes(np.zeros(1600 * 3, dtype="<i2").tobytes())
+
+    start = time.monotonic()
+    _read_all(RawPcmSource(raw_path, realtime=True), 1600)
+    assert (time.monotonic() - start) >= 0.25
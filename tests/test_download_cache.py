@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from linux_voice_assistant.download_cache import DownloadCache
+
+
+class FileServer(ThreadingHTTPServer):
+    """Serves files from a dict, with Range support."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FileHandler)
+        self.files = {}
+        self.requests = []
+        # Bytes to send before closing the connection (None = all)
+        self.truncate_at = None
+        # Bytes to send before stalling (None = all)
+        self.stall_at = None
+        self.stalled = threading.Event()
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        server = self.server
+        data = server.files.get(self.path.lstrip("/"))
+        if data is None:
+            self.send_error(404)
+            return
+
+        range_header = self.headers.get("Range")
+        server.requests.append((self.path, range_header))
+
+        start = 0
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}"
+            )
+        else:
+            self.send_response(200)
+
+        body = data[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if server.truncate_at is not None:
+            body = body[: server.truncate_at]
+            self.close_connection = True
+
+        if server.stall_at is not None:
+            self.wfile.write(body[: server.stall_at])
+            self.wfile.flush()
+            server.stalled.wait(5)
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    file_server = FileServer()
+    thread = threading.Thread(target=file_server.serve_forever, daemon=True)
+    thread.start()
+    yield file_server
+    file_server.shutdown()
+    file_server.server_close()
+
+
+def _add_file(server, name, size):
+    data = name.encode() + bytes(i % 251 for i in range(size - len(name)))
+    server.files[name] = data
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def test_download_and_reuse(server, tmp_path):
+    data, sha256 = _add_file(server, "a.tflite", 200_000)
+
+    cache = DownloadCache(tmp_path, suffix=".tflite")
+    path = cache.fetch("a", server.url("a.tflite"), len(data), sha256)
+    assert path == tmp_path / f"{sha256}.tflite"
+    assert path.read_bytes() == data
+
+    # Index is reused, so the file isn't downloaded again
+    cache = DownloadCache(tmp_path, suffix=".tflite")
+    assert cache.fetch("a", server.url("a.tflite"), len(data), sha256) == path
+    assert len(server.requests) == 1
+
+    # Wrong hash
+    assert cache.fetch("b", server.url("a.tflite"), len(data), "0" * 64) is None
+    assert not (tmp_path / f"{'0' * 64}.tflite.part").exists()
+
+
+def test_resume(server, tmp_path):
+    data, sha256 = _add_file(server, "a.tflite", 200_000)
+    cache = DownloadCache(tmp_path)
+
+    server.truncate_at = 50_000
+    assert cache.fetch("a", server.url("a.tflite"), len(data), sha256) is None
+    assert (tmp_path / f"{sha256}.part").stat().st_size == 50_000
+
+    server.truncate_at = None
+    path = cache.fetch("a", server.url("a.tflite"), len(data), sha256)
+    assert path is not None
+    assert path.read_bytes() == data
+    assert server.requests[-1][1] == "bytes=50000-"
+
+
+def test_resume_after_timeout(server, tmp_path):
+    data, sha256 = _add_file(server, "a.tflite", 200_000)
+    cache = DownloadCache(tmp_path, timeout=0.2)
+
+    server.stall_at = 50_000
+    start_time = time.monotonic()
+    assert cache.fetch("a", server.url("a.tflite"), len(data), sha256) is None
+    assert time.monotonic() - start_time < 2
+    assert (tmp_path / f"{sha256}.part").stat().st_size == 50_000
+    server.stalled.set()
+
+    server.stall_at = None
+    path = cache.fetch("a", server.url("a.tflite"), len(data), sha256)
+    assert path is not None
+    assert path.read_bytes() == data
+    assert server.requests[-1][1] == "bytes=50000-"
+
+
+def test_evict_least_recently_used(server, tmp_path):
+    files = {name: _add_file(server, name, 1000) for name in ("a", "b", "c")}
+    cache = DownloadCache(tmp_path, max_bytes=2500)
+
+    for name in ("a", "b", "a", "c"):
+        data, sha256 = files[name]
+        assert cache.fetch(name, server.url(name), len(data), sha256) is not None
+
+    # b was used least recently
+    assert not cache.path(files["b"][1]).exists()
+    assert cache.path(files["a"][1]).exists()
+    assert cache.path(files["c"][1]).exists()
+    assert cache.total_bytes == 2000
+
+    # Kept even though it's the least recently used
+    data, sha256 = files["b"]
+    cache.fetch("b", server.url("b"), len(data), sha256, keep=["a"])
+    assert cache.path(files["a"][1]).exists()
+    assert not cache.path(files["c"][1]).exists()
@@ -0,0 +1,68 @@
+# pylint: disable=no-name-in-module
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    ListEntitiesRequest,
+    MediaPlayerCommandRequest,
+    SubscribeHomeAssistantStatesRequest,
+    SwitchCommandRequest,
+    SwitchStateResponse,
+)
+
+from linux_voice_assistant.api_server import PROTO_TO_MESSAGE_TYPE
+from linux_voice_assistant.entity import (
+    EntityRegistry,
+    MuteSwitchEntity,
+    ThinkingSoundEntity,
+)
+
+
+def _switches():
+    muted = []
+    thinking_sound = []
+    mute_switch = MuteSwitchEntity(
+        server=None,
+        key=1,
+        name="Mute",
+        object_id="mute",
+        get_muted=lambda: bool(muted and muted[-1]),
+        set_muted=muted.append,
+    )
+    thinking_sound_switch = ThinkingSoundEntity(
+        server=None,
+        key=2,
+        name="Thinking Sound",
+        object_id="thinking_sound",
+        get_thinking_sound_enabled=lambda: False,
+        set_thinking_sound_enabled=thinking_sound.append,
+    )
+    return mute_switch, thinking_sound_switch, muted, thinking_sound
+
+
+def test_command_goes_to_entity_with_key():
+    mute_switch, thinking_sound_switch, muted, thinking_sound = _switches()
+    registry = EntityRegistry([mute_switch, thinking_sound_switch])
+
+    switch_type = PROTO_TO_MESSAGE_TYPE[SwitchCommandRequest]
+    assert registry.command_types == {switch_type}
+    assert registry.get(switch_type, 2) is thinking_sound_switch
+    assert registry.get(PROTO_TO_MESSAGE_TYPE[MediaPlayerCommandRequest], 1) is None
+
+    responses = list(registry.handle_command(SwitchCommandRequest(key=2, state=True)))
+    assert responses == [SwitchStateResponse(key=2, state=True)]
+    assert thinking_sound == [True]
+    assert muted == []
+
+    # Unknown key
+    assert list(registry.handle_command(SwitchCommandRequest(key=5))) == []
+
+
+def test_handle_all():
+    mute_switch, thinking_sound_switch, muted, _thinking_sound = _switches()
+    registry = EntityRegistry([mute_switch])
+    assert len(registry.handle_all(ListEntitiesRequest())) == 1
+
+    registry.update([mute_switch, thinking_sound_switch])
+    muted.append(True)
+    assert registry.handle_all(SubscribeHomeAssistantStatesRequest()) == [
+        SwitchStateResponse(key=1, state=True),
+        SwitchStateResponse(key=2, state=False),
+    ]
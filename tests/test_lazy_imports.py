@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+# Only needed once the voice assistant actually starts
+_HEAVY_MODULES = [
+    "aioesphomeapi",
+    "getmac",
+    "mpv",
+    "numpy",
+    "pymicro_wakeword",
+    "pyopen_wakeword",
+    "soundcard",
+    "zeroconf",
+]
+
+
+def test_entry_point_imports_are_lazy():
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys, linux_voice_assistant.__main__; "
+            "print('\\n'.join(sys.modules))",
+        ],
+        text=True,
+    )
+    imported = set(output.splitlines())
+    assert [module for module in _HEAVY_MODULES if module in imported] == []
+
+
+def test_open_wake_word_is_lazy():
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys; "
+            "import linux_voice_assistant.wake_word; "
+            "import linux_voice_assistant.model_cache; "
+            "import linux_voice_assistant.multichannel; "
+            "import linux_voice_assistant.wake_word_worker; "
+            "print('pyopen_wakeword' in sys.modules)",
+        ],
+        text=True,
+    )
+    assert output.strip() == "False"
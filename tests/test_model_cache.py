@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from linux_voice_assistant.model_cache import WakeWordModelCache
+from linux_voice_assistant.wake_word import find_available_wake_words
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_unload_least_recently_active():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    cache = WakeWordModelCache(max_bytes=1)
+
+    wake_words = {}
+    for wake_word_id in ("okay_nabu", "hey_jarvis", "alexa"):
+        wake_words[wake_word_id] = cache.load(available_wake_words[wake_word_id])
+        wake_words = cache.evict(wake_words, [wake_word_id])
+
+        # Tensor arena size is a lower bound
+        memory = cache.memory[wake_word_id]
+        assert memory.size >= memory.tensor_arena_size > 0
+
+    # Active model is kept even if it doesn't fit
+    assert list(wake_words) == ["alexa"]
+    assert [memory.wake_word_id for memory in cache.report()] == ["alexa"]
+
+    # Nothing is unloaded without a limit
+    cache.max_bytes = None
+    wake_words["okay_nabu"] = cache.load(available_wake_words["okay_nabu"])
+    assert cache.evict(wake_words, ["okay_nabu"]) == wake_words
+
+
+def test_concurrent_loads_are_measured_separately():
+    available_wake_words = find_available_wake_words(
+        [_WAKEWORDS_DIR, _WAKEWORDS_DIR / "openWakeWord"]
+    )
+    wake_word_ids = ["okay_nabu", "hey_jarvis", "alexa_v0.1"]
+    cache = WakeWordModelCache()
+
+    with ThreadPoolExecutor() as executor:
+        list(
+            executor.map(
+                cache.load,
+                [available_wake_words[wake_word_id] for wake_word_id in wake_word_ids],
+            )
+        )
+
+    okay_nabu = cache.memory["okay_nabu"]
+    assert okay_nabu.file_size == (_WAKEWORDS_DIR / "okay_nabu.tflite").stat().st_size
+    assert okay_nabu.size == okay_nabu.file_size + okay_nabu.tensor_arena_size
+
+    alexa = cache.memory["alexa_v0.1"]
+    assert alexa.tensor_arena_size is None
+    assert (
+        alexa.size
+        == (_WAKEWORDS_DIR / "openWakeWord" / "alexa_v0.1.tflite").stat().st_size
+    )
+
+
+def test_concurrent_loads_of_same_model_are_shared():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    cache = WakeWordModelCache()
+
+    with ThreadPoolExecutor() as executor:
+        models = list(executor.map(cache.load, [available_wake_words["okay_nabu"]] * 4))
+
+    assert all(model is models[0] for model in models)
+    assert cache.load(available_wake_words["okay_nabu"]) is models[0]
+
+    # Unloaded models are loaded again
+    cache.unload("okay_nabu")
+    assert cache.load(available_wake_words["okay_nabu"]) is not models[0]
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import numpy as np
+
+from linux_voice_assistant.audio_buffer import PcmRingBuffer
+from linux_voice_assistant.multichannel import ChannelMixer, MultiChannelDetector
+from linux_voice_assistant.wake_word import find_available_wake_words
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_ring_buffer_channels():
+    buffer = PcmRingBuffer(4, channels=2)
+    frames = np.arange(12, dtype="<i2")
+
+    # Only whole frames are stored
+    assert buffer.write(frames) == 4
+    assert buffer.dropped_samples == 4
+
+    out = np.zeros(8, dtype="<i2")
+    assert buffer.read_into(out, 2) == 4
+    assert np.array_equal(out, frames[:8])
+
+
+def test_split_channels():
+    mixer = ChannelMixer(3, max_frames=10)
+    left = np.arange(10, dtype="<i2")
+    interleaved = np.stack([left, -left, left * 2], axis=1).reshape(-1)
+
+    channel_chunks = mixer.split(interleaved)
+    assert [np.frombuffer(chunk, dtype="<i2").tolist() for chunk in channel_chunks] == [
+        left.tolist(),
+        (-left).tolist(),
+        (left * 2).tolist(),
+    ]
+
+    mixer.select(2)
+    assert np.array_equal(mixer.stream(), left * 2)
+
+
+def test_beam_aligns_channels():
+    rng = np.random.default_rng(0)
+    signal = rng.normal(0, 3000, size=4000).astype("<i2")
+
+    # Channel 1 hears the signal 3 samples after channel 0
+    delayed = np.concatenate([np.zeros(3, dtype="<i2"), signal[:-3]])
+    interleaved = np.stack([signal, delayed], axis=1).reshape(-1)
+
+    mixer = ChannelMixer(2, max_frames=1000, beamform=True)
+    for i in range(0, 2000, 1000):
+        mixer.split(interleaved[2 * i : 2 * (i + 1000)])
+
+    mixer.select(0)
+    assert mixer.delays.tolist() == [0, 3]
+
+    # Aligned channels sum to the original signal, lagging by max delay
+    mixer.split(interleaved[4000:6000])
+    beam = mixer.stream().astype(np.int32)
+    expected = signal[2000 - 8 : 3000 - 8].astype(np.int32)
+    assert np.max(np.abs(beam - expected)) <= 1
+
+
+def test_detector_channels():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    okay_nabu = available_wake_words["okay_nabu"].load()
+
+    detector = MultiChannelDetector(2)
+    detector.set_wake_words([okay_nabu])
+
+    # Channel 1 has its own copy of the model
+    assert detector.detectors[0].wake_words == [okay_nabu]
+    assert detector.detectors[1].wake_words[0] is not okay_nabu
+
+    mixer = ChannelMixer(2, max_frames=1024)
+    activated, stopped = detector.process(
+        mixer.split(np.zeros(2048, dtype="<i2")), None
+    )
+    assert activated == []
+    assert not stopped
+    assert detector.scores.shape == (2, 1)
+    assert detector.best_channel(okay_nabu) in (0, 1)
+
+
+def test_detector_warm_up():
+    available_wake_words = find_available_wake_words(
+        [_WAKEWORDS_DIR, _WAKEWORDS_DIR / "openWakeWord"]
+    )
+    okay_nabu = available_wake_words["okay_nabu"].load()
+    ok_nabu = available_wake_words["ok_nabu_v0.1"].load()
+    stop = available_wake_words["stop"].load()
+
+    detector = MultiChannelDetector(2)
+    detector.set_wake_words([okay_nabu, ok_nabu])
+    timings = detector.warm_up(stop)
+    assert set(timings) == {
+        "micro_features",
+        "oww_features",
+        "okay_nabu",
+        "ok_nabu_v0.1",
+        "stop",
+    }
+
+    # Features are already filled, so processing continues from silence
+    mixer = ChannelMixer(2, max_frames=1024)
+    activated, stopped = detector.process(
+        mixer.split(np.zeros(2048, dtype="<i2")), stop
+    )
+    assert activated == []
+    assert not stopped
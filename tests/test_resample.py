@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+from linux_voice_assistant.audio_source import SoundcardSource
+from linux_voice_assistant.resample import PolyphaseResampler
+
+
+def _tone(rate, frequency, seconds, channels=1):
+    t = np.arange(int(rate * seconds)) / rate
+    tone = (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.repeat(tone[:, None], channels, axis=1)
+
+
+@pytest.mark.parametrize("rate", [48000, 44100, 22050])
+def test_blocks_match_whole(rate):
+    audio = _tone(rate, 1000, 0.5)
+
+    whole = PolyphaseResampler(rate, 16000).process(audio)
+    assert len(whole) == 8000
+
+    resampler = PolyphaseResampler(rate, 16000)
+    blocks = [resampler.process(audio[i : i + 777]) for i in range(0, len(audio), 777)]
+    assert np.allclose(np.concatenate(blocks), whole, atol=1e-5)
+
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_tone_and_alias(rate):
+    resampler = PolyphaseResampler(rate, 16000, channels=2)
+    output = resampler.process(_tone(rate, 1000, 0.5, channels=2))
+
+    # Pass band is delayed by the filter latency
+    t = (np.arange(len(output)) / 16000) - (resampler.latency_samples / rate)
+    expected = 0.5 * np.sin(2 * np.pi * 1000 * t)
+    assert np.max(np.abs(output[200:, 0] - expected[200:])) < 1e-3
+    assert np.array_equal(output[:, 0], output[:, 1])
+
+    # Above the 8Khz Nyquist frequency would alias
+    aliased = PolyphaseResampler(rate, 16000).process(_tone(rate, 10000, 0.5))
+    assert np.max(np.abs(aliased[200:])) < 1e-3
+
+
+class FakeRecorder:
+    def __init__(self, rate):
+        self.rate = rate
+        self.num_frames = 0
+
+    def record(self, num_frames):
+        self.num_frames += num_frames
+        return np.zeros((num_frames, 1), dtype=np.float32)
+
+
+class FakeMic:
+    name = "fake"
+
+    def __init__(self):
+        self.recorder_rate = None
+
+    @contextmanager
+    def recorder(self, samplerate, channels, blocksize):
+        self.recorder_rate = samplerate
+        yield FakeRecorder(samplerate)
+
+
+def test_soundcard_capture_rate():
+    mic = FakeMic()
+    num_samples = 0
+    with SoundcardSource(mic, 1024, capture_rate=44100) as source:
+        for _ in range(100):
+            num_samples += len(source.read(1024))
+
+    assert mic.recorder_rate == 44100
+    # About one block at 16Khz per read
+    assert abs(num_samples - (100 * 1024)) <= 100
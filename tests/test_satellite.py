@@ -0,0 +1,251 @@
+import asyncio
+import threading
+from pathlib import Path
+from queue import Queue
+from types import SimpleNamespace
+
+from aioesphomeapi.api_pb2 import (  # type: ignore[attr-defined]
+    VoiceAssistantSetConfiguration,
+)
+from aioesphomeapi.model import VoiceAssistantEventType
+
+from linux_voice_assistant.api_server import encode_messages
+from linux_voice_assistant.models import (
+    AvailableWakeWord,
+    Preferences,
+    ServerState,
+    WakeWordType,
+)
+from linux_voice_assistant.satellite import VoiceSatelliteProtocol
+
+
+class FakePlayer:
+    is_playing = False
+
+    def play(self, *args, **kwargs) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def duck(self) -> None:
+        pass
+
+    def unduck(self) -> None:
+        pass
+
+
+class FakeModelCache:
+    def __init__(self) -> None:
+        self.unloaded = []
+
+    def evict(self, wake_words, active_wake_words):
+        return wake_words
+
+    def unload(self, wake_word_id) -> None:
+        self.unloaded.append(wake_word_id)
+
+    def log_report(self) -> None:
+        pass
+
+
+class FakeTransport:
+    def close(self) -> None:
+        pass
+
+    def writelines(self, data) -> None:
+        pass
+
+
+def _satellite(tmp_path: Path, **kwargs) -> VoiceSatelliteProtocol:
+    kwargs.setdefault("model_cache", None)
+    state = ServerState(
+        name="test",
+        mac_address="00:00:00:00:00:00",
+        ip_address="127.0.0.1",
+        network_interface="lo",
+        audio_queue=Queue(),
+        entities=[],
+        available_wake_words={},
+        wake_words={},
+        active_wake_words=set(),
+        stop_word=SimpleNamespace(id="stop"),
+        music_player=FakePlayer(),
+        tts_player=FakePlayer(),
+        wakeup_sound="",
+        processing_sound="",
+        timer_finished_sound="",
+        mute_sound="",
+        unmute_sound="",
+        preferences=Preferences(),
+        preferences_path=tmp_path / "preferences.json",
+        download_dir=tmp_path,
+        **kwargs,
+    )
+    satellite = VoiceSatelliteProtocol(state)
+    satellite.connection_made(FakeTransport())
+    return satellite
+
+
+def test_preroll_after_detection(tmp_path):
+    async def run():
+        satellite = _satellite(tmp_path, preroll_seconds=1.0)
+        sent = []
+        satellite.send_audio = sent.extend
+
+        # Wake word is detected one chunk late (e.g., in a worker process)
+        wake_word_audio = b"\x01" * 3200
+        satellite.handle_audio(wake_word_audio)
+        late_audio = b"\x02" * 3200
+        satellite.handle_audio(late_audio)
+        satellite.wakeup(
+            SimpleNamespace(wake_word="Okay Nabu"), delay_samples=len(late_audio) // 2
+        )
+
+        command_audio = b"\x03" * 3200
+        satellite.handle_audio(command_audio)
+        assert b"".join(sent) == late_audio + command_audio
+
+        # Detection without a delay has no pre-roll
+        sent.clear()
+        satellite._is_streaming_audio = False
+        satellite.handle_audio(wake_word_audio)
+        satellite.wakeup(SimpleNamespace(wake_word="Okay Nabu"))
+        satellite.handle_audio(command_audio)
+        assert b"".join(sent) == command_audio
+
+        # End of the TTS response isn't sent when the conversation continues
+        sent.clear()
+        satellite.handle_voice_event(
+            VoiceAssistantEventType.VOICE_ASSISTANT_STT_END, {}
+        )
+        satellite.handle_audio(b"\x04" * 3200)
+        satellite._continue_conversation = True
+        satellite._tts_finished()
+
+        satellite.handle_audio(command_audio)
+        assert b"".join(sent) == command_audio
+
+        # Audio after a late stop word detection is sent
+        sent.clear()
+        satellite.handle_voice_event(
+            VoiceAssistantEventType.VOICE_ASSISTANT_STT_END, {}
+        )
+        satellite.handle_audio(b"\x04" * 3200)
+        satellite.handle_audio(late_audio)
+        satellite._continue_conversation = True
+        satellite.stop(delay_samples=len(late_audio) // 2)
+
+        satellite.handle_audio(command_audio)
+        assert b"".join(sent) == late_audio + command_audio
+
+    asyncio.run(run())
+
+
+def test_set_configuration_while_loading(tmp_path):
+    async def run():
+        available_wake_words = {}
+        for wake_word_id in ("okay_nabu", "hey_jarvis"):
+            wake_word_path = tmp_path / f"{wake_word_id}.json"
+            wake_word_path.touch()
+            available_wake_words[wake_word_id] = AvailableWakeWord(
+                id=wake_word_id,
+                type=WakeWordType.MICRO_WAKE_WORD,
+                wake_word=wake_word_id,
+                trained_languages=["en"],
+                wake_word_path=wake_word_path,
+            )
+
+        model_cache = FakeModelCache()
+        satellite = _satellite(tmp_path, model_cache=model_cache)
+        satellite.state.available_wake_words.update(available_wake_words)
+        satellite.state.wake_words["okay_nabu"] = object()
+        satellite.state.active_wake_words = {"okay_nabu"}
+
+        loading = threading.Event()
+        done = asyncio.Event()
+
+        def load_wake_words(wake_word_ids):
+            loading.wait(timeout=5)
+            model_info = available_wake_words["hey_jarvis"]
+            return {"hey_jarvis"}, {"hey_jarvis": (model_info, object())}
+
+        def wake_words_loaded(*args):
+            wake_words_loaded_orig(*args)
+            done.set()
+
+        satellite._load_wake_words = load_wake_words
+        wake_words_loaded_orig = satellite._wake_words_loaded
+        satellite._wake_words_loaded = wake_words_loaded
+
+        # Requested set is reported while the model loads
+        satellite.handle_message(
+            VoiceAssistantSetConfiguration(active_wake_words=["hey_jarvis"])
+        )
+        response = satellite._configuration_response()
+        assert list(response.active_wake_words) == ["hey_jarvis"]
+        assert satellite.state.active_wake_words == {"okay_nabu"}
+
+        loading.set()
+        await asyncio.wait_for(done.wait(), timeout=5)
+        assert satellite.state.active_wake_words == {"hey_jarvis"}
+        response = satellite._configuration_response()
+        assert list(response.active_wake_words) == ["hey_jarvis"]
+
+        # Loads that finish after the connection is gone are dropped
+        satellite.state.wake_words.pop("hey_jarvis")
+        satellite.state.active_wake_words = {"okay_nabu"}
+        loading.clear()
+        done.clear()
+        satellite.handle_message(
+            VoiceAssistantSetConfiguration(active_wake_words=["hey_jarvis"])
+        )
+        satellite._encoded_configuration_response()
+        satellite.connection_lost(None)
+
+        # Next connection doesn't get the requested set of the old one
+        reconnected = VoiceSatelliteProtocol(satellite.state)
+        reconnected.connection_made(FakeTransport())
+        response = reconnected._configuration_response()
+        assert list(response.active_wake_words) == ["okay_nabu"]
+        assert reconnected._encoded_configuration_response() == encode_messages(
+            [response]
+        )
+
+        loading.set()
+        await asyncio.wait_for(done.wait(), timeout=5)
+        assert satellite.state.active_wake_words == {"okay_nabu"}
+        assert "hey_jarvis" not in satellite.state.wake_words
+        assert model_cache.unloaded == ["hey_jarvis"]
+
+    asyncio.run(run())
+
+
+def test_configuration_after_reconnect(tmp_path):
+    async def run():
+        satellite = _satellite(tmp_path)
+        for wake_word_id in ("okay_nabu", "hey_jarvis"):
+            satellite.state.available_wake_words[wake_word_id] = AvailableWakeWord(
+                id=wake_word_id,
+                type=WakeWordType.MICRO_WAKE_WORD,
+                wake_word=wake_word_id,
+                trained_languages=["en"],
+                wake_word_path=tmp_path / f"{wake_word_id}.json",
+            )
+
+        satellite.state.active_wake_words = {"okay_nabu"}
+        satellite._encoded_configuration_response()
+
+        # Client reconnects before the old connection is closed, and the
+        # active wake words change in between.
+        reconnected = VoiceSatelliteProtocol(satellite.state)
+        reconnected.connection_made(FakeTransport())
+        satellite.state.active_wake_words = {"hey_jarvis"}
+
+        response = reconnected._configuration_response()
+        assert list(response.active_wake_words) == ["hey_jarvis"]
+        assert reconnected._encoded_configuration_response() == encode_messages(
+            [response]
+        )
+
+    asyncio.run(run())
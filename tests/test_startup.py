@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from linux_voice_assistant.__main__ import load_wake_word_models
+from linux_voice_assistant.model_cache import WakeWordModelCache
+from linux_voice_assistant.wake_word import find_available_wake_words
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_load_wake_word_models_in_background():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+
+    # Loaded by Home Assistant while the startup models were loading
+    hey_jarvis = available_wake_words["hey_jarvis"].load()
+
+    state = SimpleNamespace(
+        available_wake_words=available_wake_words,
+        wake_words={"hey_jarvis": hey_jarvis},
+        active_wake_words={"okay_nabu", "hey_jarvis"},
+        wake_words_changed=False,
+        model_cache=WakeWordModelCache(),
+    )
+    models_loaded = threading.Event()
+
+    asyncio.run(
+        load_wake_word_models(state, ["okay_nabu", "hey_jarvis"], models_loaded)
+    )
+
+    assert models_loaded.is_set()
+    assert state.wake_words_changed
+    assert set(state.wake_words) == {"okay_nabu", "hey_jarvis"}
+    assert state.wake_words["hey_jarvis"] is hey_jarvis
+
+
+def test_load_wake_word_models_with_unknown_id():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    state = SimpleNamespace(
+        available_wake_words=available_wake_words,
+        wake_words={},
+        active_wake_words={"okay_nabu", "missing"},
+        wake_words_changed=False,
+        model_cache=WakeWordModelCache(),
+    )
+    models_loaded = threading.Event()
+
+    asyncio.run(load_wake_word_models(state, ["missing", "okay_nabu"], models_loaded))
+
+    assert models_loaded.is_set()
+    assert set(state.wake_words) == {"okay_nabu"}
+
+
+def test_load_wake_word_models_sets_event_on_error():
+    # No model cache
+    state = SimpleNamespace(
+        available_wake_words=find_available_wake_words([_WAKEWORDS_DIR]),
+        wake_words={},
+        active_wake_words={"okay_nabu"},
+        wake_words_changed=False,
+        model_cache=None,
+    )
+    models_loaded = threading.Event()
+
+    asyncio.run(load_wake_word_models(state, ["okay_nabu"], models_loaded))
+
+    assert models_loaded.is_set()
+    assert not state.wake_words_changed
@@ -0,0 +1,63 @@
+import json
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from linux_voice_assistant.wake_word import find_available_wake_words
+from linux_voice_assistant.wake_word_benchmark import (
+    evaluate_model,
+    find_labelled_audio,
+    select_wake_word_ids,
+)
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_evaluate_silence(tmp_path):
+    with wave.open(str(tmp_path / "silence.wav"), "wb") as wav_file:
+        wav_file.setframerate(16000)
+        wav_file.setsampwidth(2)
+        wav_file.setnchannels(1)
+        wav_file.writeframes(np.zeros(16000 * 2, dtype="<i2").tobytes())
+
+    (tmp_path / "silence.json").write_text(
+        json.dumps({"keywords": [{"wake_word": "Okay Nabu", "end": 1.0}]}),
+        encoding="utf-8",
+    )
+
+    labelled_audio = find_labelled_audio(tmp_path)
+    assert len(labelled_audio) == 1
+    assert labelled_audio[0].keywords == [{"wake_word": "okaynabu", "end": 1.0}]
+
+    available_wake_words = find_available_wake_words(
+        [_WAKEWORDS_DIR], exclude_ids=["stop"]
+    )
+    assert "stop" not in available_wake_words
+
+    result = evaluate_model(
+        available_wake_words["okay_nabu"],
+        labelled_audio,
+        block_size=1024,
+        refractory_seconds=2.0,
+        max_keyword_seconds=2.0,
+        max_delay_seconds=1.5,
+    )
+
+    assert result["audio_seconds"] == 2.0
+    assert result["keywords"] == 1
+    assert result["missed"] == 1
+    assert result["false_accepts"] == 0
+    assert result["real_time_factor"] > 0
+    assert set(result["chunk_latency_ms"]) == {"mean", "p50", "p90", "p99", "max"}
+
+
+def test_stop_model_only_when_requested():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    assert "stop" in available_wake_words
+
+    wake_word_ids = select_wake_word_ids(available_wake_words, None, "stop")
+    assert "okay_nabu" in wake_word_ids
+    assert "stop" not in wake_word_ids
+
+    assert select_wake_word_ids(available_wake_words, ["stop"], "stop") == ["stop"]
@@ -0,0 +1,52 @@
+import json
+import shutil
+from pathlib import Path
+
+from linux_voice_assistant import wake_word
+from linux_voice_assistant.wake_word import WakeWordIndex
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_rescan(tmp_path, monkeypatch):
+    wake_word_dir = tmp_path / "wakewords"
+    wake_word_dir.mkdir()
+    for wake_word_id in ("okay_nabu", "hey_jarvis", "stop"):
+        shutil.copy(_WAKEWORDS_DIR / f"{wake_word_id}.json", wake_word_dir)
+
+    parsed = []
+    load_wake_word_config = wake_word.load_wake_word_config
+
+    def counting_load(model_config_path):
+        parsed.append(model_config_path.stem)
+        return load_wake_word_config(model_config_path)
+
+    monkeypatch.setattr(wake_word, "load_wake_word_config", counting_load)
+
+    index_path = tmp_path / "index.json"
+    index = WakeWordIndex([wake_word_dir], exclude_ids=["stop"], index_path=index_path)
+    assert index.scan()
+    assert sorted(index.wake_words) == ["hey_jarvis", "okay_nabu"]
+    assert index.wake_words["okay_nabu"].wake_word == "Okay Nabu"
+    assert sorted(parsed) == ["hey_jarvis", "okay_nabu"]
+
+    # Unchanged configs aren't parsed again, even after a restart
+    parsed.clear()
+    assert not index.scan()
+    index = WakeWordIndex([wake_word_dir], exclude_ids=["stop"], index_path=index_path)
+    assert not index.scan()
+    assert sorted(index.wake_words) == ["hey_jarvis", "okay_nabu"]
+    assert parsed == []
+
+    # Added, changed, removed, and invalid
+    shutil.copy(_WAKEWORDS_DIR / "alexa.json", wake_word_dir)
+    config = json.loads((wake_word_dir / "okay_nabu.json").read_text())
+    config["wake_word"] = "Okay Nabu!"
+    (wake_word_dir / "okay_nabu.json").write_text(json.dumps(config))
+    (wake_word_dir / "hey_jarvis.json").unlink()
+    (wake_word_dir / "partial.json").write_text('{"type": "mi')
+
+    assert index.scan()
+    assert sorted(index.wake_words) == ["alexa", "okay_nabu"]
+    assert index.wake_words["okay_nabu"].wake_word == "Okay Nabu!"
+    assert sorted(parsed) == ["alexa", "okay_nabu", "partial"]
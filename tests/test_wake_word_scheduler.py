@@ -0,0 +1,91 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from linux_voice_assistant.wake_word import (
+    WakeWordDetector,
+    WakeWordScheduler,
+    find_available_wake_words,
+    reset_streaming_state,
+)
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+class FakeModel:
+    def __init__(self, model_id):
+        self.id = model_id
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+
+def _state(**kwargs):
+    okay_nabu = FakeModel("okay_nabu")
+    values = {
+        "muted": False,
+        "satellite": object(),
+        "wake_words": {"okay_nabu": okay_nabu},
+        "active_wake_words": {"okay_nabu"},
+        "wake_words_changed": False,
+        "stop_word": FakeModel("stop"),
+    }
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+def test_stop_word_only_when_active():
+    state = _state()
+    scheduler = WakeWordScheduler()
+
+    wake_words, stop_word = scheduler.select(state)
+    assert [ww.id for ww in wake_words] == ["okay_nabu"]
+    assert stop_word is None
+
+    state.active_wake_words.add("stop")
+    wake_words, stop_word = scheduler.select(state)
+    assert stop_word is state.stop_word
+    assert state.stop_word.resets == 1
+
+    # Still running, no reset
+    scheduler.select(state)
+    assert state.stop_word.resets == 1
+
+
+def test_nothing_runs_when_muted_or_disconnected():
+    state = _state()
+    okay_nabu = state.wake_words["okay_nabu"]
+    scheduler = WakeWordScheduler()
+
+    scheduler.select(state)
+    assert okay_nabu.resets == 1
+    assert not scheduler.is_idle
+
+    state.muted = True
+    assert scheduler.select(state) == ([], None)
+    assert scheduler.is_idle
+
+    # Re-enabled models are reset
+    state.muted = False
+    scheduler.select(state)
+    assert okay_nabu.resets == 2
+
+    state.satellite = None
+    assert scheduler.select(state) == ([], None)
+
+
+def test_reset_keeps_interpreter():
+    model = find_available_wake_words([_WAKEWORDS_DIR])["okay_nabu"].load()
+    interpreter = model.interpreter
+
+    detector = WakeWordDetector()
+    detector.set_wake_words([model])
+    for _ in range(20):
+        detector.process(bytes(2048))
+
+    assert model._probabilities
+
+    reset_streaming_state(model)
+    assert not model._probabilities
+    assert not model._features
+    assert model.interpreter is interpreter
@@ -0,0 +1,101 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from linux_voice_assistant.wake_word import find_available_wake_words
+from linux_voice_assistant.wake_word_worker import (
+    SharedPcmRing,
+    WakeWordWorkerPool,
+    _set_models,
+)
+
+_WAKEWORDS_DIR = Path(__file__).parent.parent / "wakewords"
+
+
+def test_shared_ring_readers():
+    ring = SharedPcmRing(1000)
+    try:
+        reader = SharedPcmRing(1000, name=ring.name, create=False)
+        out = np.zeros(1000, dtype="<i2")
+
+        ring.write(np.arange(700, dtype="<i2"))
+        read_pos, num_samples, lost = reader.read(0, out, 300)
+        assert (read_pos, num_samples, lost) == (600, 600, 0)
+        assert np.array_equal(out[:600], np.arange(600))
+
+        # Reader fell behind by more than the capacity
+        ring.write(np.arange(1000, 2000, dtype="<i2"))
+        read_pos, num_samples, lost = reader.read(read_pos, out, 100)
+        assert lost == 100
+        assert (read_pos, num_samples) == (1700, 1000)
+        assert np.array_equal(out, np.arange(1000, 2000))
+
+        ring.close()
+        assert reader.closed
+        reader.release()
+    finally:
+        ring.release()
+
+
+def test_worker_detections(tmp_path):
+    # Model that activates on any audio
+    config = json.loads((_WAKEWORDS_DIR / "okay_nabu.json").read_text())
+    config["model"] = str((_WAKEWORDS_DIR / "okay_nabu.tflite").resolve())
+    config["micro"]["probability_cutoff"] = 0.0
+    (tmp_path / "okay_nabu.json").write_text(json.dumps(config))
+
+    available_wake_words = find_available_wake_words([tmp_path])
+    okay_nabu = available_wake_words["okay_nabu"].load()
+    stop_info = find_available_wake_words([_WAKEWORDS_DIR])["stop"]
+
+    workers = WakeWordWorkerPool(
+        2,
+        block_size=1024,
+        capacity=16000,
+        available_wake_words=available_wake_words,
+        stop_word_info=stop_info,
+    )
+    workers.start()
+    try:
+        workers.set_wake_words([okay_nabu])
+
+        rng = np.random.default_rng(0)
+        activated = []
+        deadline = time.monotonic() + 30
+        while (not activated) and (time.monotonic() < deadline):
+            chunk = rng.normal(0, 3000, size=1024).astype("<i2")
+            activated, _stopped = workers.process(chunk.tobytes())
+            time.sleep(0.01)
+
+        assert activated == [okay_nabu]
+
+        # Samples written after the chunk the wake word was detected in
+        assert 0 <= workers.detection_delay < workers.ring.write_pos
+    finally:
+        workers.close()
+
+
+def test_worker_unloads_inactive_models():
+    available_wake_words = find_available_wake_words([_WAKEWORDS_DIR])
+    okay_nabu = available_wake_words["okay_nabu"]
+    hey_jarvis = available_wake_words["hey_jarvis"]
+    stop = available_wake_words["stop"]
+    loaded = {}
+
+    wake_words, stop_word, stop_word_id = _set_models(
+        0, loaded, [(okay_nabu, False), (stop, True)], running=set(), stop_word_id=""
+    )
+    assert [ww.id for ww in wake_words] == ["okay_nabu"]
+    assert stop_word is loaded["stop"]
+    assert stop_word_id == "stop"
+
+    # Switched wake word, stop model not running
+    running = {id(model) for model in [*wake_words, stop_word]}
+    wake_words, stop_word, stop_word_id = _set_models(
+        0, loaded, [(hey_jarvis, False)], running=running, stop_word_id=stop_word_id
+    )
+    assert [ww.id for ww in wake_words] == ["hey_jarvis"]
+    assert stop_word is None
+    assert set(loaded) == {"hey_jarvis", "stop"}